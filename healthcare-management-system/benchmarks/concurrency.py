@@ -0,0 +1,172 @@
+"""
+Stress test for concurrent booking: several processes book random hours in the same storage.
+
+Usage:
+    python benchmarks/concurrency.py [--processes 4] [--doctors 1 4] [--attempts 100]
+                                     [--storage json|sqlite] [--output FILE]
+
+Every process books through its own repository and appointmentScheduler, as separate terminals
+running main.py would. Afterwards the stored appointments are checked against the stored doctor
+schedules: no hour may be booked twice, and every booked hour must belong to exactly one
+appointment. Exits with status 1 if a check fails. Comparing the attempts per second for one
+doctor with those for as many doctors as processes shows how far bookings for different doctors
+proceed in parallel (with JSON storage; SQLite has a single write lock).
+
+With JSON storage a booking locks its doctor's file, but every booking also appends to the one
+appointments journal under appointments.json.lock (with an fsync), and IDs are reserved under
+the same lock (in blocks of APPOINTMENT_ID_BLOCK). Bookings for different doctors therefore still
+queue on that lock, and it caps the total rate whatever the number of doctors. The time the
+workers spent waiting for it, and for the doctor locks, is reported per run.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+from multiprocessing import Process, Queue
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from Users.Doctors import DEFAULT_WEEKLY_HOURS, Doctor
+from appointmentSchedule.appointment import appointmentScheduler
+from storage import open_repository
+from storage.cache import DataCache
+from storage.repository import JsonRepository
+
+# Weekdays of an eight-week booking horizon
+DAYS = [(date(2030, 1, 7) + timedelta(days=offset)).isoformat() for offset in range(56) if offset % 7 < 5]
+HOURS = DEFAULT_WEEKLY_HOURS["Monday"]
+
+
+def open_storage(root, storage):
+    if storage == "json":
+        return JsonRepository(root, cache=DataCache())  # A cache of its own, like a separate process
+    return open_repository(root, storage)
+
+
+def book(root, storage, worker, doctor_ids, attempts, seed, results):
+    # Runs in a worker process: try to book random (doctor, date, hour) slots
+    booked, error, locks = 0, None, None
+    try:
+        repository = open_storage(root, storage)
+        scheduler = appointmentScheduler(repository=repository)
+        doctors = [repository.get_doctor(doctor_id) for doctor_id in doctor_ids]
+        rng = random.Random(seed * 1000 + worker)
+        for _ in range(attempts):
+            doctor = rng.choice(doctors)
+            if scheduler.schedule(rng.choice(DAYS), rng.choice(HOURS), doctor, f"patient-{worker}"):
+                booked += 1
+        if storage == "json":
+            locks = repository.lock_stats()
+    except Exception as e:
+        error = repr(e)
+    finally:
+        results.put((worker, booked, error, locks))
+
+
+def check(repository, doctor_ids):
+    """
+    Compare the stored appointments with the stored schedules.
+    :return: Dictionary with the number of appointments, double bookings and mismatched hours.
+    """
+    appointments = repository.list_appointments()
+    slots = Counter((a["doctorID"], a["date"], a["time"]) for a in appointments)
+    booked = set()
+    for doctor_id in doctor_ids:
+        for date_key, (_, hours_booked) in repository.get_doctor(doctor_id).daysWorking.items():
+            booked.update((doctor_id, date_key, hour) for hour in hours_booked)
+    return {
+        "appointments": len(appointments),
+        "double_bookings": sum(count - 1 for count in slots.values() if count > 1),
+        "mismatched_hours": len(booked.symmetric_difference(slots)),
+    }
+
+
+def run(processes, doctors, attempts, storage="json", seed=0):
+    """
+    Let several processes book concurrently and check the result.
+    :param processes: Number of booking processes.
+    :param doctors: Number of doctors the processes book with.
+    :param attempts: Booking attempts per process.
+    :param storage: 'json' or 'sqlite'.
+    :param seed: Random seed.
+    :return: Dictionary with the throughput and the results of check().
+    """
+    with tempfile.TemporaryDirectory() as root:
+        repository = open_storage(root, storage)
+        doctor_ids = list(range(1, doctors + 1))
+        for doctor_id in doctor_ids:
+            repository.save_doctor(Doctor(doctor_id, f"Dr. {doctor_id}", {}, DEFAULT_WEEKLY_HOURS))
+
+        results = Queue()
+        workers = [
+            Process(target=book, args=(root, storage, worker, doctor_ids, attempts, seed, results))
+            for worker in range(processes)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        outcomes = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        summary = check(open_storage(root, storage), doctor_ids)
+        summary.update({
+            "processes": processes,
+            "doctors": doctors,
+            "storage": storage,
+            "booked": sum(booked for _, booked, _, _ in outcomes),
+            "errors": [error for _, _, error, _ in outcomes if error],
+            "attempts_per_second": round(processes * attempts / elapsed, 1),
+        })
+        for name in ("appointments", "doctors"):
+            stats = [locks[name] for _, _, _, locks in outcomes if locks]
+            if stats:
+                # Share of the workers' time spent waiting for this lock
+                waited = sum(lock["waited"] for lock in stats)
+                summary[f"{name}_lock"] = {
+                    "acquisitions": sum(lock["acquisitions"] for lock in stats),
+                    "contended": sum(lock["contended"] for lock in stats),
+                    "waited_share": round(waited / (processes * elapsed), 3),
+                }
+        summary["lost_bookings"] = summary["booked"] - summary["appointments"]
+        return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Book concurrently from several processes and check for double bookings.")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--doctors", type=int, nargs="+", default=[1, 4],
+                        help="Numbers of doctors to run with (e.g., 1 and the number of processes).")
+    parser.add_argument("--attempts", type=int, default=100, help="Booking attempts per process.")
+    parser.add_argument("--storage", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    failed = False
+    summaries = []
+    for doctors in args.doctors:
+        summary = run(args.processes, doctors, args.attempts, args.storage, args.seed)
+        summaries.append(summary)
+        print(f"{args.processes} processes, {doctors} doctors ({args.storage}): "
+              f"{summary['attempts_per_second']} attempts/s, {summary['booked']} booked, "
+              f"{summary['double_bookings']} double bookings, {summary['lost_bookings']} lost, "
+              f"{summary['mismatched_hours']} mismatched hours")
+        for name, label in (("appointments", "appointments lock"), ("doctors", "doctor locks")):
+            lock = summary.get(f"{name}_lock")
+            if lock:
+                print(f"  {label}: {lock['contended']} of {lock['acquisitions']} acquisitions waited, "
+                      f"{lock['waited_share']:.0%} of the workers' time")
+        for error in summary["errors"]:
+            print(f"  Worker failed: {error}")
+        failed = failed or any(summary[name] for name in ("double_bookings", "lost_bookings", "mismatched_hours", "errors"))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(summaries, file, indent=4)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,211 @@
+"""
+Synthetic data generator for benchmarks.
+
+Produces doctors, patients, appointments, medical histories and patient records in the same
+shapes as doctor_<id>.json, appointments.json, medical_histories.json and patient_records.json.
+Every appointment is booked in its doctor's schedule, so the generated files are consistent.
+
+Usage:
+    python benchmarks/datagen.py --size 100000 --output /tmp/meditrack-data [--seed 0]
+"""
+import argparse
+import json
+import os
+import random
+from datetime import date, timedelta
+
+WORKING_HOURS = list(range(8, 18))
+DAYS_PER_DOCTOR = 30
+FIRST_DAY = date(2025, 1, 6)
+
+DIAGNOSES = ["asthma", "diabetes", "hypertension", "influenza", "migraine", "bronchitis", "anemia", "arthritis"]
+INJURIES = ["none", "sprained ankle", "fractured wrist", "concussion", "whiplash", "burn"]
+MEDICATIONS = ["ibuprofen", "paracetamol", "insulin", "amoxicillin", "salbutamol", "lisinopril", "metformin"]
+ALLERGIES = ["none", "penicillin", "peanuts", "latex", "pollen", "shellfish"]
+FIRST_NAMES = ["alex", "sam", "jordan", "taylor", "morgan", "casey", "riley", "jamie", "drew", "robin"]
+LAST_NAMES = ["smith", "jones", "garcia", "brown", "miller", "davis", "lopez", "wilson", "moore", "clark"]
+
+
+def default_counts(size):
+    """
+    Get the number of entities of each kind for a dataset size.
+    :param size: Number of patients, appointments, histories and records.
+    :return: Dictionary of counts; there is one doctor per 100 patients.
+    """
+    return {
+        "doctors": max(1, size // 100),
+        "patients": size,
+        "appointments": size,
+        "histories": size,
+        "records": size,
+    }
+
+
+def random_date(rng, start=date(2000, 1, 1), days=9500):
+    return (start + timedelta(days=rng.randrange(days))).isoformat()
+
+
+def generate_patients(count, rng):
+    """
+    Generate patients with the fields of the patient class.
+    :return: List of patient dictionaries; names are unique.
+    """
+    patients = []
+    for patient_id in range(1, count + 1):
+        name = f"{rng.choice(FIRST_NAMES)}{patient_id}"
+        last_name = rng.choice(LAST_NAMES)
+        patients.append({
+            "PatientID": patient_id,
+            "Name": name,
+            "lastName": last_name,
+            "DOB": random_date(rng, start=date(1940, 1, 1), days=30000),
+            "Email": f"{name}.{last_name}@example.com",
+            "PhoneNumber": f"555-{rng.randrange(10000):04d}",
+            "Address": f"{rng.randrange(1, 999)} Main Street",
+        })
+    return patients
+
+
+def generate_doctors(count, rng):
+    """
+    Generate doctors working DAYS_PER_DOCTOR consecutive days with a random set of hours each day.
+    :return: List of doctor dictionaries in the doctor_<id>.json format (nothing booked yet).
+    """
+    days = [(FIRST_DAY + timedelta(days=offset)).isoformat() for offset in range(DAYS_PER_DOCTOR)]
+    doctors = []
+    for doctor_id in range(1, count + 1):
+        days_working = {}
+        for day in days:
+            hours = sorted(rng.sample(WORKING_HOURS, rng.randint(6, len(WORKING_HOURS))))
+            days_working[day] = [hours, []]
+        doctors.append({"DoctorID": doctor_id, "Name": f"Dr. {rng.choice(LAST_NAMES).title()} {doctor_id}",
+                        "daysWorking": days_working})
+    return doctors
+
+
+def generate_appointments(count, doctors, patients, rng):
+    """
+    Generate appointments on free working hours and book them in the doctors' schedules.
+    :return: List of appointment dictionaries in the appointments.json format.
+    """
+    slots = [
+        (doctor, day, hour)
+        for doctor in doctors
+        for day, (hours_working, _) in doctor["daysWorking"].items()
+        for hour in hours_working
+    ]
+    if count > len(slots):
+        raise ValueError(f"{count} appointments do not fit in {len(slots)} working hours.")
+    appointments = []
+    for appointment_id, slot in enumerate(rng.sample(slots, count), start=1):
+        doctor, day, hour = slot
+        doctor["daysWorking"][day][1].append(hour)
+        appointments.append({
+            "appointmentID": appointment_id,
+            "patient": rng.choice(patients)["Name"],
+            "doctorID": doctor["DoctorID"],
+            "doctorName": doctor["Name"],
+            "date": day,
+            "time": hour,
+        })
+    for doctor in doctors:
+        for _, hours_booked in doctor["daysWorking"].values():
+            hours_booked.sort()
+    return appointments
+
+
+def generate_histories(count, doctors, patients, rng):
+    """
+    Generate medical histories in the medical_histories.json format.
+    """
+    return [
+        {
+            "historyID": str(history_id),
+            "date": random_date(rng),
+            "patient": rng.choice(patients)["Name"],
+            "doctor": rng.choice(doctors)["Name"],
+            "age": rng.randint(0, 99),
+            "diagnosis": rng.sample(DIAGNOSES, rng.randint(1, 2)),
+            "injuries": rng.sample(INJURIES, 1),
+            "medications": rng.sample(MEDICATIONS, rng.randint(0, 3)),
+            "allergies": rng.sample(ALLERGIES, 1),
+        }
+        for history_id in range(1, count + 1)
+    ]
+
+
+def generate_records(count, doctors, patients, rng):
+    """
+    Generate patient records in the patient_records.json format (Doctor holds the DoctorID).
+    """
+    return [
+        {
+            "recordID": str(record_id),
+            "Date": random_date(rng),
+            "Time": f"{rng.choice(WORKING_HOURS):02d}:00",
+            "Doctor": rng.choice(doctors)["DoctorID"],
+            "Patient": rng.choice(patients)["Name"],
+            "Symptoms": rng.choice(["cough", "fever", "headache", "fatigue", "pain"]),
+            "Diagnosis": rng.choice(DIAGNOSES),
+            "Treatment": rng.choice(["rest", "physiotherapy", "surgery", "observation"]),
+            "Medication": rng.choice(MEDICATIONS),
+            "results": rng.choice(["normal", "abnormal", "pending"]),
+            "notes": "",
+        }
+        for record_id in range(1, count + 1)
+    ]
+
+
+def generate(size, seed=0, **counts):
+    """
+    Generate a complete dataset.
+    :param size: Dataset size (see default_counts).
+    :param seed: Random seed; the same size and seed always give the same data.
+    :param counts: Optional overrides, e.g., doctors=10.
+    :return: Dictionary with lists of doctors, patients, appointments, histories and records.
+    """
+    rng = random.Random(seed)
+    counts = {**default_counts(size), **counts}
+    doctors = generate_doctors(counts["doctors"], rng)
+    patients = generate_patients(counts["patients"], rng)
+    return {
+        "doctors": doctors,
+        "patients": patients,
+        "appointments": generate_appointments(counts["appointments"], doctors, patients, rng),
+        "histories": generate_histories(counts["histories"], doctors, patients, rng),
+        "records": generate_records(counts["records"], doctors, patients, rng),
+    }
+
+
+def write_dataset(data, target):
+    """
+    Write a dataset to a directory in the layout the JSON repository reads.
+    :param data: Dataset returned by generate.
+    :param target: Directory to write to; created if needed.
+    """
+    os.makedirs(target, exist_ok=True)
+    for doctor in data["doctors"]:
+        with open(os.path.join(target, f"doctor_{doctor['DoctorID']}.json"), "w") as file:
+            json.dump(doctor, file, indent=4)
+    for filename, key in (
+        ("appointments.json", "appointments"),
+        ("medical_histories.json", "histories"),
+        ("patient_records.json", "records"),
+        ("patients.json", "patients"),
+    ):
+        with open(os.path.join(target, filename), "w") as file:
+            json.dump(data[key], file, indent=4)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset.")
+    parser.add_argument("--size", type=int, default=1000, help="Patients, appointments, histories and records.")
+    parser.add_argument("--doctors", type=int, help="Number of doctors (default: size / 100).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True, help="Directory to write the JSON files to.")
+    args = parser.parse_args()
+
+    overrides = {"doctors": args.doctors} if args.doctors else {}
+    dataset = generate(args.size, seed=args.seed, **overrides)
+    write_dataset(dataset, args.output)
+    print(", ".join(f"{len(items)} {kind}" for kind, items in dataset.items()) + f" written to {args.output}")
@@ -0,0 +1,92 @@
+"""
+Files written per user action with and without write coalescing (storage.unit_of_work).
+
+Usage:
+    python benchmarks/group_commit.py [--size 10000] [--actions 20] [--output FILE]
+
+A session adds `actions` medical histories and `actions` patient records, then books `actions`
+appointments, against a generated dataset. It runs once writing every change at once (a unit of
+work flushing after each change, as the storage did before) and once with the default
+thresholds, flushing at the end like a menu exit. Every file written is replaced atomically
+with one fsync; the journal line of each booking is appended without one and is not counted.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import datagen
+from Users.Doctors import DEFAULT_WEEKLY_HOURS
+from appointmentSchedule.appointment import appointmentScheduler
+from storage.cache import DataCache
+from storage.repository import JsonRepository
+from storage.unit_of_work import UnitOfWork
+
+
+def free_slots(count):
+    # (date, hour) pairs of the default week, from a Monday in the future
+    slots, day = [], date(2030, 1, 7)
+    while len(slots) < count:
+        slots.extend((day.isoformat(), hour) for hour in DEFAULT_WEEKLY_HOURS.get(day.strftime("%A"), []))
+        day += timedelta(days=1)
+    return slots[:count]
+
+
+def session(directory, actions, unit_of_work):
+    # Returns (seconds, files written) for one session
+    repository = JsonRepository(directory, cache=DataCache(), unit_of_work=unit_of_work)
+    repository.list_histories()
+    repository.list_records()
+    start = time.perf_counter()
+    for i in range(actions):
+        repository.save_history({"historyID": f"bench-{i}", "date": "2030-01-01", "patient": "bench",
+                                 "doctor": "bench", "age": 30, "diagnosis": ["flu"], "injuries": [],
+                                 "medications": [], "allergies": []})
+        repository.save_record({"recordID": f"bench-{i}", "Patient": "bench", "Doctor": 1, "Date": "2030-01-01"})
+    scheduler = appointmentScheduler(repository=repository)
+    doctor = repository.get_doctor(1)
+    doctor.setWeeklyHours(DEFAULT_WEEKLY_HOURS)
+    for i, (day, hour) in enumerate(free_slots(actions)):
+        scheduler.schedule(day, hour, doctor, f"bench-{i}")
+    repository.flush()
+    return time.perf_counter() - start, unit_of_work.writes
+
+
+def run(size, actions, seed=0):
+    """
+    Run the session with and without coalescing.
+    :param size: Dataset size (see datagen.default_counts).
+    :param actions: Histories, records and bookings per session.
+    :param seed: Random seed.
+    :return: List of dictionaries with the seconds and files written per mode.
+    """
+    results = []
+    for mode, make_unit in (("every change", lambda: UnitOfWork(max_changes=1)), ("coalesced", UnitOfWork)):
+        with tempfile.TemporaryDirectory() as directory:
+            datagen.write_dataset(datagen.generate(size, seed=seed), directory)
+            seconds, writes = session(directory, actions, make_unit())
+        results.append({"mode": mode, "actions": 3 * actions, "seconds": round(seconds, 4), "files_written": writes,
+                        "files_per_action": round(writes / (3 * actions), 2)})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the files written per action with and without coalescing.")
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--actions", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = run(args.size, args.actions, args.seed)
+    for result in results:
+        print(f"{result['mode']:<14}{result['actions']} actions: {result['seconds']}s, "
+              f"{result['files_written']} files written ({result['files_per_action']} per action)")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
@@ -0,0 +1,185 @@
+"""
+Memory benchmark: the slotted models against dictionaries and classes with a per-instance __dict__.
+
+Usage:
+    python benchmarks/memory.py [--rows 1000000] [--entities records histories] [--output FILE]
+                                [--terms-size 100000]
+
+For every entity, the same field values are held in three layouts: a dictionary per row (how
+PatientRecordManager and the repositories held rows), an instance of a plain class (how history,
+appointment, Doctor and patient were laid out) and an instance of the slotted model. The values
+are shared between the rows, so the measured bytes per row are the cost of the layout itself.
+
+With --terms-size, the JSON files of a generated dataset are also loaded with and without interning
+the repeated names and clinical terms (utils.vocabulary), and their size is compared with the
+dictionary-encoded format.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import datagen
+from Users.Doctors import Doctor
+from Users.Patient import patient
+from appointmentSchedule.appointment import appointment
+from medicalHistory.history import history
+from medicalHistory.index import HISTORY_TERMS
+from patientRecords.record import RECORD_TERMS, Record
+from storage.repository import APPOINTMENT_TERMS
+from utils.vocabulary import Vocabulary, decode_rows, encode_rows
+
+DISTINCT_ROWS = 1000  # Rows are cycled from this many generated ones
+
+
+class Legacy:
+    # Baseline: attributes kept in the instance's __dict__
+    def __init__(self, fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+
+def templates(data):
+    """
+    Build one model of each entity per generated row.
+    :param data: Dataset returned by datagen.generate.
+    :return: Dictionary of entity names to lists of model objects.
+    """
+    doctors = {d["DoctorID"]: Doctor.from_dict(d) for d in data["doctors"]}
+    return {
+        "records": [Record.from_dict(r, doctors) for r in data["records"]],
+        "histories": [history.from_dict(h) for h in data["histories"]],
+        "appointments": [
+            appointment(a["appointmentID"], a["patient"], doctors[a["doctorID"]], f"{a['date']} {a['time']:02d}:00")
+            for a in data["appointments"]
+        ],
+        "doctors": list(doctors.values()),
+        "patients": [patient.from_dict(p) for p in data["patients"]],
+    }
+
+
+def build(layout, model_class, values, rows):
+    # Create `rows` objects of a layout from the cycled field values
+    if layout == "dict":
+        return [dict(values[i % len(values)]) for i in range(rows)]
+    if layout == "class":
+        legacy_class = type(f"Legacy{model_class.__name__}", (Legacy,), {})
+        return [legacy_class(values[i % len(values)]) for i in range(rows)]
+    objects = []
+    for i in range(rows):
+        obj = model_class.__new__(model_class)
+        for name, value in values[i % len(values)].items():
+            setattr(obj, name, value)
+        objects.append(obj)
+    return objects
+
+
+def traced(function):
+    # Call a function and return its result with the bytes still allocated afterwards
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, used
+
+
+def measure(layout, model_class, values, rows):
+    """
+    Measure the memory taken by `rows` objects of a layout.
+    :return: Bytes per row, including the row's list slot.
+    """
+    objects, used = traced(lambda: build(layout, model_class, values, rows))
+    del objects
+    return used / rows
+
+
+def run(rows, entities, seed=0):
+    """
+    Measure every layout of the given entities.
+    :param rows: Number of rows per measurement.
+    :param entities: Entity names (see templates).
+    :param seed: Random seed for the generated values.
+    :return: List of dictionaries with the bytes per row of each layout.
+    """
+    models = templates(datagen.generate(DISTINCT_ROWS, seed=seed, doctors=DISTINCT_ROWS))
+    results = []
+    for entity in entities:
+        objects = models[entity]
+        model_class = type(objects[0])
+        values = [{name: getattr(obj, name) for name in model_class.__slots__} for obj in objects]
+        result = {"entity": entity, "rows": rows}
+        for layout in ("dict", "class", "slots"):
+            result[layout] = round(measure(layout, model_class, values, rows), 1)
+        results.append(result)
+    return results
+
+
+def term_savings(size, seed=0):
+    """
+    Measure the memory and file size the vocabulary saves on the JSON files of a generated dataset.
+    :param size: Dataset size (see datagen.default_counts).
+    :param seed: Random seed.
+    :return: List of dictionaries per file with the resident bytes loaded as is and interned, and
+             the file bytes indented (as written today), compact, and compact with encoded terms.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        datagen.write_dataset(datagen.generate(size, seed=seed), directory)
+        for filename, terms in (
+            ("appointments.json", APPOINTMENT_TERMS),
+            ("medical_histories.json", HISTORY_TERMS),
+            ("patient_records.json", RECORD_TERMS),
+        ):
+            path = os.path.join(directory, filename)
+            with open(path) as file:
+                text = file.read()
+            rows, plain = traced(lambda: json.loads(text))
+            del rows
+            rows, interned = traced(lambda: decode_rows(json.loads(text), terms, Vocabulary()))
+            results.append({
+                "file": filename,
+                "rows": len(rows),
+                "resident_plain": plain,
+                "resident_interned": interned,
+                "file_indented": len(text),
+                "file_compact": len(json.dumps(rows, separators=(",", ":"))),
+                "file_encoded": len(json.dumps(encode_rows(rows, terms), separators=(",", ":"))),
+            })
+            del rows
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the memory of the slotted models with dicts and plain classes.")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--entities", nargs="+", default=["records", "histories", "appointments", "doctors", "patients"],
+                        choices=["records", "histories", "appointments", "doctors", "patients"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--terms-size", type=int, help="Also measure interning and encoding on a dataset of this size.")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.entities, args.seed)
+    print(f"{'entity':<14}{'dict B/row':>12}{'class B/row':>13}{'slots B/row':>13}{'vs dict':>9}{'vs class':>10}")
+    for result in results:
+        print(f"{result['entity']:<14}{result['dict']:>12}{result['class']:>13}{result['slots']:>13}"
+              f"{result['slots'] / result['dict']:>8.0%}{result['slots'] / result['class']:>10.0%}")
+    if args.terms_size:
+        terms = term_savings(args.terms_size, args.seed)
+        print(f"\n{'file':<24}{'resident MB':>12}{'interned MB':>13}{'indented MB':>13}{'compact MB':>12}{'encoded MB':>12}")
+        for result in terms:
+            print(f"{result['file']:<24}" + "".join(
+                f"{result[name] / 1e6:>{width}.1f}" for name, width in (
+                    ("resident_plain", 12), ("resident_interned", 13), ("file_indented", 13),
+                    ("file_compact", 12), ("file_encoded", 12))))
+        results = {"layouts": results, "terms": terms}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
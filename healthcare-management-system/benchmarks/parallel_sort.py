@@ -0,0 +1,79 @@
+"""
+Serial against parallel sorting of patient records, to find where the process pool pays off.
+
+Usage:
+    python benchmarks/parallel_sort.py [--sizes 10000 100000 1000000] [--workers N] [--key Date] [--output FILE]
+
+The crossover is the smallest size at which the parallel sort is faster; use it to tune
+utils.parallel_sort.PARALLEL_THRESHOLD for a machine.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import datagen
+from utils.parallel_sort import parallel_sort_items
+from utils.sorting import sort_items
+
+
+def timed(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 4)
+
+
+def run(sizes, workers, key, repeat=3, seed=0):
+    """
+    Time the serial and the parallel sort for every size.
+    :param sizes: List of numbers of records.
+    :param workers: Number of worker processes.
+    :param key: Record field to sort by.
+    :param repeat: Repetitions per measurement; the fastest is kept.
+    :param seed: Random seed for the records.
+    :return: Dictionary with the timings per size and the crossover size (or None).
+    """
+    rng = random.Random(seed)
+    doctors = datagen.generate_doctors(10, rng)
+    patients = datagen.generate_patients(1000, rng)
+    records = datagen.generate_records(max(sizes), doctors, patients, rng)
+    results = {}
+    crossover = None
+    for size in sorted(sizes):
+        subset = records[:size]
+        serial = timed(lambda: sort_items(subset, key=key, strategy="quick"), repeat)
+        parallel = timed(lambda: parallel_sort_items(subset, key=key, workers=workers, threshold=0,
+                                                     strategy="quick"), repeat)
+        results[str(size)] = {"serial": serial, "parallel": parallel}
+        if crossover is None and parallel < serial:
+            crossover = size
+    return {"workers": workers, "key": key, "sizes": results, "crossover": crossover}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the serial and the parallel record sort.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--key", default="Date", help="Record field to sort by (e.g., Date or Patient).")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.workers, args.key, args.repeat)
+    for size, timings in results["sizes"].items():
+        print(f"n={size}: serial {timings['serial']}s, parallel ({args.workers} workers) {timings['parallel']}s")
+    if results["crossover"] is None:
+        print("No crossover: the parallel sort was slower at every size.")
+    else:
+        print(f"Crossover: parallel is faster from n={results['crossover']}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
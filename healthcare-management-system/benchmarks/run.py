@@ -0,0 +1,391 @@
+"""
+Benchmark harness for the managers and the JSON storage.
+
+Generates a synthetic dataset per size (see datagen.py), times every case and writes the
+results as JSON, so runs from different commits can be compared.
+
+Usage:
+    python benchmarks/run.py [--sizes 1000 10000] [--cases bookHour cancel] [--repeat 3]
+                             [--output results.json] [--compare baseline.json] [--max-regression 1.25]
+
+With --compare, exits with status 1 when a case is slower than the baseline by more than
+--max-regression (a ratio of per-operation times).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import datagen
+from Users.Doctors import Doctor
+from Users.registry import EntityRegistry
+from appointmentSchedule.appointment import appointmentScheduler
+from appointmentSchedule.availability import earliest_slots
+from appointmentSchedule.merge_sort import merge_sort
+from medicalHistory.heap_sort import heap_sort, history_date_key, most_recent
+from patientRecords.record import PatientRecordManager
+from storage.cache import DataCache
+from storage.repository import JsonRepository
+from utils.sorted_collection import SortedCollection
+
+
+class Fixture:
+    def __init__(self, size, seed, directory):
+        """
+        Dataset shared by the cases of one size.
+        :param size: Dataset size (see datagen.default_counts).
+        :param seed: Random seed for the data and the operations.
+        :param directory: Directory the dataset is written to for the storage cases.
+        """
+        self.size = size
+        self.seed = seed
+        self.directory = directory
+        self.data = datagen.generate(size, seed=seed)
+        datagen.write_dataset(self.data, directory)
+
+    def rng(self):
+        return random.Random(self.seed)
+
+    def doctors(self, booked=True):
+        """
+        Build Doctor objects from the dataset.
+        :param booked: False to leave every hour unbooked.
+        :return: Dictionary of Doctors by DoctorID.
+        """
+        doctors = {}
+        for data in self.data["doctors"]:
+            days = {
+                day: [hours_working, hours_booked if booked else []]
+                for day, (hours_working, hours_booked) in data["daysWorking"].items()
+            }
+            doctors[data["DoctorID"]] = Doctor(DoctorID=data["DoctorID"], Name=data["Name"], daysWorking=days)
+        return doctors
+
+    def slots(self, count):
+        """
+        Pick random (doctor data, date, hour) triples among the working hours.
+        """
+        rng = self.rng()
+        doctors = self.data["doctors"]
+        picked = []
+        for _ in range(count):
+            doctor = rng.choice(doctors)
+            day, (hours_working, _) = rng.choice(list(doctor["daysWorking"].items()))
+            picked.append((doctor["DoctorID"], day, rng.choice(hours_working)))
+        return picked
+
+    def scheduler(self):
+        """
+        Build a scheduler holding every appointment of the dataset, booked through schedule().
+        :return: (scheduler, Doctors by DoctorID).
+        """
+        doctors = self.doctors(booked=False)
+        scheduler = appointmentScheduler()
+        for data in self.data["appointments"]:
+            scheduler.schedule(data["date"], data["time"], doctors[data["doctorID"]], data["patient"])
+        return scheduler, doctors
+
+
+# Each case takes a Fixture, does its (untimed) setup and returns (operation, number of operations)
+
+def case_book_hour(fixture):
+    doctors = fixture.doctors()
+    slots = [(doctors[doctor_id], day, hour) for doctor_id, day, hour in fixture.slots(fixture.size)]
+
+    def operation():
+        for doctor, day, hour in slots:
+            doctor.bookHour(day, hour)
+    return operation, len(slots)
+
+
+def case_check_availability(fixture):
+    doctors = fixture.doctors()
+    slots = [(doctors[doctor_id], day, hour) for doctor_id, day, hour in fixture.slots(fixture.size)]
+
+    def operation():
+        for doctor, day, hour in slots:
+            doctor.checkAvailability(day, hour)
+    return operation, len(slots)
+
+
+def case_schedule(fixture):
+    doctors = fixture.doctors(booked=False)
+    scheduler = appointmentScheduler()
+    bookings = [
+        (data["date"], data["time"], doctors[data["doctorID"]], data["patient"])
+        for data in fixture.data["appointments"]
+    ]
+
+    def operation():
+        for day, hour, doctor, patient in bookings:
+            scheduler.schedule(day, hour, doctor, patient)
+    return operation, len(bookings)
+
+
+def case_schedule_many(fixture):
+    # One batch for the whole dataset, persisted to an empty JSON repository
+    doctors = fixture.doctors(booked=False)
+    repository = JsonRepository(tempfile.mkdtemp(dir=fixture.directory), cache=DataCache())
+    scheduler = appointmentScheduler(repository=repository)
+    bookings = [
+        (data["date"], data["time"], doctors[data["doctorID"]], data["patient"])
+        for data in fixture.data["appointments"]
+    ]
+    return lambda: scheduler.schedule_many(bookings), len(bookings)
+
+
+def case_suggest_available_slots(fixture):
+    scheduler, doctors = fixture.scheduler()
+    queries = [(doctors[doctor_id], day) for doctor_id, day, _ in fixture.slots(fixture.size)]
+
+    def operation():
+        for doctor, day in queries:
+            scheduler.suggestAvailableSlots(doctor, day)
+    return operation, len(queries)
+
+
+def case_earliest_slots(fixture):
+    # First 10 free hours with any doctor in a 30-day window, queried once per 100 patients
+    doctors = list(fixture.doctors().values())
+    queries = max(1, fixture.size // 100)
+
+    def operation():
+        for _ in range(queries):
+            earliest_slots(doctors, 10, start_date=datagen.FIRST_DAY.isoformat(), days=30)
+    return operation, queries
+
+
+def case_cancel(fixture):
+    scheduler, _ = fixture.scheduler()
+    appointment_ids = [a.AppointmentID for a in scheduler.appointments]
+    fixture.rng().shuffle(appointment_ids)
+
+    def operation():
+        for appointment_id in appointment_ids:
+            scheduler.cancel(appointment_id)
+    return operation, len(appointment_ids)
+
+
+def case_reschedule(fixture):
+    scheduler, _ = fixture.scheduler()
+    # Move every appointment to the earliest hour that is free now and not already taken by another move
+    taken = set()
+    moves = []
+    for appointment in scheduler.appointments:
+        doctor = appointment.Doctor
+        for day in doctor.daySlots:
+            hour = next((h for h in doctor.freeSlots(day) if (doctor.DoctorID, day, h) not in taken), None)
+            if hour is not None:
+                taken.add((doctor.DoctorID, day, hour))
+                moves.append((appointment.AppointmentID, day, hour))
+                break
+
+    def operation():
+        for appointment_id, day, hour in moves:
+            scheduler.reschedule(appointment_id, day, hour)
+    return operation, len(moves)
+
+
+def case_sort_records(fixture):
+    manager = PatientRecordManager(repository=JsonRepository(fixture.directory, cache=DataCache()))
+    for doctor in fixture.doctors().values():
+        manager.add_doctor(doctor)
+    manager.load_records()
+    return manager.sort_records, len(manager.records)
+
+
+def case_heap_sort(fixture):
+    histories = list(fixture.data["histories"])
+    return lambda: heap_sort(histories), len(histories)
+
+
+def case_most_recent(fixture):
+    histories = fixture.data["histories"]
+    return lambda: most_recent(histories, 10), len(histories)
+
+
+def case_sorted_insert(fixture):
+    histories = fixture.data["histories"]
+    collection = SortedCollection(key=history_date_key)
+
+    def operation():
+        for entry in histories:
+            collection.add(entry)
+    return operation, len(histories)
+
+
+def case_merge_sort(fixture):
+    appointments = list(fixture.data["appointments"])
+    return lambda: merge_sort(appointments), len(appointments)
+
+
+def case_json_load(fixture):
+    repository = JsonRepository(fixture.directory, cache=DataCache())
+    data = fixture.data
+    count = len(data["doctors"]) + len(data["appointments"]) + len(data["histories"]) + len(data["records"])
+
+    def operation():
+        repository.list_doctors()
+        repository.list_appointments()
+        repository.list_histories()
+        repository.list_records()
+    return operation, count
+
+
+def case_json_save(fixture):
+    repository = JsonRepository(fixture.directory, cache=DataCache())
+    doctors = repository.list_doctors()
+    appointments = repository.list_appointments()
+    histories = repository.list_histories()
+    record = repository.list_records()[0]
+    count = len(doctors) + len(appointments) + len(histories) + len(repository.records)
+
+    def operation():
+        with repository.batch():
+            for doctor in doctors:
+                repository.save_doctor(doctor)
+            repository.appointments.replace_all(appointments)
+            repository.save_histories(histories)
+            repository.save_record(record)  # Rewrites the whole records file
+    return operation, count
+
+
+def case_registry_lookup(fixture):
+    # DoctorIDs of the records, in random order, resolved through a registry holding a quarter of
+    # the doctors: most lookups miss and load the doctor file again (the cost of eviction)
+    repository = JsonRepository(fixture.directory, cache=DataCache())
+    registry = EntityRegistry(repository, capacity=max(1, len(fixture.data["doctors"]) // 4))
+    doctor_ids = [record["Doctor"] for record in fixture.data["records"]]
+
+    def operation():
+        for doctor_id in doctor_ids:
+            registry.doctor(doctor_id)
+    return operation, len(doctor_ids)
+
+
+CASES = {
+    "bookHour": case_book_hour,
+    "checkAvailability": case_check_availability,
+    "schedule": case_schedule,
+    "schedule_many": case_schedule_many,
+    "suggestAvailableSlots": case_suggest_available_slots,
+    "earliest_slots": case_earliest_slots,
+    "cancel": case_cancel,
+    "reschedule": case_reschedule,
+    "sort_records": case_sort_records,
+    "heap_sort": case_heap_sort,
+    "most_recent": case_most_recent,
+    "sorted_insert": case_sorted_insert,
+    "merge_sort": case_merge_sort,
+    "json_load": case_json_load,
+    "json_save": case_json_save,
+    "registry_lookup": case_registry_lookup,
+}
+
+
+def time_case(case, fixture, repeat):
+    """
+    Time a case, running its setup before every repetition.
+    :return: Dictionary with the best time in seconds, the number of operations and the time per operation.
+    """
+    best = None
+    for _ in range(repeat):
+        operation, ops = case(fixture)
+        start = time.perf_counter()
+        operation()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "seconds": round(best, 6),
+        "ops": ops,
+        "us_per_op": round(best / ops * 1e6, 4) if ops else None,
+    }
+
+
+def run(sizes, cases, repeat=3, seed=0):
+    """
+    Run the cases for every size.
+    :param sizes: List of dataset sizes.
+    :param cases: List of case names (keys of CASES).
+    :param repeat: Repetitions per case; the fastest is kept.
+    :param seed: Random seed for the data and the operations.
+    :return: Dictionary of results per size and case.
+    """
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            fixture = Fixture(size, seed, directory)
+            results[str(size)] = {name: time_case(CASES[name], fixture, repeat) for name in cases}
+    return results
+
+
+def metadata(seed, repeat):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": seed,
+        "repeat": repeat,
+    }
+
+
+def compare(results, baseline, max_regression):
+    """
+    Compare per-operation times with a baseline run.
+    :return: List of (size, case, ratio) for the cases slower than max_regression.
+    """
+    regressions = []
+    for size, cases in results.items():
+        for name, result in cases.items():
+            previous = baseline.get(size, {}).get(name)
+            if not previous or not previous.get("us_per_op") or result["us_per_op"] is None:
+                continue
+            ratio = result["us_per_op"] / previous["us_per_op"]
+            print(f"n={size} {name}: {previous['us_per_op']} -> {result['us_per_op']} us/op ({ratio:.2f}x)")
+            if ratio > max_regression:
+                regressions.append((size, name, ratio))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the managers and the JSON storage.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per case; the fastest is kept.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare with.")
+    parser.add_argument("--max-regression", type=float, default=1.25,
+                        help="Slowdown ratio above which --compare fails.")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.cases, args.repeat, args.seed)
+    for size, cases in results.items():
+        for name, result in cases.items():
+            print(f"n={size} {name}: {result['seconds']} s for {result['ops']} ops ({result['us_per_op']} us/op)")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"meta": metadata(args.seed, args.repeat), "results": results}, file, indent=4)
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            regressions = compare(results, json.load(file)["results"], args.max_regression)
+        for size, name, ratio in regressions:
+            print(f"Regression: n={size} {name} is {ratio:.2f}x slower than the baseline")
+        if regressions:
+            sys.exit(1)
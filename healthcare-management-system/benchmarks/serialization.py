@@ -0,0 +1,105 @@
+"""
+Load and save throughput of the JSON backends and modes (see utils.serializer).
+
+Usage:
+    python benchmarks/serialization.py [--size 100000] [--repeat 3] [--output FILE]
+
+Each list file of a generated dataset (appointments, histories, records, patients) is saved and
+loaded with every available combination of backend (stdlib, orjson) and mode (compact, pretty).
+The sizes are the bytes written; the rates are rows per second summed over the files.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import datagen
+from utils.serializer import MODES, Serializer
+
+FILES = {"appointments": "appointments.json", "histories": "medical_histories.json",
+         "records": "patient_records.json", "patients": "patients.json"}
+
+
+def serializers():
+    # Every backend that is installed, in both modes
+    combinations = []
+    for backend in ("stdlib", "orjson"):
+        for mode in MODES:
+            try:
+                combinations.append(Serializer(backend, mode))
+            except ImportError:
+                break
+    return combinations
+
+
+def timed(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(size, repeat=3, seed=0):
+    """
+    Save and load the list files of a generated dataset with every serializer.
+    :param size: Dataset size (see datagen.default_counts).
+    :param repeat: Repetitions per measurement; the fastest is kept.
+    :param seed: Random seed.
+    :return: List of dictionaries per serializer with the bytes, seconds and rows per second.
+    """
+    data = datagen.generate(size, seed=seed)
+    rows = sum(len(data[key]) for key in FILES)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for serializer in serializers():
+            written = save = load = 0
+            for key, filename in FILES.items():
+                path = os.path.join(directory, filename)
+
+                def save_file():
+                    with open(path, "wb") as file:
+                        serializer.dump(data[key], file)
+
+                def load_file():
+                    with open(path, "rb") as file:
+                        serializer.load(file)
+                save += timed(save_file, repeat)
+                load += timed(load_file, repeat)
+                written += os.path.getsize(path)
+            results.append({
+                "backend": serializer.backend,
+                "mode": serializer.mode,
+                "rows": rows,
+                "bytes": written,
+                "save_seconds": round(save, 4),
+                "load_seconds": round(load, 4),
+                "save_rows_per_second": round(rows / save),
+                "load_rows_per_second": round(rows / load),
+            })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the JSON backends and modes.")
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = run(args.size, args.repeat, args.seed)
+    print(f"{'backend':<9}{'mode':<9}{'MB':>8}{'save s':>9}{'load s':>9}{'save rows/s':>13}{'load rows/s':>13}")
+    for result in results:
+        print(f"{result['backend']:<9}{result['mode']:<9}{result['bytes'] / 1e6:>8.1f}"
+              f"{result['save_seconds']:>9.3f}{result['load_seconds']:>9.3f}"
+              f"{result['save_rows_per_second']:>13}{result['load_rows_per_second']:>13}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
@@ -0,0 +1,126 @@
+"""
+Sorting benchmark: utils.sorting strategies against the recursive implementations they replaced.
+
+Usage:
+    python benchmarks/sorting.py [--sizes 100000 1000000] [--output FILE]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from utils.sorting import sort_items
+
+
+# Previous implementations, kept here as baselines
+def legacy_quick_sort(records, key):
+    if len(records) <= 1:
+        return records
+    pivot = records[len(records) // 2]
+    left = [x for x in records if key(x) < key(pivot)]
+    middle = [x for x in records if key(x) == key(pivot)]
+    right = [x for x in records if key(x) > key(pivot)]
+    return legacy_quick_sort(left, key) + middle + legacy_quick_sort(right, key)
+
+
+def legacy_heapify(array, n, i):
+    largest = i
+    left = 2 * i + 1
+    right = 2 * i + 2
+    if left < n and array[left]['date'] > array[largest]['date']:
+        largest = left
+    if right < n and array[right]['date'] > array[largest]['date']:
+        largest = right
+    if largest != i:
+        array[i], array[largest] = array[largest], array[i]
+        legacy_heapify(array, n, largest)
+
+
+def legacy_heap_sort(medical_history):
+    n = len(medical_history)
+    for i in range(n // 2 - 1, -1, -1):
+        legacy_heapify(medical_history, n, i)
+    for i in range(n - 1, 0, -1):
+        medical_history[i], medical_history[0] = medical_history[0], medical_history[i]
+        legacy_heapify(medical_history, i, 0)
+    return medical_history
+
+
+def legacy_merge_sort(appointments):
+    if len(appointments) > 1:
+        mid = len(appointments) // 2
+        left_half = appointments[:mid]
+        right_half = appointments[mid:]
+        legacy_merge_sort(left_half)
+        legacy_merge_sort(right_half)
+        i = j = k = 0
+        while i < len(left_half) and j < len(right_half):
+            if left_half[i]['time'] < right_half[j]['time']:
+                appointments[k] = left_half[i]
+                i += 1
+            else:
+                appointments[k] = right_half[j]
+                j += 1
+            k += 1
+        while i < len(left_half):
+            appointments[k] = left_half[i]
+            i += 1
+            k += 1
+        while j < len(right_half):
+            appointments[k] = right_half[j]
+            j += 1
+            k += 1
+    return appointments
+
+
+def random_date(rng):
+    return f"{rng.randint(2000, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return round(time.perf_counter() - start, 4)
+
+
+def run(sizes, seed=0):
+    """
+    Time each legacy sort and its replacement.
+    :param sizes: List of input sizes.
+    :param seed: Random seed for the generated data.
+    :return: Dictionary of timings in seconds, per size and case.
+    """
+    sys.setrecursionlimit(max(10000, sys.getrecursionlimit()))
+    rng = random.Random(seed)
+    results = {}
+    for size in sizes:
+        records = [{"Date": random_date(rng)} for _ in range(size)]
+        histories = [{"date": random_date(rng)} for _ in range(size)]
+        appointments = [{"time": rng.randint(8, 17)} for _ in range(size)]
+        results[size] = {
+            "quick_legacy": timed(lambda: legacy_quick_sort(records, lambda x: x['Date'])),
+            "quick": timed(lambda: sort_items(records, key=lambda x: x['Date'], strategy="quick")),
+            "heap_legacy": timed(lambda: legacy_heap_sort(list(histories))),
+            "heap": timed(lambda: sort_items(histories, key='date', strategy="heap")),
+            "merge_legacy": timed(lambda: legacy_merge_sort(list(appointments))),
+            "merge": timed(lambda: sort_items(appointments, key='time', strategy="merge")),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare sorting strategies with the previous implementations.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = run(args.sizes)
+    for size, timings in results.items():
+        print(f"n={size}: " + ", ".join(f"{case} {seconds}s" for case, seconds in timings.items()))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
@@ -0,0 +1,106 @@
+"""
+Cold-start benchmark for the CLI.
+
+Runs `python -X importtime` in fresh interpreters and reports how long it takes to import
+main.py (what the CLI pays before the welcome banner) and every subsystem module. Importing
+must not touch the disk, so the budget only has to cover Python imports.
+
+Usage:
+    python benchmarks/startup.py [--runs N] [--budget-ms MS] [--output FILE]
+
+Exits with status 1 when the median startup time of main.py exceeds the budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Modules imported by the CLI at startup, and every subsystem loaded later on demand
+TARGETS = {
+    "main": ["main"],
+    "subsystems": [
+        "main",
+        "Users.Admin",
+        "appointmentSchedule.appointment",
+        "medicalHistory.history",
+        "patientRecords.record",
+        "storage",
+        "storage.sqlite_repository",
+        "storage.importer",
+    ],
+}
+
+
+def import_once(modules):
+    """
+    Import modules in a fresh interpreter.
+    :param modules: List of module names.
+    :return: (wall time in ms, {module: cumulative import time in ms}).
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    env = dict(os.environ, PYTHONPATH=SRC)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SRC, env=env, capture_output=True, text=True, check=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        cumulative[name] = int(cumulative_us) / 1000
+    return wall_ms, cumulative
+
+
+def run(runs):
+    """
+    Benchmark every target.
+    :param runs: Number of fresh interpreters per target.
+    :return: Dictionary of results per target.
+    """
+    results = {}
+    for target, modules in TARGETS.items():
+        walls = []
+        last = {}
+        for _ in range(runs):
+            wall_ms, last = import_once(modules)
+            walls.append(wall_ms)
+        slowest = sorted(last.items(), key=lambda item: item[1], reverse=True)[:10]
+        results[target] = {
+            "median_ms": round(statistics.median(walls), 2),
+            "min_ms": round(min(walls), 2),
+            "max_ms": round(max(walls), 2),
+            "slowest_imports_ms": {name: round(ms, 2) for name, ms in slowest},
+        }
+    # Baseline: an interpreter that imports nothing from the project
+    walls = [import_once([])[0] for _ in range(runs)]
+    results["interpreter"] = {"median_ms": round(statistics.median(walls), 2)}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure CLI cold-start time.")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters per target.")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="Maximum median startup time of main.py.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    for target, result in results.items():
+        print(f"{target}: median {result['median_ms']} ms")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+
+    if results["main"]["median_ms"] > args.budget_ms:
+        print(f"Startup budget exceeded: {results['main']['median_ms']} ms > {args.budget_ms} ms")
+        sys.exit(1)
@@ -21,7 +21,8 @@ class Admin:
             new_user = Doctor(
                 DoctorID=details["DoctorID"],
                 Name=details["Name"],
-                daysWorking=details["daysWorking"]
+                daysWorking=details["daysWorking"],
+                weeklyHours=details.get("weeklyHours")
             )
         elif user_type == "Patient":
             new_user = patient(
@@ -1,25 +1,167 @@
-import json
+from bisect import bisect_left
+from collections.abc import Mapping
 from datetime import date, timedelta, datetime
 
+from utils.atomic import atomic_write
+from utils.serializer import get_serializer
+
+
+def hours_to_mask(hours):
+    """
+    Convert a list of hours to a bitmask (bit n set means hour n is in the list).
+    """
+    mask = 0
+    for hour in hours:
+        mask |= 1 << hour
+    return mask
+
+
+def mask_to_hours(mask):
+    """
+    Convert a bitmask back to an ascending list of hours.
+    """
+    hours = []
+    while mask:
+        lowest = mask & -mask
+        hours.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return hours
+
+
+# Hours of the day a schedule can hold
+HOURS_PER_DAY = 24
+
+
+def _isHour(hour):
+    # An int hour of the day; a mask has no bit for anything else
+    return isinstance(hour, int) and 0 <= hour < HOURS_PER_DAY
+
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# Dates whose free hours a Doctor keeps cached; the cache starts over when it is full
+FREE_SLOTS_CACHE_SIZE = 4096
+
+# Monday to Friday, with a lunch break at 12; weekends off
+DEFAULT_WEEKLY_HOURS = {weekday: [9, 10, 11, 13, 14, 15, 16] for weekday in WEEKDAYS[:5]}
+
+
+def weekday_of(date_key):
+    """
+    Get the weekday index (Monday=0 .. Sunday=6) of a YYYY-MM-DD date, or None if it is not a valid date.
+    """
+    try:
+        return date.fromisoformat(date_key).weekday()
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_dates(start_date):
+    """
+    Iterate over the calendar days from a YYYY-MM-DD date on, as YYYY-MM-DD strings.
+    """
+    day = date.fromisoformat(start_date)
+    while True:
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+
+class DaysWorkingView(Mapping):
+    def __init__(self, doctor):
+        """
+        Read-only view of a doctor's schedule as dates to ((hours_working), (hours_booked)).
+        It follows the doctor's changes; changing it raises TypeError instead of changing a copy.
+        :param doctor: The Doctor object.
+        """
+        self._doctor = doctor
+
+    def __getitem__(self, date_key):
+        working, booked = self._doctor.daySlots[date_key]
+        return tuple(mask_to_hours(working)), tuple(mask_to_hours(booked))
+
+    def __iter__(self):
+        return iter(self._doctor.daySlots)
+
+    def __len__(self):
+        return len(self._doctor.daySlots)
+
+    def __repr__(self):
+        return f"DaysWorkingView({dict(self)!r})"
+
+
 class Doctor:
-    def __init__(self, DoctorID, Name, daysWorking):
+    # Fixed attributes instead of a per-instance __dict__ (see benchmarks/memory.py)
+    __slots__ = ("DoctorID", "Name", "Specialization", "daySlots", "weekSlots", "archivedBefore",
+                 "_sortedDates", "_freeSlots", "__weakref__")
+
+    def __init__(self, DoctorID, Name, daysWorking, weeklyHours=None, archivedBefore=None):
         """
         Initialize a Doctor object.
         :param DoctorID: Unique identifier for the doctor.
         :param Name: Name of the doctor.
         :param daysWorking: Dictionary with keys as dates (YYYY-MM-DD) and values as 2D arrays 
                             [[hours_working], [hours_booked]].
+        :param weeklyHours: Optional dictionary of weekday names (e.g., 'Monday') to working hours, used
+                            for every date that is not in daysWorking.
+        :param archivedBefore: Optional date (YYYY-MM-DD); the dates before it were moved to the
+                               archive (see storage.archive) and have no hours here.
         """
         self.DoctorID = DoctorID
         self.Name = Name
-        self.daysWorking = daysWorking 
+        self.Specialization = None
+        self.daysWorking = daysWorking
+        self.weeklyHours = weeklyHours
+        self.archivedBefore = archivedBefore
+
+    @property
+    def daysWorking(self):
+        """
+        The schedule as a read-only mapping of dates to ((hours_working), (hours_booked)).
+        Internally each date is stored as a [working_mask, booked_mask] pair of bitmasks; change the
+        schedule with the Doctor methods (setWorkingHours, bookHour, ...) or by assigning a whole
+        new dictionary.
+        """
+        return DaysWorkingView(self)
+
+    @daysWorking.setter
+    def daysWorking(self, daysWorking):
+        self.daySlots = {
+            date_key: [hours_to_mask(hours_working), hours_to_mask(hours_booked)]
+            for date_key, (hours_working, hours_booked) in (daysWorking or {}).items()
+        }
+        self._sortedDates = None  # Built on demand by sortedDates()
+        self._freeSlots = {}  # Date -> tuple of free hours, filled by freeSlots()
+
+    @property
+    def weeklyHours(self):
+        """
+        The weekly template as a dictionary of weekday names to working hours (days off are left out).
+        Dates without an entry in daysWorking take their working hours from it and are not stored
+        until something is booked on them.
+        """
+        return {
+            WEEKDAYS[weekday]: mask_to_hours(mask)
+            for weekday, mask in enumerate(self.weekSlots) if mask
+        }
+
+    @weeklyHours.setter
+    def weeklyHours(self, weeklyHours):
+        self.weekSlots = [0] * 7
+        self._freeSlots = {}
+        for weekday, hours in (weeklyHours or {}).items():
+            index = weekday if isinstance(weekday, int) else WEEKDAYS.index(str(weekday).strip().capitalize())
+            self.weekSlots[index] = hours_to_mask(hours)
 
     def getDaysWorking(self):
         """
         Get the dates the doctor is working along with their hours.
-        :return: Dictionary of dates and their corresponding hours.
+        :return: New dictionary of dates to [[hours_working], [hours_booked]]; changing it does not
+                 change the doctor.
         """
-        return self.daysWorking
+        return {
+            date_key: [mask_to_hours(working), mask_to_hours(booked)]
+            for date_key, (working, booked) in self.daySlots.items()
+        }
 
     def setDaysWorking(self, daysWorking):
         """
@@ -28,6 +170,52 @@ class Doctor:
         """
         self.daysWorking = daysWorking
 
+    def setWeeklyHours(self, weeklyHours):
+        """
+        Set the working hours of a regular week.
+        :param weeklyHours: Dictionary of weekday names (e.g., 'Monday') or indices (Monday=0) to working hours.
+        """
+        self.weeklyHours = weeklyHours
+
+    def hasDate(self, date):
+        """
+        Check if the schedule has an entry for a date (an exception to the weekly hours, or bookings).
+        :param date: The date to check (YYYY-MM-DD).
+        :return: True if the date is in the schedule, False otherwise.
+        """
+        return date in self.daySlots
+
+    def _day(self, date):
+        # [working, booked] of a date: the stored entry, or the weekly hours with nothing booked
+        day = self.daySlots.get(date)
+        if day is not None:
+            return day
+        if self.archivedBefore is not None and date < self.archivedBefore:
+            return [0, 0]  # Archived: neither worked nor bookable here
+        weekday = weekday_of(date)
+        return [0 if weekday is None else self.weekSlots[weekday], 0]
+
+    def _isDefault(self, date, day):
+        # True if a stored day adds nothing to the weekly hours (archived dates have none to fall back on)
+        weekday = weekday_of(date)
+        if weekday is None or (self.archivedBefore is not None and date < self.archivedBefore):
+            return False
+        return not day[1] and day[0] == self.weekSlots[weekday]
+
+    def setWorkingHours(self, date, hours):
+        """
+        Set the working hours for a date. Booked hours on that date are kept.
+        :param date: The date (YYYY-MM-DD).
+        :param hours: List of working hours.
+        """
+        if date in self.daySlots:
+            booked = self.daySlots[date][1]
+        else:
+            booked = 0
+            self._sortedDates = None
+        self.daySlots[date] = [hours_to_mask(hours), booked]
+        self._freeSlots.pop(date, None)
+
     def checkAvailability(self, date, hour):
         """
         Check if the doctor is available at a specific date and hour.
@@ -35,11 +223,10 @@ class Doctor:
         :param hour: The hour to check (e.g., 10).
         :return: True if available, False otherwise.
         """
-        if date in self.daysWorking:
-            hours_working, hours_booked = self.daysWorking[date]
-            if hour in hours_working and hour not in hours_booked:
-                return True
-        return False
+        if not _isHour(hour):
+            return False  # E.g., a string read from input(), which no schedule holds
+        working, booked = self._day(date)
+        return bool((working & ~booked) >> hour & 1)
 
     def bookHour(self, date, hour):
         """
@@ -49,19 +236,147 @@ class Doctor:
         :return: True if booking was successful, False otherwise.
         """
         if self.checkAvailability(date, hour):
-            self.daysWorking[date][1].append(hour)  # Add hour to hours_booked
+            if date not in self.daySlots:
+                # First booking on a date of the weekly hours: store it from now on
+                self.daySlots[date] = self._day(date)
+                self._sortedDates = None
+            self.daySlots[date][1] |= 1 << hour  # Add hour to hours_booked
+            self._freeSlots.pop(date, None)
             return True
         return False
 
+    def releaseHour(self, date, hour):
+        """
+        Release a booked hour, e.g., when an appointment is canceled or moved.
+        :param date: The date (YYYY-MM-DD).
+        :param hour: The booked hour.
+        :return: True if the hour was booked and is now free, False otherwise.
+        """
+        day = self.daySlots.get(date)
+        if day is None or not _isHour(hour) or not day[1] >> hour & 1:
+            return False
+        day[1] &= ~(1 << hour)
+        self._freeSlots.pop(date, None)
+        if self._isDefault(date, day):
+            # Back to the weekly hours; computed again instead of stored
+            del self.daySlots[date]
+            self._sortedDates = None
+        return True
+
+    def freeSlots(self, date):
+        """
+        Get the free hours on a date.
+        The result is cached per date until an hour on that date is booked or released, or the
+        working hours change, so repeated queries (e.g., showing the hours, then checking the
+        choice) cost one dictionary lookup.
+        :param date: The date (YYYY-MM-DD).
+        :return: Ascending tuple of hours that are worked and not booked (shared between calls).
+        """
+        free = self._freeSlots.get(date)
+        if free is None:
+            working, booked = self._day(date)
+            free = tuple(mask_to_hours(working & ~booked))
+            if len(self._freeSlots) >= FREE_SLOTS_CACHE_SIZE:
+                self._freeSlots.clear()
+            self._freeSlots[date] = free
+        return free
+
+    def pruneDates(self):
+        """
+        Drop the stored dates that match the weekly hours and have nothing booked, e.g., dates
+        written by older versions just because they were viewed. The repositories call it on every
+        save, so those dates are never written.
+        :return: Number of dates dropped.
+        """
+        redundant = [date_key for date_key, day in self.daySlots.items() if self._isDefault(date_key, day)]
+        for date_key in redundant:
+            del self.daySlots[date_key]
+        if redundant:
+            self._sortedDates = None
+        return len(redundant)
+
+    def refreshFrom(self, stored):
+        """
+        Take over the schedule of another copy of this doctor, e.g., as last saved by another process.
+        Weekly hours are only taken over if the copy has some, and the later archive cutoff is kept.
+        :param stored: A Doctor object with the same DoctorID.
+        """
+        self.daySlots = {date_key: list(day) for date_key, day in stored.daySlots.items()}
+        self._sortedDates = None
+        self._freeSlots = {}
+        if any(stored.weekSlots):
+            self.weekSlots = list(stored.weekSlots)
+        if stored.archivedBefore is not None and (self.archivedBefore is None or stored.archivedBefore > self.archivedBefore):
+            self.archivedBefore = stored.archivedBefore
+
+    def archiveBefore(self, date):
+        """
+        Remove the stored dates before a date, to be kept in the archive instead.
+        From then on those dates have no working hours here, whatever the weekly hours say.
+        :param date: First date to keep (YYYY-MM-DD).
+        :return: Dictionary of the removed dates to [[hours_working], [hours_booked]].
+        """
+        removed = {}
+        dates = self.sortedDates()
+        for date_key in dates[:bisect_left(dates, date)]:
+            if weekday_of(date_key) is None:
+                continue  # Not a date; left for migrate_legacy_day_keys
+            working, booked = self.daySlots.pop(date_key)
+            removed[date_key] = [mask_to_hours(working), mask_to_hours(booked)]
+        self._sortedDates = None
+        self._freeSlots = {}
+        if self.archivedBefore is None or date > self.archivedBefore:
+            self.archivedBefore = date
+        return removed
+
+    def sortedDates(self):
+        """
+        Get the dates in the schedule in ascending order (cached until a date is added or removed).
+        :return: List of dates (YYYY-MM-DD).
+        """
+        if self._sortedDates is None:
+            self._sortedDates = sorted(self.daySlots)
+        return self._sortedDates
+
+    def iterFreeSlots(self, start_date, start_hour=0, end_date=None):
+        """
+        Iterate over the free hours in chronological order, starting at a date and hour.
+        Without weekly hours only the stored dates from start_date on are visited, found by binary
+        search; with weekly hours every calendar day is visited, and without end_date the iterator
+        does not end.
+        :param start_date: First date (YYYY-MM-DD).
+        :param start_hour: First hour on start_date.
+        :param end_date: Optional last date (YYYY-MM-DD), inclusive.
+        :return: Iterator of (date, hour).
+        """
+        if any(self.weekSlots):
+            dates = iter_dates(start_date)
+        else:
+            stored = self.sortedDates()
+            dates = (stored[position] for position in range(bisect_left(stored, start_date), len(stored)))
+        for date_key in dates:
+            if end_date is not None and date_key > end_date:
+                return
+            working, booked = self._day(date_key)
+            free = working & ~booked
+            if date_key == start_date:
+                free &= ~((1 << max(start_hour, 0)) - 1)
+            for hour in mask_to_hours(free):
+                yield date_key, hour
+
     def viewSchedule(self):
         """
         View the doctor's schedule.
         :return: A formatted string showing the schedule.
         """
-        schedule = []
-        for date_key, hours in self.daysWorking.items():
-            hours_working, hours_booked = hours
-            schedule.append(f"{date_key}: Working Hours: {hours_working}, Booked Hours: {hours_booked}")
+        schedule = [
+            f"Every {WEEKDAYS[weekday]}: Working Hours: {mask_to_hours(mask)}"
+            for weekday, mask in enumerate(self.weekSlots) if mask
+        ]
+        for date_key, (working, booked) in self.daySlots.items():
+            schedule.append(
+                f"{date_key}: Working Hours: {mask_to_hours(working)}, Booked Hours: {mask_to_hours(booked)}"
+            )
         return "\n".join(schedule)
 
     def updateProfile(self, Name, Specialization):
@@ -73,34 +388,61 @@ class Doctor:
         self.Name = Name
         self.Specialization = Specialization
 
-    def save_to_json(self, filename):
+    def to_dict(self):
         """
-        Save the doctor's data to a JSON file.
-        :param filename: The name of the JSON file.
+        Get the doctor in the doctor_<id>.json format.
+        :return: Dictionary with DoctorID, Name and daysWorking, plus weeklyHours and archivedBefore when set.
         """
         data = {
             "DoctorID": self.DoctorID,
             "Name": self.Name,
-            "daysWorking": self.daysWorking
+            "daysWorking": self.getDaysWorking()
         }
-        with open(filename, "w") as file:
-            json.dump(data, file, indent=4)
+        if any(self.weekSlots):
+            data["weeklyHours"] = self.weeklyHours
+        if self.archivedBefore is not None:
+            data["archivedBefore"] = self.archivedBefore
+        return data
 
     @classmethod
-    def load_from_json(cls, filename):
+    def from_dict(cls, data):
+        """
+        Build a doctor from a dictionary in the doctor_<id>.json format.
+        :param data: The doctor dictionary.
+        :return: A Doctor object.
+        """
+        return cls(
+            DoctorID=data["DoctorID"],
+            Name=data["Name"],
+            daysWorking=data.get("daysWorking", {}),
+            weeklyHours=data.get("weeklyHours"),
+            archivedBefore=data.get("archivedBefore")
+        )
+
+    def save_to_json(self, filename, serializer=None):
+        """
+        Save the doctor's data to a JSON file.
+        :param filename: The name of the JSON file.
+        :param serializer: Serializer to write with (default: utils.serializer.get_serializer()).
+        """
+        serializer = get_serializer() if serializer is None else serializer
+        # Replaced in one step, so other processes never read a half-written file
+        with atomic_write(filename) as file:
+            serializer.dump(self.to_dict(), file)
+
+    @classmethod
+    def load_from_json(cls, filename, serializer=None):
         """
         Load the doctor's data from a JSON file.
         :param filename: The name of the JSON file.
+        :param serializer: Serializer to read with (default: utils.serializer.get_serializer()).
         :return: A Doctor object.
         """
+        serializer = get_serializer() if serializer is None else serializer
         try:
-            with open(filename, "r") as file:
-                data = json.load(file)
-            return cls(
-                DoctorID=data["DoctorID"],
-                Name=data["Name"],
-                daysWorking=data.get("daysWorking", {})
-            )
+            with open(filename, "rb") as file:
+                data = serializer.load(file)
+            return cls.from_dict(data)
         except FileNotFoundError:
             print(f"File {filename} not found.")
             return None
@@ -111,9 +453,10 @@ class Doctor:
         If reference_day is not provided, today is used to compute the next occurrence of that weekday.
         When merging into an existing date key, working/booked hours are deduplicated and booked hours are
         kept only if also present in working hours.
+        :return: True if any legacy key was converted or dropped, False otherwise.
         """
-        if not self.daysWorking:
-            return
+        if not self.daySlots:
+            return False
 
         ref = reference_day or date.today()
         # Map weekday names to Python weekday indices (Mon=0..Sun=6)
@@ -134,24 +477,28 @@ class Doctor:
             except Exception:
                 return False
 
-        legacy_keys = [k for k in list(self.daysWorking.keys()) if not is_iso_date(k)]
+        legacy_keys = [k for k in list(self.daySlots.keys()) if not is_iso_date(k)]
         for key in legacy_keys:
             idx = weekday_map.get(str(key).strip().lower())
             if idx is None:
                 # Unknown legacy key; drop it safely
-                self.daysWorking.pop(key, None)
+                self.daySlots.pop(key, None)
                 continue
             days_ahead = (idx - ref.weekday()) % 7
             target = ref + timedelta(days=days_ahead)
             date_key = target.strftime("%Y-%m-%d")
 
-            src_work, src_booked = self.daysWorking.get(key, [[], []])
-            dst_work, dst_booked = self.daysWorking.get(date_key, [[], []])
+            src_work, src_booked = self.daySlots.get(key, [0, 0])
+            dst_work, dst_booked = self.daySlots.get(date_key, [0, 0])
 
-            # Merge and dedupe
-            merged_work = sorted(set(dst_work) | set(src_work))
-            merged_booked = sorted((set(dst_booked) | set(src_booked)) & set(merged_work))
+            # Merge; bitmasks dedupe by construction
+            merged_work = dst_work | src_work
+            merged_booked = (dst_booked | src_booked) & merged_work
 
-            self.daysWorking[date_key] = [merged_work, merged_booked]
+            self.daySlots[date_key] = [merged_work, merged_booked]
             # Remove legacy key
-            self.daysWorking.pop(key, None)
\ No newline at end of file
+            self.daySlots.pop(key, None)
+        if legacy_keys:
+            self._sortedDates = None
+            self._freeSlots = {}
+        return bool(legacy_keys)
\ No newline at end of file
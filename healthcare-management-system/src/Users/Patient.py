@@ -1,9 +1,50 @@
 class patient:
-    def __init__(self, Name, lastName, DOB ,PatientID, Email, PhoneNumber, Address,):
+    # Fixed attributes instead of a per-instance __dict__ (see benchmarks/memory.py)
+    __slots__ = ("Name", "lastName", "DOB", "PatientID", "Email", "PhoneNumber", "Address")
+
+    def __init__(self, Name: str, lastName: str, DOB: str, PatientID, Email: str, PhoneNumber: str, Address: str):
+        """
+        Initialize a patient object.
+        :param Name: First name of the patient.
+        :param lastName: Last name of the patient.
+        :param DOB: Date of birth (YYYY-MM-DD).
+        :param PatientID: Unique identifier for the patient.
+        :param Email: Email address.
+        :param PhoneNumber: Phone number.
+        :param Address: Postal address.
+        """
         self.Name = Name
         self.lastName = lastName
         self.DOB = DOB
         self.PatientID = PatientID
         self.Email = Email
         self.PhoneNumber = PhoneNumber
-        self.Address = Address
\ No newline at end of file
+        self.Address = Address
+
+    def getPatientID(self):
+        """
+        Get the patient's ID.
+        """
+        return self.PatientID
+
+    def getName(self):
+        """
+        Get the patient's name.
+        """
+        return self.Name
+
+    def to_dict(self) -> dict:
+        """
+        Get the patient as a dictionary with one key per attribute.
+        :return: Dictionary with Name, lastName, DOB, PatientID, Email, PhoneNumber and Address.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        Build a patient from a dictionary returned by to_dict.
+        :param data: The patient dictionary; keys that are not attributes are ignored.
+        :return: A patient object.
+        """
+        return cls(**{name: data.get(name) for name in cls.__slots__})
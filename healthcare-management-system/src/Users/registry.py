@@ -0,0 +1,143 @@
+"""
+One canonical Doctor and patient object per ID, shared by every manager of a session.
+
+Without it each manager loaded its own copy of a doctor, and bookings made through one copy were
+not seen by the others. The registry loads an entity from the repository the first time its ID is
+asked for and hands out that same object afterwards. Doctors carry their whole schedule, so only
+the DOCTOR_CAPACITY most recently used ones are kept; idle ones are evicted (and the repository is
+told to drop its cached copy). A doctor still referenced elsewhere, e.g., by a loaded record, stays
+canonical after eviction: asking for its ID again returns the same object, not a second copy.
+"""
+import weakref
+from collections import OrderedDict
+
+# Doctors kept loaded by a registry; the least recently used one beyond this is evicted
+DOCTOR_CAPACITY = 1024
+
+
+class EntityRegistry:
+    def __init__(self, repository=None, capacity=DOCTOR_CAPACITY):
+        """
+        Registry of the doctors and patients of a session.
+        :param repository: Storage Repository entities are loaded from (None: only added entities).
+        :param capacity: Number of doctors kept loaded.
+        """
+        self.repository = repository
+        self.capacity = capacity
+        self._doctors = OrderedDict()  # DoctorID -> Doctor, least recently used first
+        self._evicted = weakref.WeakValueDictionary()  # DoctorID -> evicted Doctor still in use elsewhere
+        self._patients = {}  # PatientID -> patient
+        self.loads = 0
+        self.evictions = 0
+
+    def doctor(self, doctor_id):
+        """
+        Get the doctor with an ID, loading them on first use.
+        :param doctor_id: The DoctorID.
+        :return: The canonical Doctor object, or None if there is no such doctor.
+        """
+        doctor = self._doctors.get(doctor_id)
+        if doctor is not None:
+            self._doctors.move_to_end(doctor_id)
+            return doctor
+        doctor = self._evicted.pop(doctor_id, None)
+        if doctor is None and self.repository is not None:
+            doctor = self.repository.get_doctor(doctor_id)
+            self.loads += doctor is not None
+        if doctor is not None:
+            self._keep(doctor)
+        return doctor
+
+    def peek_doctor(self, doctor_id):
+        """
+        Get a doctor only if the registry holds them, without loading them or marking them used.
+        :param doctor_id: The DoctorID.
+        :return: The canonical Doctor object, or None if it is not registered.
+        """
+        doctor = self._doctors.get(doctor_id)
+        return self._evicted.get(doctor_id) if doctor is None else doctor
+
+    def add_doctor(self, doctor):
+        """
+        Register a doctor object, e.g., one created in memory.
+        :param doctor: A Doctor object.
+        :return: The canonical Doctor with that ID: the registered one if there already is one.
+        """
+        existing = self._doctors.get(doctor.DoctorID) or self._evicted.get(doctor.DoctorID)
+        if existing is not None:
+            return self.doctor(doctor.DoctorID)
+        self._keep(doctor)
+        return doctor
+
+    def list_doctors(self):
+        """
+        Get every stored doctor, plus the registered ones that are not stored.
+        Doctors already registered are returned as registered; the others are registered now.
+        :return: List of canonical Doctor objects ordered by DoctorID.
+        """
+        doctors = {}
+        stored = self.repository.list_doctors() if self.repository is not None else []
+        for doctor in stored:
+            known = self._doctors.get(doctor.DoctorID) or self._evicted.get(doctor.DoctorID)
+            doctors[doctor.DoctorID] = known or doctor
+        for doctor_id, doctor in self._doctors.items():
+            doctors.setdefault(doctor_id, doctor)
+        result = [doctors[doctor_id] for doctor_id in sorted(doctors)]
+        for doctor in result:
+            self.add_doctor(doctor)
+        return result
+
+    def doctor_names(self):
+        """
+        Get the ID and name of every stored doctor, plus the registered ones that are not stored.
+        Nothing is loaded or registered, so it is cheap enough for listing doctors in a menu;
+        resolve the chosen one with doctor().
+        :return: Dictionary of DoctorID to name, ordered by DoctorID.
+        """
+        names = dict(self.repository.doctor_names()) if self.repository is not None else {}
+        for doctor_id, doctor in list(self._doctors.items()) + list(self._evicted.items()):
+            names[doctor_id] = doctor.Name  # Registered objects may have been renamed since saved
+        return dict(sorted(names.items()))
+
+    def patient(self, patient_id):
+        """
+        Get the patient with an ID, loading them on first use.
+        :param patient_id: The PatientID.
+        :return: The canonical patient object, or None if there is no such patient.
+        """
+        found = self._patients.get(patient_id)
+        if found is None and self.repository is not None:
+            found = self.repository.get_patient(patient_id)
+            if found is not None:
+                self.loads += 1
+                self._patients[patient_id] = found
+        return found
+
+    def add_patient(self, patient):
+        """
+        Register a patient object.
+        :param patient: A patient object.
+        :return: The canonical patient with that ID: the registered one if there already is one.
+        """
+        return self._patients.setdefault(patient.PatientID, patient)
+
+    def stats(self):
+        """
+        Get the registry counters.
+        :return: Dictionary with the loaded doctors and patients, the loads from the repository and the evictions.
+        """
+        return {
+            "doctors": len(self._doctors),
+            "patients": len(self._patients),
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+    def _keep(self, doctor):
+        self._doctors[doctor.DoctorID] = doctor
+        while len(self._doctors) > self.capacity:
+            doctor_id, evicted = self._doctors.popitem(last=False)
+            self._evicted[doctor_id] = evicted
+            self.evictions += 1
+            if self.repository is not None:
+                self.repository.release_doctor(doctor_id)
@@ -1,13 +1,24 @@
-# Add the parent directory to the system path to allow importing modules from it
-import sys
-import os
-import json  # Import JSON module for data storage
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from merge_sort import merge_sort
 from Users.Doctors import Doctor  # Import the Doctor class
+from appointmentSchedule.availability import earliest_slots
+from utils.journal import JournalStore
+from utils.sorted_collection import SortedCollection
+
+
+def _name_of(entity):
+    """
+    Get a display name for a Patient or Doctor reference.
+    Appointments loaded from JSON carry plain names instead of objects.
+    """
+    if isinstance(entity, str):
+        return entity
+    if hasattr(entity, "getName"):
+        return entity.getName()
+    return getattr(entity, "Name", entity)
 
 class appointment:
+    # Fixed attributes instead of a per-instance __dict__ (see benchmarks/memory.py)
+    __slots__ = ("AppointmentID", "Patient", "Doctor", "DateTime")
+
     def __init__(self, AppointmentID, Patient, Doctor, DateTime):
         """
         Initialize an appointment object.
@@ -28,19 +39,160 @@ class appointment:
         """
         return {
             "AppointmentID": self.AppointmentID,
-            "Patient": self.Patient.getName(),
-            "Doctor": self.Doctor.Name,
+            "Patient": _name_of(self.Patient),
+            "Doctor": _name_of(self.Doctor),
             "DateTime": self.DateTime
         }
 
+    def to_dict(self):
+        """
+        Get the appointment in the format of the scheduler's JSON file (see save_to_json).
+        :return: Dictionary with AppointmentID, Patient, Doctor (by name) and DateTime.
+        """
+        return self.get_appointment_details()
+
+    @classmethod
+    def from_dict(cls, data, Patient=None, Doctor=None):
+        """
+        Build an appointment from a dictionary returned by to_dict.
+        :param data: The appointment dictionary.
+        :param Patient: Optional Patient object to use instead of the stored name.
+        :param Doctor: Optional Doctor object to use instead of the stored name.
+        :return: An appointment object.
+        """
+        return cls(
+            AppointmentID=data["AppointmentID"],
+            Patient=Patient if Patient is not None else data["Patient"],
+            Doctor=Doctor if Doctor is not None else data["Doctor"],
+            DateTime=data["DateTime"]
+        )
+
+    def get_date_hour(self):
+        """
+        Split DateTime into its date and hour.
+        :return: Tuple (date as YYYY-MM-DD, hour as int).
+        """
+        date, time = self.DateTime.split(" ")
+        return date, int(time.split(":")[0])
+
+    def to_record(self):
+        """
+        Get the appointment in the format used by appointments.json and the storage repositories.
+        :return: Dictionary with appointmentID, patient, doctorID, doctorName, date and time.
+        """
+        date, hour = self.get_date_hour()
+        return {
+            "appointmentID": self.AppointmentID,
+            "patient": _name_of(self.Patient),
+            "doctorID": getattr(self.Doctor, "DoctorID", None),
+            "doctorName": _name_of(self.Doctor),
+            "date": date,
+            "time": hour
+        }
+
+
+# Fields of the scheduler's JSON file whose values repeat across appointments (see utils.vocabulary)
+APPOINTMENT_TERMS = ("Patient", "Doctor")
+
+
+def _result(AppointmentID=None, error=None):
+    # Per-item result of the batch operations
+    return {"ok": error is None, "AppointmentID": AppointmentID, "error": error}
+
+
+def _doctor_key(doctor):
+    # Doctors are indexed by ID; appointments loaded from JSON only carry the doctor's name
+    return getattr(doctor, "DoctorID", doctor)
+
 
 class appointmentScheduler:
-    def __init__(self):
+    def __init__(self, repository=None):
         """
         Initialize the appointment scheduler.
+        Appointments are indexed by ID, date, doctor and patient, so lookups, cancellations and
+        reschedules do not scan the whole schedule.
+        :param repository: Optional storage Repository that bookings are written through to.
         """
-        self.appointments = []  # List to store all scheduled appointments
-        self.nextAppointmentID = 1  # Counter to generate unique appointment IDs
+        self._by_id = {}  # AppointmentID -> appointment, in booking order
+        self._by_date = {}  # Date -> {AppointmentID: appointment}
+        self._by_doctor = {}  # DoctorID (or name) -> {AppointmentID: appointment}
+        self._by_patient = {}  # Patient name -> {AppointmentID: appointment}
+        self._ordered = SortedCollection(key=lambda a: a.get_date_hour())  # All appointments by date and hour
+        self.nextAppointmentID = 1  # Monotonic counter to generate unique appointment IDs
+        self.repository = repository  # With a repository, IDs are reserved through it instead
+        self.journal = None  # JournalStore backing the last loaded/saved file
+        self.pending = []  # Journal entries not yet written by save_to_json
+
+    @property
+    def appointments(self):
+        """
+        All scheduled appointments, in booking order, as a read-only view that follows the changes.
+        It has no append or remove: add and drop appointments with the scheduler's methods
+        (schedule, cancel, ...), and take a list() of it to iterate while changing them.
+        """
+        return self._by_id.values()
+
+    def in_order(self):
+        """
+        All scheduled appointments ordered by date, then hour.
+        :return: List of appointments.
+        """
+        return list(self._ordered)
+
+    def get(self, AppointmentID):
+        """
+        Get an appointment by ID.
+        :param AppointmentID: The ID of the appointment.
+        :return: The appointment, or None if not found.
+        """
+        return self._by_id.get(AppointmentID)
+
+    def by_date(self, date):
+        """
+        Get the appointments on a date.
+        :param date: The date (YYYY-MM-DD).
+        :return: List of appointments.
+        """
+        return list(self._by_date.get(date, {}).values())
+
+    def by_doctor(self, Doctor):
+        """
+        Get the appointments of a doctor.
+        :param Doctor: Doctor object, DoctorID, or (for loaded appointments) the doctor's name.
+        :return: List of appointments.
+        """
+        return list(self._by_doctor.get(_doctor_key(Doctor), {}).values())
+
+    def by_patient(self, Patient):
+        """
+        Get the appointments of a patient.
+        :param Patient: Patient object or the patient's name.
+        :return: List of appointments.
+        """
+        return list(self._by_patient.get(_name_of(Patient), {}).values())
+
+    def _index(self, appointment):
+        date, _ = appointment.get_date_hour()
+        self._by_id[appointment.AppointmentID] = appointment
+        self._by_date.setdefault(date, {})[appointment.AppointmentID] = appointment
+        self._by_doctor.setdefault(_doctor_key(appointment.Doctor), {})[appointment.AppointmentID] = appointment
+        self._by_patient.setdefault(_name_of(appointment.Patient), {})[appointment.AppointmentID] = appointment
+        self._ordered.add(appointment)
+
+    def _unindex(self, appointment):
+        date, _ = appointment.get_date_hour()
+        self._by_id.pop(appointment.AppointmentID, None)
+        self._ordered.discard(appointment)
+        for index, key in (
+            (self._by_date, date),
+            (self._by_doctor, _doctor_key(appointment.Doctor)),
+            (self._by_patient, _name_of(appointment.Patient)),
+        ):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(appointment.AppointmentID, None)
+                if not bucket:
+                    del index[key]
 
     def schedule(self, Date, Hour, Doctor, Patient):
         """
@@ -51,32 +203,48 @@ class appointmentScheduler:
         :param Patient: Patient object for the appointment.
         :return: True if the appointment was successfully scheduled, False otherwise.
         """
-        if Doctor.checkAvailability(Date, Hour):
+        booked = []
+
+        def change():
+            booked.clear()  # In case the repository runs change() again
+            if not Doctor.checkAvailability(Date, Hour):
+                return None
             Doctor.bookHour(Date, Hour)
-            new_appointment = appointment(
-                AppointmentID=self.nextAppointmentID,
+            booked.append(appointment(
+                AppointmentID=self._reserve_ids(1),
                 Patient=Patient,
                 Doctor=Doctor,
                 DateTime=f"{Date} {Hour}:00"
-            )
-            self.appointments.append(new_appointment)
-            self.nextAppointmentID += 1
-            return True
-        return False
+            ))
+            return [booked[0].to_record()], []
+
+        if self._commit([Doctor], change) is None:
+            return False
+        self._index(booked[0])
+        self.pending.append({"op": "put", "record": booked[0].to_dict()})
+        return True
 
     def suggestAvailableSlots(self, Doctor, date):
         """
         Suggest available time slots for a doctor on a specific date.
         :param Doctor: Doctor object to check availability.
         :param date: The date (YYYY-MM-DD) to check for available slots.
-        :return: A sorted list of available time slots.
+        :return: A sorted tuple of available time slots.
         """
-        if date not in Doctor.daysWorking:
-            return []  # No working hours on this date
-        hours_working, hours_booked = Doctor.daysWorking[date]
-        available_slots = [{"time": hour} for hour in hours_working if hour not in hours_booked]
-        sorted_slots = merge_sort(available_slots)
-        return [slot["time"] for slot in sorted_slots]
+        # Cached by the Doctor until a booking or cancellation on that date
+        return Doctor.freeSlots(date)
+
+    def earliestAvailableSlots(self, Doctors, k=1, start_date=None, days=30, start_hour=0):
+        """
+        Suggest the first free time slots with any of several doctors.
+        :param Doctors: List of Doctor objects to search.
+        :param k: Number of slots to return.
+        :param start_date: First date (YYYY-MM-DD) to search, default today.
+        :param days: Number of days to search.
+        :param start_hour: First hour to consider on start_date.
+        :return: List of up to k (date, hour, Doctor) tuples in chronological order.
+        """
+        return earliest_slots(Doctors, k, start_date, days, start_hour)
 
     def cancel(self, AppointmentID):
         """
@@ -84,19 +252,22 @@ class appointmentScheduler:
         :param AppointmentID: The ID of the appointment to cancel.
         :return: True if the appointment was successfully canceled, False otherwise.
         """
-        for appointment in self.appointments:
-            if appointment.AppointmentID == AppointmentID:
-                # Remove the appointment from the list
-                self.appointments.remove(appointment)
+        appointment = self._by_id.get(AppointmentID)
+        if appointment is None:
+            return False  # Appointment not found
+
+        def change():
+            # Free up the doctor's booked hour
+            date, time = appointment.get_date_hour()
+            appointment.Doctor.releaseHour(date, time)
+            return [], [AppointmentID]
 
-                # Free up the doctor's booked hour
-                date, time = appointment.DateTime.split(" ")
-                time = int(time.split(":")[0])  # Extract the hour
-                if date in appointment.Doctor.daysWorking and time in appointment.Doctor.daysWorking[date][1]:
-                    appointment.Doctor.daysWorking[date][1].remove(time)
+        self._commit([appointment.Doctor], change)
 
-                return True  # Appointment successfully canceled
-        return False  # Appointment not found
+        # Remove the appointment from the indexes
+        self._unindex(appointment)
+        self.pending.append({"op": "delete", "key": AppointmentID})
+        return True  # Appointment successfully canceled
 
     def reschedule(self, AppointmentID, NewDate, NewTime):
         """
@@ -106,34 +277,202 @@ class appointmentScheduler:
         :param NewTime: The new time for the appointment (int).
         :return: True if the appointment was successfully rescheduled, False otherwise.
         """
-        for appointment in self.appointments:
-            if appointment.AppointmentID == AppointmentID:
-                if appointment.Doctor.checkAvailability(NewDate, NewTime):
-                    # Free up the old booked hour
-                    old_date, old_time = appointment.DateTime.split(" ")
-                    old_time = int(old_time.split(":")[0])
-                    if old_date in appointment.Doctor.daysWorking and old_time in appointment.Doctor.daysWorking[old_date][1]:
-                        appointment.Doctor.daysWorking[old_date][1].remove(old_time)
+        appointment = self._by_id.get(AppointmentID)
+        if appointment is None:
+            return False
 
-                    # Book the new hour
-                    appointment.Doctor.bookHour(NewDate, NewTime)
+        def change():
+            if not appointment.Doctor.checkAvailability(NewDate, NewTime):
+                return None
+            # Free up the old booked hour, then book the new one
+            old_date, old_time = appointment.get_date_hour()
+            appointment.Doctor.releaseHour(old_date, old_time)
+            appointment.Doctor.bookHour(NewDate, NewTime)
+            record = appointment.to_record()
+            record["date"], record["time"] = NewDate, NewTime
+            return [record], []
 
-                    # Update the appointment details
-                    appointment.DateTime = f"{NewDate} {NewTime}:00"
+        if self._commit([appointment.Doctor], change) is None:
+            return False
 
-                    return True
-        return False
+        # Update the appointment details and move it to the new date's index
+        self._unindex(appointment)
+        appointment.DateTime = f"{NewDate} {NewTime}:00"
+        self._index(appointment)
 
-    def viewAppointments(self):
+        self.pending.append({"op": "put", "record": appointment.to_dict()})
+        return True
+
+    def schedule_many(self, requests):
+        """
+        Schedule many appointments at once, all or nothing.
+        Every request is checked in memory (including against the other requests of the batch);
+        if all of them can be booked they are applied together and persisted once.
+        :param requests: List of (Date, Hour, Doctor, Patient) tuples, as for schedule().
+        :return: Tuple (committed, results): committed is True if the batch was applied, and
+                 results has one {"ok", "AppointmentID", "error"} dictionary per request.
         """
-        View all scheduled appointments.
-        :return: A formatted string of all appointments.
+        results = []
+        booked = []
+
+        def change():
+            # Both start over in case the repository runs change() again
+            results.clear()
+            booked.clear()
+            claimed = set()
+            for Date, Hour, Doctor, Patient in requests:
+                slot = (id(Doctor), Date, Hour)
+                if slot in claimed:
+                    results.append(_result(error="Slot requested twice in the batch."))
+                elif not Doctor.checkAvailability(Date, Hour):
+                    results.append(_result(error="Doctor is not available at that time."))
+                else:
+                    claimed.add(slot)
+                    results.append(_result())
+            if not all(result["ok"] for result in results):
+                return None
+
+            first_id = self._reserve_ids(len(requests))
+            for offset, (result, (Date, Hour, Doctor, Patient)) in enumerate(zip(results, requests)):
+                Doctor.bookHour(Date, Hour)
+                booked.append(appointment(
+                    AppointmentID=first_id + offset,
+                    Patient=Patient,
+                    Doctor=Doctor,
+                    DateTime=f"{Date} {Hour}:00"
+                ))
+                result["AppointmentID"] = first_id + offset
+            return [a.to_record() for a in booked], []
+
+        if self._commit([Doctor for _, _, Doctor, _ in requests], change) is None:
+            return False, results
+        for new_appointment in booked:
+            self._index(new_appointment)
+        self.pending.extend({"op": "put", "record": a.to_dict()} for a in booked)
+        return True, results
+
+    def cancel_many(self, AppointmentIDs):
         """
-        if not self.appointments:
+        Cancel many appointments at once, all or nothing, persisting once.
+        :param AppointmentIDs: List of appointment IDs.
+        :return: Tuple (committed, results) as for schedule_many.
+        """
+        results = []
+        seen = set()
+        for AppointmentID in AppointmentIDs:
+            if AppointmentID in seen:
+                results.append(_result(AppointmentID, "Appointment listed twice in the batch."))
+            elif AppointmentID not in self._by_id:
+                results.append(_result(AppointmentID, "Appointment not found."))
+            else:
+                seen.add(AppointmentID)
+                results.append(_result(AppointmentID))
+        if not all(result["ok"] for result in results):
+            return False, results
+
+        canceled = [self._by_id[AppointmentID] for AppointmentID in AppointmentIDs]
+
+        def change():
+            for appointment in canceled:
+                date, time = appointment.get_date_hour()
+                appointment.Doctor.releaseHour(date, time)
+            return [], list(AppointmentIDs)
+
+        self._commit([a.Doctor for a in canceled], change)
+        for appointment in canceled:
+            self._unindex(appointment)
+        self.pending.extend({"op": "delete", "key": AppointmentID} for AppointmentID in AppointmentIDs)
+        return True, results
+
+    def reschedule_many(self, moves):
+        """
+        Reschedule many appointments at once, all or nothing, persisting once.
+        The hours the moved appointments leave are free for the other moves of the batch, so
+        appointments can be swapped or a whole day shifted by one hour.
+        :param moves: List of (AppointmentID, NewDate, NewTime) tuples, as for reschedule().
+        :return: Tuple (committed, results) as for schedule_many.
+        """
+        results = []
+        moved = [self._by_id.get(AppointmentID) for AppointmentID, _, _ in moves]
+
+        def change():
+            results.clear()
+            seen = set()
+            freed = set()
+            for appointment in moved:
+                if appointment is not None and appointment.AppointmentID not in seen:
+                    seen.add(appointment.AppointmentID)
+                    old_date, old_time = appointment.get_date_hour()
+                    freed.add((id(appointment.Doctor), old_date, old_time))
+
+            checked = set()
+            claimed = set()
+            for appointment, (AppointmentID, NewDate, NewTime) in zip(moved, moves):
+                if appointment is None:
+                    results.append(_result(AppointmentID, "Appointment not found."))
+                    continue
+                if AppointmentID in checked:
+                    results.append(_result(AppointmentID, "Appointment listed twice in the batch."))
+                    continue
+                checked.add(AppointmentID)
+                new_slot = (id(appointment.Doctor), NewDate, NewTime)
+                available = appointment.Doctor.checkAvailability(NewDate, NewTime) or new_slot in freed
+                if not available or new_slot in claimed:
+                    results.append(_result(AppointmentID, "Doctor is not available at that time."))
+                    continue
+                claimed.add(new_slot)
+                results.append(_result(AppointmentID))
+            if not all(result["ok"] for result in results):
+                return None
+
+            # Release every old hour first, so hours swapped within the batch are free to book
+            for appointment in moved:
+                date, time = appointment.get_date_hour()
+                appointment.Doctor.releaseHour(date, time)
+            records = []
+            for appointment, (_, NewDate, NewTime) in zip(moved, moves):
+                appointment.Doctor.bookHour(NewDate, NewTime)
+                record = appointment.to_record()
+                record["date"], record["time"] = NewDate, NewTime
+                records.append(record)
+            return records, []
+
+        if self._commit([a.Doctor for a in moved if a is not None], change) is None:
+            return False, results
+        for appointment, (_, NewDate, NewTime) in zip(moved, moves):
+            self._unindex(appointment)
+            appointment.DateTime = f"{NewDate} {NewTime}:00"
+            self._index(appointment)
+        self.pending.extend({"op": "put", "record": a.to_dict()} for a in moved)
+        return True, results
+
+    def _commit(self, doctors, change):
+        # Run change() (check and book/release hours, return (saved, deleted) records or None)
+        # against the latest stored schedules; see Repository.update_schedule
+        if self.repository is None:
+            return change()
+        return self.repository.update_schedule(doctors, change)
+
+    def _reserve_ids(self, count):
+        # Consecutive appointment IDs; with a repository they are unique across processes
+        if self.repository is not None:
+            self.nextAppointmentID = self.repository.next_appointment_id(count)
+        first = self.nextAppointmentID
+        self.nextAppointmentID += count
+        return first
+
+    def viewAppointments(self, date=None):
+        """
+        View scheduled appointments.
+        :param date: Optional date (YYYY-MM-DD) to only show that day's appointments.
+        :return: A formatted string of the appointments, ordered by date and hour.
+        """
+        appointments = list(self._ordered.irange((date, 0), (date, 23))) if date else self._ordered
+        if not appointments:
             return "No appointments scheduled."
         
         schedule = []
-        for appointment in self.appointments:
+        for appointment in appointments:
             details = appointment.get_appointment_details()
             schedule.append(
                 f"AppointmentID: {details['AppointmentID']}, "
@@ -146,50 +485,32 @@ class appointmentScheduler:
     def save_to_json(self, filename):
         """
         Save all appointments to a JSON file.
+        When the scheduler was loaded from (or last saved to) the same file, only the changes
+        made since then are appended to the file's journal; otherwise a full snapshot is written.
         :param filename: The name of the JSON file.
         """
-        data = [
-            {
-                "AppointmentID": appointment.AppointmentID,
-                "Patient": appointment.Patient.getName(),
-                "Doctor": appointment.Doctor.Name,
-                "DateTime": appointment.DateTime
-            }
-            for appointment in self.appointments
-        ]
-        with open(filename, "w") as file:
-            json.dump(data, file, indent=4)
+        if self.journal is not None and self.journal.filename == filename:
+            self.journal.append(self.pending)
+        else:
+            self.journal = JournalStore(filename, key="AppointmentID", terms=APPOINTMENT_TERMS)
+            self.journal.replace_all([a.to_dict() for a in self._by_id.values()])
+        self.pending = []
 
     def load_from_json(self, filename):
         """
-        Load all appointments from a JSON file.
+        Load all appointments from a JSON file, replaying its journal if present.
         :param filename: The name of the JSON file.
         """
-        try:
-            with open(filename, "r") as file:
-                data = json.load(file)
-
-            self.appointments = []
-            for appointment_data in data:
-                new_appointment = appointment(
-                    AppointmentID=appointment_data["AppointmentID"],
-                    Patient=appointment_data["Patient"],  # Replace with actual Patient object
-                    Doctor=appointment_data["Doctor"],  # Replace with actual Doctor object
-                    DateTime=appointment_data["DateTime"]
-                )
-                self.appointments.append(new_appointment)
-
-            if self.appointments:
-                self.nextAppointmentID = max(a.AppointmentID for a in self.appointments) + 1
-        except FileNotFoundError:
+        self.journal = JournalStore(filename, key="AppointmentID", terms=APPOINTMENT_TERMS)
+        self.pending = []
+        if not self.journal.exists():
             print(f"File {filename} not found. Starting with empty data.")
+            return
 
+        self._by_id, self._by_date, self._by_doctor, self._by_patient = {}, {}, {}, {}
+        self._ordered.clear()
+        for appointment_data in self.journal.load():
+            self._index(appointment.from_dict(appointment_data))
 
-# Example usage of the appointmentScheduler
-scheduler = appointmentScheduler()
-
-# Load appointments from JSON
-scheduler.load_from_json("appointments.json")
-
-# Save appointments to JSON
-scheduler.save_to_json("appointments.json")
\ No newline at end of file
+        if self._by_id:
+            self.nextAppointmentID = max(self._by_id) + 1
@@ -0,0 +1,43 @@
+import heapq
+from datetime import date, timedelta
+
+
+def earliest_slots(doctors, k=1, start_date=None, days=30, start_hour=0):
+    """
+    Find the first free slots with any of several doctors.
+    Only the k doctors with the earliest first free slots can hold any of the k earliest slots,
+    so the doctors are consumed one at a time and just those k are kept. A priority queue then
+    holds each kept doctor's next free slot; taking a slot only advances that doctor's schedule,
+    so after one lookup per doctor the cost grows with k, not with the number of doctors times
+    the number of days.
+    :param doctors: Iterable of Doctor objects, e.g., a generator loading them one by one; on equal
+                    times, earlier doctors come first.
+    :param k: Number of slots to return.
+    :param start_date: First date to search (YYYY-MM-DD, default: today).
+    :param days: Number of days to search, starting with start_date.
+    :param start_hour: First hour to consider on start_date.
+    :return: List of up to k (date, hour, Doctor) tuples in chronological order.
+    """
+    start_date = start_date or date.today().isoformat()
+    end_date = (date.fromisoformat(start_date) + timedelta(days=days - 1)).isoformat()
+
+    def first_slots():
+        for order, doctor in enumerate(doctors):
+            slots = doctor.iterFreeSlots(start_date, start_hour, end_date)
+            first = next(slots, None)
+            if first is not None:
+                yield first, order, doctor, slots
+
+    # Sorted, so already a heap; (slot, order) is unique, so doctors are never compared
+    heap = heapq.nsmallest(k, first_slots())
+
+    found = []
+    while heap and len(found) < k:
+        (slot_date, hour), order, doctor, slots = heap[0]
+        found.append((slot_date, hour, doctor))
+        following = next(slots, None)
+        if following is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (following, order, doctor, slots))
+    return found
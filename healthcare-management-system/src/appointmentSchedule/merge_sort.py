@@ -1,33 +1,28 @@
-def merge_sort(appointments):
-    if len(appointments) > 1:
-        mid = len(appointments) // 2  # Finding the mid of the array
-        left_half = appointments[:mid]  # Dividing the elements into 2 halves
-        right_half = appointments[mid:]
+from utils.external_sort import DEFAULT_MEMORY_BUDGET, external_sort
+from utils.sorting import sort_items
 
-        merge_sort(left_half)  # Sorting the first half
-        merge_sort(right_half)  # Sorting the second half
 
-        i = j = k = 0
+def merge_sort(appointments, key='time', reverse=False):
+    """
+    Sort appointments in place using Merge Sort.
+    :param appointments: List of appointments.
+    :param key: Field name or key function to sort by (default is 'time').
+    :param reverse: True to sort in descending order.
+    :return: The sorted list.
+    """
+    appointments[:] = sort_items(appointments, key=key, reverse=reverse, strategy="merge")
+    return appointments
 
-        # Copy data to temp arrays L[] and R[]
-        while i < len(left_half) and j < len(right_half):
-            if left_half[i]['time'] < right_half[j]['time']:  # Assuming appointments have a 'time' key
-                appointments[k] = left_half[i]
-                i += 1
-            else:
-                appointments[k] = right_half[j]
-                j += 1
-            k += 1
 
-        # Checking if any element was left
-        while i < len(left_half):
-            appointments[k] = left_half[i]
-            i += 1
-            k += 1
-
-        while j < len(right_half):
-            appointments[k] = right_half[j]
-            j += 1
-            k += 1
-
-    return appointments
\ No newline at end of file
+def merge_sort_file(input_filename, output_filename, key='time', reverse=False, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """
+    Sort a JSON list of appointments that may not fit in memory (external merge sort).
+    Orders exactly like merge_sort. Sort a store's snapshot only after its journal was compacted.
+    :param input_filename: Path of the JSON list, e.g., appointments.json.
+    :param output_filename: Path of the sorted output (may be the input file).
+    :param key: Field name, key function, or list of them to sort by (default is 'time').
+    :param reverse: True to sort in descending order.
+    :param memory_budget: Approximate number of bytes of input JSON sorted in memory at a time.
+    :return: Number of appointments sorted.
+    """
+    return external_sort(input_filename, output_filename, key=key, reverse=reverse, memory_budget=memory_budget)
@@ -6,6 +6,15 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from Users.User import User, Roles  # Import the User class and Roles for login and permissions
 
+# Data files live at the project root
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Storage repository, opened on first use (see get_repository)
+_repository = None
+
+# Doctors and patients shared by every menu of the session (see get_registry)
+_registry = None
+
 # Predefined users for the login system (for demonstration purposes)
 users = {
     "admin": User(user_id="1", username="admin", password="admin123", permission_level=Roles.ADMIN, accountCreated=0),
@@ -24,34 +33,38 @@ def main():
 
     print(f"\nWelcome, {current_user.username}!")
     
-    while True:
-        print("\nSelect an option:")
-        print("1. Manage Patient Records")
-        print("2. Manage Medical History")
-        print("3. Schedule Appointments")
-        print("4. Logout")
+    try:
+        while True:
+            print("\nSelect an option:")
+            print("1. Manage Patient Records")
+            print("2. Manage Medical History")
+            print("3. Schedule Appointments")
+            print("4. Logout")
         
-        choice = input("Enter your choice: ")
+            choice = input("Enter your choice: ")
         
-        if choice == '1':
-            # Only doctors and admins can manage patient records
-            if not current_user.has_permission(Roles.DOCTOR):
-                print("Access denied. Requires doctor or admin.")
+            if choice == '1':
+                # Only doctors and admins can manage patient records
+                if not current_user.has_permission(Roles.DOCTOR):
+                    print("Access denied. Requires doctor or admin.")
+                else:
+                    manage_patient_records()
+            elif choice == '2':
+                # Only doctors and admins can manage medical histories
+                if not current_user.has_permission(Roles.DOCTOR):
+                    print("Access denied. Requires doctor or admin.")
+                else:
+                    manage_medical_history()
+            elif choice == '3':
+                schedule_appointments(current_user)
+            elif choice == '4':
+                print("Logging out. Goodbye!")
+                break
             else:
-                manage_patient_records()
-        elif choice == '2':
-            # Only doctors and admins can manage medical histories
-            if not current_user.has_permission(Roles.DOCTOR):
-                print("Access denied. Requires doctor or admin.")
-            else:
-                manage_medical_history()
-        elif choice == '3':
-            schedule_appointments(current_user)
-        elif choice == '4':
-            print("Logging out. Goodbye!")
-            break
-        else:
-            print("Invalid choice. Please try again.")
+                print("Invalid choice. Please try again.")
+    finally:
+        # Logging out (or the input ending) writes what the repository still buffers
+        flush_repository()
 
 def login():
     """
@@ -73,51 +86,90 @@ def login():
     print("Too many failed login attempts.")
     return None
 
+def get_repository():
+    """
+    Get the storage repository for this session.
+    The backend is selected with the MEDITRACK_STORAGE environment variable ('json' or 'sqlite').
+    :return: A storage Repository.
+    """
+    global _repository
+    if _repository is None:
+        from storage import open_repository
+        _repository = open_repository(PROJECT_ROOT)
+    return _repository
+
+def flush_repository(due_only=False):
+    """
+    Write the changes the repository buffers, if it was opened (see Repository.flush).
+    :param due_only: True to write them only once enough are buffered or the oldest is old enough.
+    """
+    if _repository is None:
+        return
+    try:
+        if due_only:
+            _repository.flush_if_due()
+        else:
+            _repository.flush()
+    except Exception as e:
+        print(f"Warning: could not save changes: {e}")
+
+def get_registry():
+    """
+    Get the entity registry for this session, so every menu works on the same Doctor objects.
+    :return: An EntityRegistry over the session's repository.
+    """
+    global _registry
+    if _registry is None:
+        from Users.registry import EntityRegistry
+        _registry = EntityRegistry(get_repository())
+    return _registry
+
 def manage_patient_records():
     # Interactive submenu for managing patient records
     from patientRecords.record import PatientRecordManager
     from Users.Doctors import Doctor
-    import json
 
-    manager = PatientRecordManager()
+    try:
+        repository = get_repository()
+    except Exception as e:
+        print(f"Warning: could not open storage: {e}")
+        return
+
+    registry = get_registry()
+    manager = PatientRecordManager(repository=repository, registry=registry)
+
+    # Doctors are listed by name and only loaded once picked (or once a loaded record names them).
+    # Legacy weekday-name keys are migrated by the repository when a doctor is first loaded.
+    def doctor_names():
+        try:
+            names = registry.doctor_names()
+        except Exception:
+            names = {}
+        if not names:
+            default = registry.add_doctor(Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={}))
+            names = {default.DoctorID: default.Name}
+        return names
 
-    # Seed at least one doctor (try loading from doctor_1.json if present)
     try:
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-        doctor_json = os.path.join(project_root, "doctor_1.json")
-        if os.path.exists(doctor_json):
-            with open(doctor_json, "r") as f:
-                data = json.load(f)
-            doc = Doctor(
-                DoctorID=data.get("DoctorID", 1),
-                Name=data.get("Name", "Dr. Smith"),
-                daysWorking=data.get("daysWorking", {})
-            )
-            # Migrate any legacy weekday-name keys to date keys
-            try:
-                doc.migrate_legacy_day_keys()
-                # Persist migrated schedule
-                doc.save_to_json(doctor_json)
-            except Exception:
-                pass
-            manager.add_doctor(doc)
-        else:
-            manager.add_doctor(Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={}))
-    except Exception:
-        manager.add_doctor(Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={}))
+        manager.load_records()
+    except Exception as e:
+        print(f"Warning: could not load records: {e}")
 
     def pick_doctor():
         # Helper to select a doctor, defaults to the first available
-        if not manager.doctors:
-            return Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={})
+        names = doctor_names()
         print("Available doctors:")
-        for did, doc in manager.doctors.items():
-            print(f"- {did}: {getattr(doc, 'Name', 'Unknown')}")
+        for did, name in names.items():
+            print(f"- {did}: {name or 'Unknown'}")
         try:
             did = int(input("Enter DoctorID: ").strip())
-            return manager.doctors.get(did) or next(iter(manager.doctors.values()))
         except Exception:
-            return next(iter(manager.doctors.values()))
+            did = None
+        if did not in names:
+            did = next(iter(names))
+        doctor = registry.doctor(did)
+        manager.add_doctor(doctor)
+        return doctor
 
     while True:
         print("\nPatient Records")
@@ -126,6 +178,7 @@ def manage_patient_records():
         print("3. Sort records")
         print("4. View records")
         print("5. Back")
+        flush_repository(due_only=True)
         choice = input("Choice: ").strip()
 
         if choice == "1":
@@ -190,41 +243,30 @@ def manage_patient_records():
             print("2. Patient")
             sel = input("Enter choice: ").strip()
             if sel == "2":
-                manager.sort_records(key=lambda x: x.get('Patient', ''))
+                manager.sort_records(key='Patient')
             else:
-                manager.sort_records(key=lambda x: x.get('Date', ''))
+                manager.sort_records(key='Date')
             print("Records sorted.")
         elif choice == "4":
             print(manager.view_records())
         elif choice == "5":
+            flush_repository()
             break
         else:
             print("Invalid choice. Try again.")
 
 def manage_medical_history():
-    from medicalHistory.heap_sort import heap_sort
-    import json
-
-    # Persist data in a JSON file at the project root
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-    hist_json = os.path.join(project_root, "medical_histories.json")
-
-    histories = []
+    from medicalHistory.heap_sort import most_recent
 
-    # Load existing histories if present
-    if os.path.exists(hist_json):
-        try:
-            with open(hist_json, "r") as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    histories = data
-        except Exception as e:
-            print(f"Warning: could not load histories: {e}")
+    try:
+        repository = get_repository()
+    except Exception as e:
+        print(f"Warning: could not open storage: {e}")
+        return
 
-    def save():
+    def save(entry):
         try:
-            with open(hist_json, "w") as f:
-                json.dump(histories, f, indent=4)
+            repository.save_history(entry)
         except Exception as e:
             print(f"Warning: could not save histories: {e}")
 
@@ -234,13 +276,26 @@ def manage_medical_history():
         except Exception:
             return default
 
+    def print_history(h):
+        print(
+            f"ID: {h.get('historyID','')}, Date: {h.get('date','')}, "
+            f"Patient: {h.get('patient','')}, Doctor: {h.get('doctor','')}, Age: {h.get('age','')}\n"
+            f"  Diagnosis: {', '.join(h.get('diagnosis', []))}\n"
+            f"  Injuries: {', '.join(h.get('injuries', []))}\n"
+            f"  Medications: {', '.join(h.get('medications', []))}\n"
+            f"  Allergies: {', '.join(h.get('allergies', []))}"
+        )
+
     while True:
         print("\nMedical History")
         print("1. Add history entry")
         print("2. Update history entry")
-        print("3. Sort histories by date")
+        print("3. View histories by date")
         print("4. View histories")
-        print("5. Back")
+        print("5. View latest visits for a patient")
+        print("6. Search histories")
+        print("7. Back")
+        flush_repository(due_only=True)
         choice = input("Choice: ").strip()
 
         if choice == "1":
@@ -258,12 +313,11 @@ def manage_medical_history():
             entry['injuries'] = [s.strip() for s in inj.split(',') if s.strip()]
             entry['medications'] = [s.strip() for s in meds.split(',') if s.strip()]
             entry['allergies'] = [s.strip() for s in alg.split(',') if s.strip()]
-            histories.append(entry)
-            save()
+            save(entry)
             print("History added.")
         elif choice == "2":
             hid = input("History ID to update: ").strip()
-            entry = next((h for h in histories if h.get('historyID') == hid), None)
+            entry = repository.get_history(hid)
             if not entry:
                 print("History ID not found.")
                 continue
@@ -292,83 +346,87 @@ def manage_medical_history():
             val = input("New Allergies (comma-separated): ").strip()
             if val:
                 entry['allergies'] = [s.strip() for s in val.split(',') if s.strip()]
-            save()
+            save(entry)
             print("History updated.")
         elif choice == "3":
-            try:
-                heap_sort(histories)  # sorts in-place by 'date'
-                save()
-                print("Histories sorted by date.")
-            except Exception as e:
-                print(f"Failed to sort histories: {e}")
+            # The repository keeps histories in date order, so this is a walk with no sort or save
+            histories = repository.histories_by_date()
+            if not histories:
+                print("No medical histories available.")
+            for h in histories:
+                print_history(h)
         elif choice == "4":
+            histories = repository.list_histories()
             if not histories:
                 print("No medical histories available.")
             else:
                 for h in histories:
-                    print(
-                        f"ID: {h.get('historyID','')}, Date: {h.get('date','')}, "
-                        f"Patient: {h.get('patient','')}, Doctor: {h.get('doctor','')}, Age: {h.get('age','')}\n"
-                        f"  Diagnosis: {', '.join(h.get('diagnosis', []))}\n"
-                        f"  Injuries: {', '.join(h.get('injuries', []))}\n"
-                        f"  Medications: {', '.join(h.get('medications', []))}\n"
-                        f"  Allergies: {', '.join(h.get('allergies', []))}"
-                    )
+                    print_history(h)
         elif choice == "5":
+            # Only the patient's N newest entries are selected; nothing is sorted or saved
+            name = input("Patient name: ").strip()
+            n = to_int(input("Number of visits [5]: ").strip() or 5, 5)
+            latest = most_recent(repository.histories_for_patient(name), n)
+            if not latest:
+                print("No dated histories for this patient.")
+            for h in latest:
+                print_history(h)
+        elif choice == "6":
+            # Look up diagnoses, injuries, medications or allergies through the term index
+            terms = [t.strip() for t in input("Terms (comma-separated): ").split(',') if t.strip()]
+            if not terms:
+                print("No terms entered.")
+                continue
+            match_all = input("Match all terms? (Y/n): ").strip().lower() != 'n'
+            field = input("Field (diagnosis/injuries/medications/allergies, blank for any): ").strip().lower() or None
+            if field and field not in ("diagnosis", "injuries", "medications", "allergies"):
+                print("Invalid field.")
+                continue
+            results = repository.search_histories(terms, match_all=match_all, field=field)
+            if not results:
+                print("No matching histories.")
+            for h in results:
+                print_history(h)
+        elif choice == "7":
+            flush_repository()
             break
         else:
             print("Invalid choice. Try again.")
 
 def schedule_appointments(current_user):
-    from appointmentSchedule.merge_sort import merge_sort
-    from Users.Doctors import Doctor
-    import json
+    from appointmentSchedule.availability import earliest_slots
+    from storage.repository import appointment_date
+    from Users.Doctors import DEFAULT_WEEKLY_HOURS, Doctor
     from datetime import datetime
 
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-    appts_json = os.path.join(project_root, "appointments.json")
-    doctor_json = os.path.join(project_root, "doctor_1.json")
+    try:
+        repository = get_repository()
+    except Exception as e:
+        print(f"Warning: could not open storage: {e}")
+        return
 
-    # Load or create doctor
+    # Load or create doctor (one object per session, shared with the other menus through the registry)
+    registry = get_registry()
     doctor = None
     try:
-        if os.path.exists(doctor_json):
-            doctor = Doctor.load_from_json(doctor_json)
-        if not doctor:
-            doctor = Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={})
-        else:
-            # Migrate any legacy weekday-name keys to concrete date keys
-            try:
-                doctor.migrate_legacy_day_keys()
-                doctor.save_to_json(doctor_json)
-            except Exception:
-                pass
+        doctor = registry.doctor(1)
     except Exception:
-        doctor = Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={})
-
-    # Load appointments
-    appointments = []
-    if os.path.exists(appts_json):
-        try:
-            with open(appts_json, "r") as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    appointments = data
-        except Exception as e:
-            print(f"Warning: could not load appointments: {e}")
-
-    def save_appointments():
+        pass
+    if not doctor:
+        doctor = registry.add_doctor(Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={}))
+    if not doctor.weeklyHours:
+        # Schedules from before weekly hours: use the default week, saved with the next booking
+        # (the dates it makes redundant are pruned when the doctor is saved)
+        doctor.setWeeklyHours(DEFAULT_WEEKLY_HOURS)
+
+    def commit(change):
+        # change() runs while the doctor is locked, against their latest saved schedule, so two
+        # terminals cannot book the same hour; it returns (saved, deleted) appointments or None
         try:
-            with open(appts_json, "w") as f:
-                json.dump(appointments, f, indent=4)
+            return repository.update_schedule([doctor], change)
         except Exception as e:
             print(f"Warning: could not save appointments: {e}")
-
-    def save_doctor():
-        try:
-            doctor.save_to_json(doctor_json)
-        except Exception as e:
-            print(f"Warning: could not save doctor schedule: {e}")
+            return None
 
     def to_int(val, default=0):
         try:
@@ -384,38 +442,27 @@ def schedule_appointments(current_user):
         except Exception:
             return None, None
 
-    def ensure_date_in_schedule(date_str):
-        # If date not present, seed default weekday hours (Mon-Fri: 9,10,11,13,14,15,16)
-        if date_str not in doctor.daysWorking:
-            _, dt = parse_date(date_str)
-            if not dt:
-                return False
-            if dt.weekday() < 5:  # 0=Mon .. 4=Fri
-                default_hours = [9, 10, 11, 13, 14, 15, 16]
-                doctor.daysWorking[date_str] = [default_hours[:], []]
-                save_doctor()
-                return True
-            else:
-                # Weekends: no working hours by default
-                doctor.daysWorking[date_str] = [[], []]
-                save_doctor()
-                return True
-        return True
-
     def available_slots(date_str):
-        ok = ensure_date_in_schedule(date_str)
-        if not ok:
-            return []
-        work, booked = doctor.daysWorking.get(date_str, [[], []])
-        avail = [{"time": h} for h in work if h not in booked]
-        sorted_avail = merge_sort(avail)
-        return [s["time"] for s in sorted_avail]
+        # Dates without bookings come from the weekly hours and are not stored
+        return doctor.freeSlots(date_str)
 
     def next_id():
-        try:
-            return max(int(a.get("appointmentID", 0)) for a in appointments) + 1 if appointments else 1
-        except Exception:
-            return len(appointments) + 1
+        return repository.next_appointment_id()
+
+    def candidate_doctors():
+        # Built one at a time as earliest_slots consumes them, which keeps only the k it needs.
+        # Doctors the registry does not hold are loaded without registering them and released
+        # again, so searching every schedule does not cycle the registry's DOCTOR_CAPACITY.
+        # This menu's doctor comes from the registry, with the weekly hours applied above.
+        for did in registry.doctor_names():
+            known = registry.peek_doctor(did)
+            if known is not None:
+                yield known
+                continue
+            loaded = repository.get_doctor(did)
+            if loaded is not None:
+                yield loaded
+                repository.release_doctor(did)
 
     while True:
         print("\nAppointments")
@@ -424,7 +471,9 @@ def schedule_appointments(current_user):
         print("3. Cancel appointment")
         print("4. Reschedule appointment")
         print("5. View appointments")
-        print("6. Back")
+        print("6. Find first free slots with any doctor")
+        print("7. Back")
+        flush_repository(due_only=True)
         choice = input("Choice: ").strip()
 
         if choice == "1":
@@ -458,20 +507,23 @@ def schedule_appointments(current_user):
             if not doctor.checkAvailability(norm, hour):
                 print("Selected time is not available.")
                 continue
-            if not doctor.bookHour(norm, hour):
+
+            def book():
+                if not doctor.bookHour(norm, hour):
+                    return None  # Taken in the meantime, e.g., at another terminal
+                appt = {
+                    "appointmentID": next_id(),
+                    "patient": patient,
+                    "doctorID": doctor.DoctorID,
+                    "doctorName": doctor.Name,
+                    "date": norm,
+                    "time": hour
+                }
+                return [appt], []
+
+            if commit(book) is None:
                 print("Failed to book the slot.")
                 continue
-            appt = {
-                "appointmentID": next_id(),
-                "patient": patient,
-                "doctorID": doctor.DoctorID,
-                "doctorName": doctor.Name,
-                "date": norm,
-                "time": hour
-            }
-            appointments.append(appt)
-            save_appointments()
-            save_doctor()
             print("Appointment scheduled.")
         elif choice == "3":
             # Only doctors and admins can cancel any appointment
@@ -483,21 +535,26 @@ def schedule_appointments(current_user):
             except Exception:
                 print("Invalid ID.")
                 continue
-            appt = next((a for a in appointments if int(a.get("appointmentID", -1)) == appt_id), None)
+            appt = repository.get_appointment(appt_id)
             if not appt:
                 print("Appointment not found.")
                 continue
-            date_key = appt.get("date") or appt.get("day")  # backward compatibility
-            t = to_int(appt.get("time", 0), 0)
-            if date_key in doctor.daysWorking:
+
+            def cancel():
+                current = repository.get_appointment(appt_id)
+                if not current:
+                    return None  # Canceled in the meantime
+                date_key = current.get("date") or current.get("day")  # backward compatibility
+                t = to_int(current.get("time", 0), 0)
                 try:
-                    if t in doctor.daysWorking[date_key][1]:
-                        doctor.daysWorking[date_key][1].remove(t)
+                    doctor.releaseHour(date_key, t)
                 except Exception:
                     pass
-            appointments = [a for a in appointments if int(a.get("appointmentID", -1)) != appt_id]
-            save_appointments()
-            save_doctor()
+                return [], [appt_id]
+
+            if commit(cancel) is None:
+                print("Appointment not found.")
+                continue
             print("Appointment canceled.")
         elif choice == "4":
             # Only doctors and admins can reschedule any appointment
@@ -509,12 +566,10 @@ def schedule_appointments(current_user):
             except Exception:
                 print("Invalid ID.")
                 continue
-            appt = next((a for a in appointments if int(a.get("appointmentID", -1)) == appt_id), None)
+            appt = repository.get_appointment(appt_id)
             if not appt:
                 print("Appointment not found.")
                 continue
-            old_date = (appt.get("date") or appt.get("day") or "").strip()
-            old_time = to_int(appt.get("time", 0), 0)
             new_date_in = input("New date (YYYY-MM-DD): ").strip()
             new_date, _ = parse_date(new_date_in)
             if not new_date:
@@ -533,35 +588,57 @@ def schedule_appointments(current_user):
             if not doctor.checkAvailability(new_date, new_time):
                 print("Selected new time is not available.")
                 continue
-            try:
-                if old_date in doctor.daysWorking and old_time in doctor.daysWorking[old_date][1]:
-                    doctor.daysWorking[old_date][1].remove(old_time)
-            except Exception:
-                pass
-            if not doctor.bookHour(new_date, new_time):
+
+            def move():
+                current = repository.get_appointment(appt_id)
+                if not current or not doctor.checkAvailability(new_date, new_time):
+                    return None  # Canceled, or the hour was taken in the meantime
+                current = dict(current)
+                old_date = (current.get("date") or current.get("day") or "").strip()
+                old_time = to_int(current.get("time", 0), 0)
+                try:
+                    doctor.releaseHour(old_date, old_time)
+                except Exception:
+                    pass
+                doctor.bookHour(new_date, new_time)
+                current["date"], current["time"] = new_date, new_time
+                current.pop("day", None)
+                return [current], []
+
+            if commit(move) is None:
                 print("Failed to book new slot.")
                 continue
-            appt["date"], appt["time"] = new_date, new_time
-            if "day" in appt:
-                appt.pop("day", None)
-            save_appointments()
-            save_doctor()
             print("Appointment rescheduled.")
         elif choice == "5":
+            appointments = repository.appointments_by_date()
             if not appointments:
                 print("No appointments scheduled.")
             else:
-                by_date = {}
+                # Already ordered by (date, time); print a header whenever the date changes
+                current_date = None
                 for a in appointments:
-                    key = a.get("date") or a.get("day") or ""
-                    by_date.setdefault(key, []).append({"time": to_int(a.get("time", 0), 0), "_a": a})
-                for date_key in sorted(by_date.keys()):
-                    day_list = merge_sort(by_date[date_key])
-                    print(f"\n{date_key}:")
-                    for item in day_list:
-                        a = item["_a"]
-                        print(f"  ID {a.get('appointmentID')}: {item.get('time')}:00 - {a.get('patient')} with {a.get('doctorName')}")
+                    date_key = appointment_date(a)
+                    if date_key != current_date:
+                        print(f"\n{date_key}:")
+                        current_date = date_key
+                    print(f"  ID {a.get('appointmentID')}: {to_int(a.get('time', 0), 0)}:00 - {a.get('patient')} with {a.get('doctorName')}")
         elif choice == "6":
+            # Earliest free hours over every stored doctor in the next 30 days, starting after the current hour
+            k = to_int(input("Number of slots [5]: ").strip() or 5, 5)
+            now = datetime.now()
+            try:
+                slots = earliest_slots(candidate_doctors(), k, start_date=now.strftime("%Y-%m-%d"),
+                                       days=30, start_hour=now.hour + 1)
+            except Exception as e:
+                print(f"Warning: could not load doctors: {e}")
+                slots = earliest_slots([doctor], k, start_date=now.strftime("%Y-%m-%d"), days=30,
+                                       start_hour=now.hour + 1)
+            if not slots:
+                print("No free slots with any doctor in the next 30 days.")
+            for slot_date, hour, slot_doctor in slots:
+                print(f"  {slot_date} {hour}:00 - {slot_doctor.Name} (DoctorID {slot_doctor.DoctorID})")
+        elif choice == "7":
+            flush_repository()
             break
         else:
             print("Invalid choice. Try again.")
@@ -1,33 +1,109 @@
-def heapify(array, n, i):
-    largest = i  # Initialize largest as root
-    left = 2 * i + 1  # left = 2*i + 1
-    right = 2 * i + 2  # right = 2*i + 2
+import heapq
+import re
+from datetime import datetime
+from operator import itemgetter
 
-    # If left child is larger than root
-    if left < n and array[left]['date'] > array[largest]['date']:
-        largest = left
+from utils.external_sort import DEFAULT_MEMORY_BUDGET, external_sort
+from utils.sorting import make_key, sort_items
 
-    # If right child is larger than largest so far
-    if right < n and array[right]['date'] > array[largest]['date']:
-        largest = right
 
-    # If largest is not root
-    if largest != i:
-        array[i], array[largest] = array[largest], array[i]  # Swap
+_ISO_DATE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
 
-        # Recursively heapify the affected sub-tree
-        heapify(array, n, largest)
 
-def heap_sort(medical_history):
-    n = len(medical_history)
+def date_ordinal(value):
+    """
+    Parse a YYYY-MM-DD date into its proleptic Gregorian ordinal.
+    Only that exact form is a date; compact or partial forms (e.g., '20240105', '2024-1-5') are
+    invalid, as they are for the SQLite repository's date ordering.
+    :param value: The date string.
+    :return: The ordinal (int), or None if the value is not a valid date (e.g., '2020-99-10').
+    """
+    value = str(value)
+    if not _ISO_DATE.fullmatch(value):
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").toordinal()
+    except ValueError:
+        return None
 
-    # Build a max heap
-    for i in range(n // 2 - 1, -1, -1):
-        heapify(medical_history, n, i)
 
-    # One by one extract elements from heap
-    for i in range(n - 1, 0, -1):
-        medical_history[i], medical_history[0] = medical_history[0], medical_history[i]  # Swap
-        heapify(medical_history, i, 0)  # Heapify the root element
+_entry_date = make_key('date')
 
-    return medical_history
\ No newline at end of file
+
+def history_date_key(entry):
+    """
+    Sort key ordering history entries (dictionaries or objects) by date, with missing or invalid
+    dates after every valid one, like heap_sort.
+    """
+    ordinal = date_ordinal(_entry_date(entry))
+    return (ordinal is None, ordinal or 0)
+
+
+def _dated(medical_history, key):
+    # Parse every entry's date once: yields (ordinal or None, entry)
+    date_of = make_key(key)
+    for entry in medical_history:
+        yield date_ordinal(date_of(entry)), entry
+
+
+def heap_sort(medical_history, key='date', reverse=False):
+    """
+    Sort medical history entries in place by date using Heap Sort.
+    Dates are parsed once per entry; entries with a missing or invalid date are placed last.
+    :param medical_history: List of history entries.
+    :param key: Field name or key function giving the date (default is 'date').
+    :param reverse: True to sort in descending order.
+    :return: The sorted list.
+    """
+    dated = list(_dated(medical_history, key))
+    valid = [pair for pair in dated if pair[0] is not None]
+    invalid = [entry for ordinal, entry in dated if ordinal is None]
+    ordered = sort_items(valid, key=itemgetter(0), reverse=reverse, strategy="heap")
+    medical_history[:] = [entry for _, entry in ordered] + invalid
+    return medical_history
+
+
+def most_recent(medical_history, n, key='date'):
+    """
+    Get the n most recent entries with a bounded heap, in O(len * log n) instead of a full sort.
+    Entries with a missing or invalid date are skipped.
+    :param medical_history: Iterable of history entries.
+    :param n: Number of entries to return.
+    :param key: Field name or key function giving the date (default is 'date').
+    :return: List of up to n entries, newest first; entries on the same date keep their order.
+    """
+    valid = (pair for pair in _dated(medical_history, key) if pair[0] is not None)
+    return [entry for _, entry in heapq.nlargest(n, valid, key=itemgetter(0))]
+
+
+def oldest(medical_history, n, key='date'):
+    """
+    Get the n oldest entries with a bounded heap, in O(len * log n) instead of a full sort.
+    Entries with a missing or invalid date are skipped.
+    :param medical_history: Iterable of history entries.
+    :param n: Number of entries to return.
+    :param key: Field name or key function giving the date (default is 'date').
+    :return: List of up to n entries, oldest first; entries on the same date keep their order.
+    """
+    valid = (pair for pair in _dated(medical_history, key) if pair[0] is not None)
+    return [entry for _, entry in heapq.nsmallest(n, valid, key=itemgetter(0))]
+
+
+def heap_sort_file(input_filename, output_filename, key='date', reverse=False, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """
+    Sort a JSON list of history entries that may not fit in memory (external merge sort).
+    Orders exactly like heap_sort: by parsed date, with missing or invalid dates last.
+    :param input_filename: Path of the JSON list, e.g., medical_histories.json.
+    :param output_filename: Path of the sorted output (may be the input file).
+    :param key: Field name or key function giving the date (default is 'date').
+    :param reverse: True to sort in descending order.
+    :param memory_budget: Approximate number of bytes of input JSON sorted in memory at a time.
+    :return: Number of entries sorted.
+    """
+    date_of = make_key(key)
+
+    def file_key(entry):
+        ordinal = date_ordinal(date_of(entry))
+        # Invalid dates rank last in both directions
+        return (ordinal is not None, ordinal or 0) if reverse else (ordinal is None, ordinal or 0)
+    return external_sort(input_filename, output_filename, key=file_key, reverse=reverse, memory_budget=memory_budget)
@@ -1,14 +1,17 @@
-import sys
-import os
-import json  # Import JSON module for data storage
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from heap_sort import heap_sort
+from medicalHistory.heap_sort import history_date_key, most_recent, oldest
+from medicalHistory.index import HISTORY_TERMS, HistoryIndex
+from utils.sorted_collection import SortedCollection
 from Users.Doctors import Doctor  # Import the Doctor class
 from Users.Patient import patient  # Import the Patient class
+from Users.registry import EntityRegistry
+from utils.serializer import get_serializer
+from utils.vocabulary import VOCABULARY
 
 class history:
-    def __init__(self, patient, doctor, age, diagnosis, injuries, medications, allergies):
+    # Fixed attributes instead of a per-instance __dict__ (see benchmarks/memory.py)
+    __slots__ = ("historyID", "date", "patient", "doctor", "age", "diagnosis", "injuries", "medications", "allergies")
+
+    def __init__(self, patient, doctor, age, diagnosis, injuries, medications, allergies, historyID=None, date=""):
         """
         Initialize a medical history object.
         :param patient: Patient object associated with the history.
@@ -18,7 +21,11 @@ class history:
         :param injuries: List of injuries.
         :param medications: List of medications.
         :param allergies: List of allergies.
+        :param historyID: Unique identifier for the history entry.
+        :param date: Date of the visit (YYYY-MM-DD).
         """
+        self.historyID = historyID
+        self.date = date
         self.patient = patient  # Patient object
         self.doctor = doctor  # Doctor object
         self.age = age
@@ -43,31 +50,82 @@ class history:
             "allergies": self.allergies,
         }
 
+    def to_dict(self) -> dict:
+        """
+        Get the entry in the format of medical_histories.json and the storage repositories.
+        :return: Dictionary with historyID, date, patient and doctor (by name), age, diagnosis,
+                 injuries, medications and allergies.
+        """
+        return {
+            "historyID": self.historyID,
+            "date": self.date,
+            "patient": getattr(self.patient, "Name", self.patient),
+            "doctor": getattr(self.doctor, "Name", self.doctor),
+            "age": self.age,
+            "diagnosis": self.diagnosis,
+            "injuries": self.injuries,
+            "medications": self.medications,
+            "allergies": self.allergies,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, patient=None, doctor=None):
+        """
+        Build an entry from a dictionary in the medical_histories.json format.
+        :param data: The history dictionary.
+        :param patient: Optional Patient object to use instead of the stored patient name.
+        :param doctor: Optional Doctor object to use instead of the stored doctor name.
+        :return: A history object.
+        """
+        return cls(
+            patient=patient if patient is not None else data.get("patient"),
+            doctor=doctor if doctor is not None else data.get("doctor"),
+            age=data.get("age"),
+            diagnosis=data.get("diagnosis", []),
+            injuries=data.get("injuries", []),
+            medications=data.get("medications", []),
+            allergies=data.get("allergies", []),
+            historyID=data.get("historyID"),
+            date=data.get("date", ""),
+        )
+
 
 class MedicalHistoryManager:
-    def __init__(self):
+    def __init__(self, repository=None, vocabulary=None, registry=None):
         """
         Initialize the medical history manager.
+        :param repository: Optional storage Repository new entries are saved to.
+        :param vocabulary: Vocabulary the names and clinical terms are interned in (default: the repository's,
+                           or the shared one without a repository).
+        :param registry: EntityRegistry patient and doctor IDs are resolved through
+                         (default: one of its own over the repository).
         """
         self.medical_histories = []  # List to store all medical history entries
-        self.patients = {}  # Dictionary to store Patient objects by their ID
-        self.doctors = {}  # Dictionary to store Doctor objects by their ID
+        self.patients = {}  # Patients added to this manager by ID (the registry's objects)
+        self.doctors = {}  # Doctors added to this manager by ID (the registry's objects)
+        self.repository = repository
+        self.registry = EntityRegistry(repository) if registry is None else registry
+        self.vocabulary = getattr(repository, "vocabulary", VOCABULARY) if vocabulary is None else vocabulary
+        self.index = HistoryIndex()  # Inverted index over diagnosis, injuries, medications and allergies
+        self.by_date = SortedCollection(key=history_date_key)  # Entries kept in date order
 
     def add_patient(self, patient_obj):
         """
         Add a Patient object to the manager.
-        :param patient_obj: A Patient object.
+        :param patient_obj: A Patient object; if the registry already has this PatientID, its object is used.
         """
+        patient_obj = self.registry.add_patient(patient_obj)
         self.patients[patient_obj.getPatientID()] = patient_obj
 
     def add_doctor(self, doctor_obj):
         """
         Add a Doctor object to the manager.
-        :param doctor_obj: A Doctor object.
+        :param doctor_obj: A Doctor object; if the registry already has this DoctorID, its object is used.
         """
+        doctor_obj = self.registry.add_doctor(doctor_obj)
         self.doctors[doctor_obj.DoctorID] = doctor_obj
 
-    def add_history(self, patient_id, doctor_id, age, diagnosis, injuries, medications, allergies):
+    def add_history(self, patient_id, doctor_id, age, diagnosis, injuries, medications, allergies, history_id=None, date=""):
         """
         Add a new medical history entry.
         :param patient_id: ID of the patient.
@@ -77,9 +135,11 @@ class MedicalHistoryManager:
         :param injuries: List of injuries.
         :param medications: List of medications.
         :param allergies: List of allergies.
+        :param history_id: ID of the entry (defaults to the next position).
+        :param date: Date of the visit (YYYY-MM-DD).
         """
-        patient_obj = self.patients.get(patient_id)
-        doctor_obj = self.doctors.get(doctor_id)
+        patient_obj = self.patients.get(patient_id) or self.registry.patient(patient_id)
+        doctor_obj = self.doctors.get(doctor_id) or self.registry.doctor(doctor_id)
 
         if not patient_obj or not doctor_obj:
             print(f"Patient ID: {patient_id}, Doctor ID: {doctor_id}")
@@ -93,17 +153,36 @@ class MedicalHistoryManager:
             injuries=injuries,
             medications=medications,
             allergies=allergies,
+            historyID=history_id or str(len(self.medical_histories) + 1),
+            date=date,
         )
+        self._intern(new_history)
         self.medical_histories.append(new_history)
+        self.index.add(new_history.historyID, new_history)
+        self.by_date.add(new_history)
+        self._persist(new_history)
+
+    def _intern(self, entry):
+        intern = self.vocabulary.intern
+        for name in HISTORY_TERMS:
+            setattr(entry, name, intern(getattr(entry, name)))
 
-    def save_to_json(self, filename):
+    def _persist(self, entry):
+        # Repositories store histories in the same shape as medical_histories.json
+        if self.repository is None:
+            return
+        self.repository.save_history(entry.to_dict())
+
+    def save_to_json(self, filename, serializer=None):
         """
         Save all data (patients, doctors, and medical histories) to a JSON file.
         :param filename: The name of the JSON file.
+        :param serializer: Serializer to write with (default: utils.serializer.get_serializer()).
         """
+        serializer = get_serializer() if serializer is None else serializer
         data = {
-            "patients": {pid: vars(patient) for pid, patient in self.patients.items()},
-            "doctors": {did: vars(doctor) for did, doctor in self.doctors.items()},
+            "patients": {pid: patient.to_dict() for pid, patient in self.patients.items()},
+            "doctors": {did: doctor.to_dict() for did, doctor in self.doctors.items()},
             "medical_histories": [
                 {
                     "patient_id": history.patient.getPatientID(),
@@ -117,25 +196,27 @@ class MedicalHistoryManager:
                 for history in self.medical_histories
             ],
         }
-        with open(filename, "w") as file:
-            json.dump(data, file, indent=4)
+        with open(filename, "wb") as file:
+            serializer.dump(data, file)
 
-    def load_from_json(self, filename):
+    def load_from_json(self, filename, serializer=None):
         """
         Load all data (patients, doctors, and medical histories) from a JSON file.
         :param filename: The name of the JSON file.
+        :param serializer: Serializer to read with (default: utils.serializer.get_serializer()).
         """
+        serializer = get_serializer() if serializer is None else serializer
         try:
-            with open(filename, "r") as file:
-                data = json.load(file)
+            with open(filename, "rb") as file:
+                data = serializer.load(file)
 
             # Load patients
             for pid, patient_data in data["patients"].items():
-                self.patients[pid] = patient(**patient_data)
+                self.patients[pid] = self.registry.add_patient(patient.from_dict(patient_data))
 
             # Load doctors
             for did, doctor_data in data["doctors"].items():
-                self.doctors[did] = Doctor(**doctor_data)
+                self.doctors[did] = self.registry.add_doctor(Doctor.from_dict(doctor_data))
 
             # Load medical histories
             for history_data in data["medical_histories"]:
@@ -150,11 +231,76 @@ class MedicalHistoryManager:
                         injuries=history_data["injuries"],
                         medications=history_data["medications"],
                         allergies=history_data["allergies"],
+                        historyID=str(len(self.medical_histories) + 1),
                     )
+                    self._intern(new_history)
                     self.medical_histories.append(new_history)
+                    self.index.add(new_history.historyID, new_history)
+                    self.by_date.add(new_history)
         except FileNotFoundError:
             print(f"File {filename} not found. Starting with empty data.")
 
+    def update_history(self, history_id, **fields):
+        """
+        Update fields of a medical history entry and re-index it.
+        :param history_id: ID of the entry.
+        :param fields: New values, e.g., medications=["Ibuprofen"].
+        :return: True if the entry was found and updated, False otherwise.
+        """
+        entry = self.index.entries.get(history_id)
+        if entry is None:
+            return False
+        for name, value in fields.items():
+            setattr(entry, name, value)
+        self._intern(entry)
+        self.index.update(history_id, entry)
+        self.by_date.update(entry)
+        self._persist(entry)
+        return True
+
+    def search(self, terms, match_all=True, field=None):
+        """
+        Find medical history entries by diagnosis, injury, medication or allergy terms.
+        :param terms: List of terms (case-insensitive), e.g., ["penicillin"].
+        :param match_all: True to require every term (AND), False for any term (OR).
+        :param field: Optional field to search ('diagnosis', 'injuries', 'medications' or 'allergies').
+        :return: List of matching history objects.
+        """
+        if match_all:
+            return self.index.search_all(terms, field)
+        return self.index.search_any(terms, field)
+
+    def histories_by_date(self):
+        """
+        Get all medical history entries ordered by date, without sorting them.
+        :return: List of history objects; entries without a valid date come last.
+        """
+        return list(self.by_date)
+
+    def most_recent(self, n, patient=None):
+        """
+        Get the most recent medical history entries without sorting all of them.
+        :param n: Number of entries to return.
+        :param patient: Optional Patient object or name to restrict the entries to.
+        :return: List of up to n history objects, newest first (entries without a valid date are skipped).
+        """
+        return most_recent(self._entries_for(patient), n)
+
+    def oldest(self, n, patient=None):
+        """
+        Get the oldest medical history entries without sorting all of them.
+        :param n: Number of entries to return.
+        :param patient: Optional Patient object or name to restrict the entries to.
+        :return: List of up to n history objects, oldest first (entries without a valid date are skipped).
+        """
+        return oldest(self._entries_for(patient), n)
+
+    def _entries_for(self, patient):
+        if patient is None:
+            return self.medical_histories
+        name = getattr(patient, "Name", patient)
+        return (entry for entry in self.medical_histories if getattr(entry.patient, "Name", entry.patient) == name)
+
     def view_histories(self):
         """
         View all medical history entries.
@@ -174,39 +320,3 @@ class MedicalHistoryManager:
                 f"Medications: {summary['medications']}"
             )
         return "\n".join(histories)
-
-
-# Example usage of the MedicalHistoryManager
-manager = MedicalHistoryManager()
-
-# Load data from JSON
-manager.load_from_json("medical_data.json")
-
-# Add medical history entries
-manager.add_history(
-    patient_id=1,
-    doctor_id=1,
-    age=30,
-    diagnosis=["Flu"],
-    injuries=[],
-    medications=["Paracetamol"],
-    allergies=["Penicillin"]
-)
-
-manager.add_history(
-    patient_id=2,
-    doctor_id=2,
-    age=25,
-    diagnosis=["Fracture"],
-    injuries=["Arm fracture"],
-    medications=["Ibuprofen"],
-    allergies=[]
-)
-
-# Save data to JSON
-manager.save_to_json("medical_data.json")
-
-# View unsorted histories
-print("Unsorted Histories:")
-print(manager.view_histories())
-
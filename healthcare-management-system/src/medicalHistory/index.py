@@ -0,0 +1,130 @@
+HISTORY_FIELDS = ("diagnosis", "injuries", "medications", "allergies")
+# Fields whose values repeat across entries, interned or dictionary-encoded (see utils.vocabulary)
+HISTORY_TERMS = ("patient", "doctor") + HISTORY_FIELDS
+
+
+def normalize_term(term):
+    """
+    Normalize a clinical term for indexing and lookup (case and surrounding whitespace are ignored).
+    """
+    return str(term).strip().lower()
+
+
+def _field_values(entry, field):
+    # Entries are either history dictionaries (main.py, repositories) or history objects
+    if isinstance(entry, dict):
+        return entry.get(field) or []
+    return getattr(entry, field, None) or []
+
+
+class HistoryIndex:
+    def __init__(self):
+        """
+        Inverted index from normalized terms to medical history IDs.
+        Covers the diagnosis, injuries, medications and allergies of each entry and is kept
+        up to date incrementally with add, update and remove.
+        """
+        self.entries = {}  # historyID -> entry
+        self._postings = {field: {} for field in HISTORY_FIELDS}  # field -> term -> set of historyIDs
+        self._terms_of = {}  # historyID -> list of (field, term), to unindex on update
+        self._sequence = {}  # historyID -> position it was first added at, kept on update
+        self._added = 0  # Entries added so far, the next position
+
+    def add(self, history_id, entry):
+        """
+        Index an entry. An entry already indexed under the same ID is replaced.
+        :param history_id: The historyID.
+        :param entry: History dictionary or history object.
+        """
+        sequence = self._sequence.get(history_id)
+        if sequence is None:
+            sequence, self._added = self._added, self._added + 1
+        else:
+            self.remove(history_id)
+        self._sequence[history_id] = sequence
+        terms = []
+        for field in HISTORY_FIELDS:
+            postings = self._postings[field]
+            for value in _field_values(entry, field):
+                term = normalize_term(value)
+                if term:
+                    postings.setdefault(term, set()).add(history_id)
+                    terms.append((field, term))
+        self.entries[history_id] = entry
+        self._terms_of[history_id] = terms
+
+    def update(self, history_id, entry):
+        """
+        Re-index an entry after its fields changed.
+        :param history_id: The historyID.
+        :param entry: History dictionary or history object.
+        """
+        self.add(history_id, entry)
+
+    def remove(self, history_id):
+        """
+        Remove an entry from the index.
+        :param history_id: The historyID.
+        """
+        for field, term in self._terms_of.pop(history_id, []):
+            ids = self._postings[field].get(term)
+            if ids is not None:
+                ids.discard(history_id)
+                if not ids:
+                    del self._postings[field][term]
+        self.entries.pop(history_id, None)
+        self._sequence.pop(history_id, None)
+
+    def ids_for(self, term, field=None):
+        """
+        Get the IDs of the entries containing a term.
+        :param term: The term to look up.
+        :param field: Optional field to restrict the lookup to (e.g., 'allergies').
+        :return: Set of historyIDs.
+        """
+        return set(self._lookup(term, field))
+
+    def _lookup(self, term, field):
+        # May return the posting set itself; callers must not modify it
+        term = normalize_term(term)
+        if field is not None:
+            return self._postings[field].get(term, set())
+        ids = set()
+        for postings in self._postings.values():
+            ids.update(postings.get(term, ()))
+        return ids
+
+    def search_all(self, terms, field=None):
+        """
+        Get the entries containing every term (AND).
+        Intersection starts from the rarest term, so the cost follows the size of the smallest posting list.
+        :param terms: List of terms.
+        :param field: Optional field to restrict the search to.
+        :return: List of matching entries, in the order they were added.
+        """
+        id_sets = sorted((self._lookup(term, field) for term in terms), key=len)
+        if not id_sets:
+            return []
+        ids = id_sets[0]
+        for other in id_sets[1:]:
+            ids = ids & other  # Iterates over the smaller set
+            if not ids:
+                break
+        return self._in_order(ids)
+
+    def search_any(self, terms, field=None):
+        """
+        Get the entries containing at least one of the terms (OR).
+        :param terms: List of terms.
+        :param field: Optional field to restrict the search to.
+        :return: List of matching entries, in the order they were added.
+        """
+        ids = set()
+        for term in terms:
+            ids.update(self._lookup(term, field))
+        return self._in_order(ids)
+
+    def _in_order(self, ids):
+        # Sets iterate in hash order; sort the matches by when their entries were added instead
+        sequence = self._sequence
+        return [self.entries[history_id] for history_id in sorted(ids, key=sequence.__getitem__)]
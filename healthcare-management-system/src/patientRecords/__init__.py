@@ -1,8 +1 @@
-def quick_sort(patient_records):
-    if len(patient_records) <= 1:
-        return patient_records
-    pivot = patient_records[len(patient_records) // 2]
-    left = [x for x in patient_records if x < pivot]
-    middle = [x for x in patient_records if x == pivot]
-    right = [x for x in patient_records if x > pivot]
-    return quick_sort(left) + middle + quick_sort(right)
\ No newline at end of file
+from patientRecords.quick_sort import quick_sort
@@ -1,7 +1,27 @@
 from patientRecords.quick_sort import quick_sort
 from Users.Doctors import Doctor
+from Users.registry import EntityRegistry
+from utils.sorted_collection import SortedCollection
+from utils.vocabulary import VOCABULARY
+
+RECORD_FIELDS = ("recordID", "Date", "Time", "Doctor", "Patient", "Symptoms", "Diagnosis", "Treatment",
+                 "Medication", "results", "notes")
+# Fields whose values repeat across records, interned or dictionary-encoded (see utils.vocabulary)
+RECORD_TERMS = ("Patient", "Symptoms", "Diagnosis", "Treatment", "Medication", "results")
+
+
+def record_date_key(record):
+    """
+    Sort key ordering records by date; a missing (None) date sorts like an empty one, first.
+    """
+    date = record.Date
+    return "" if date is None else str(date)
+
 
 class Record:
+    # Fixed attributes instead of a per-instance __dict__ (see benchmarks/memory.py)
+    __slots__ = RECORD_FIELDS
+
     def __init__(self, recordID, Date, Time, Doctor, Patient, Symptoms, Diagnosis, Treatment, Medication, results, notes):
         """
         Initialize a patient record.
@@ -34,68 +54,236 @@ class Record:
         Get a summary of the record.
         :return: Dictionary containing the record details.
         """
-        return {
-            "recordID": self.recordID,
-            "Date": self.Date,
-            "Time": self.Time,
-            "Doctor": self.Doctor,
-            "Patient": self.Patient,
-            "Symptoms": self.Symptoms,
-            "Diagnosis": self.Diagnosis,
-            "Treatment": self.Treatment,
-            "Medication": self.Medication,
-            "results": self.results,
-            "notes": self.notes,
-        }
+        return {name: getattr(self, name) for name in RECORD_FIELDS}
+
+    def to_dict(self) -> dict:
+        """
+        Get the record in the format of patient_records.json and the storage repositories.
+        :return: Dictionary of the record fields, with the Doctor replaced by its DoctorID.
+        """
+        data = self.get_summary()
+        if hasattr(self.Doctor, 'DoctorID'):
+            data['Doctor'] = self.Doctor.DoctorID
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict, doctors=None):
+        """
+        Build a record from a dictionary, e.g., one returned by to_dict.
+        :param data: The record dictionary; missing fields are left empty and other keys are ignored.
+        :param doctors: Optional dictionary of Doctor objects by ID, to resolve a stored DoctorID.
+        :return: A Record object.
+        """
+        record = cls(*(data.get(name, "") for name in RECORD_FIELDS))
+        if doctors is not None and isinstance(record.Doctor, int):
+            record.Doctor = doctors.get(record.Doctor)
+        return record
+
+    def update(self, fields):
+        """
+        Change several fields at once.
+        :param fields: Dictionary of field names to new values.
+        """
+        for name, value in fields.items():
+            self[name] = value
+
+    # Dictionary-style access, for code written against the records as dictionaries
+    def __getitem__(self, name):
+        if name not in RECORD_FIELDS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __setitem__(self, name, value):
+        if name not in RECORD_FIELDS:
+            raise KeyError(name)
+        setattr(self, name, value)
+
+    def __contains__(self, name):
+        return name in RECORD_FIELDS
+
+    def get(self, name, default=None):
+        return getattr(self, name, default) if name in RECORD_FIELDS else default
 
 class PatientRecordManager:
-    def __init__(self):
+    def __init__(self, repository=None, vocabulary=None, registry=None):
         """
         Initialize the patient record manager.
+        :param repository: Optional storage Repository the records are loaded from and saved to.
+        :param vocabulary: Vocabulary the values of RECORD_TERMS are interned in (default: the repository's,
+                           or the shared one without a repository).
+        :param registry: EntityRegistry DoctorIDs are resolved through (default: one of its own over the repository).
         """
-        self.records = []  # List to store all patient records
-        self.doctors = {}  # Dictionary to store Doctor objects by their ID
+        self.records = []  # List to store all patient records (Record objects)
+        self.doctors = {}  # Doctors added to this manager by ID (the registry's objects)
+        self.repository = repository
+        self.registry = EntityRegistry(repository) if registry is None else registry
+        self.vocabulary = getattr(repository, "vocabulary", VOCABULARY) if vocabulary is None else vocabulary
+        self._by_id = {}  # recordID -> record
+        self._by_patient = {}  # Patient -> {recordID: record}, in the order the records were added
+        self._by_date = SortedCollection(key=record_date_key)  # Records by date, for range queries
 
     def add_doctor(self, doctor):
         """
         Add a Doctor object to the manager.
-        :param doctor: A Doctor object.
+        :param doctor: A Doctor object; if the registry already has this DoctorID, its object is used.
         """
+        doctor = self.registry.add_doctor(doctor)
         self.doctors[doctor.DoctorID] = doctor
 
     def add_record(self, record):
         """
         Add a new patient record.
-        :param record: A dictionary representing the patient record.
+        :param record: A Record object, or a dictionary representing the patient record.
+        :return: The added Record.
         """
+        if not isinstance(record, Record):
+            record = Record.from_dict(record)
         # Ensure the Doctor field is a Doctor object
-        if isinstance(record['Doctor'], int):  # If Doctor is an ID, fetch the Doctor object
-            record['Doctor'] = self.doctors.get(record['Doctor'])
-        self.records.append(record)
+        if isinstance(record.Doctor, int):  # If Doctor is an ID, fetch the Doctor object
+            record.Doctor = self._doctor(record.Doctor)
+        self._intern(record)
+        existing = self._by_id.get(record.recordID)
+        if existing is None:
+            self.records.append(record)
+        else:
+            # The same recordID again replaces the record, in place
+            self._unindex(existing)
+            self.records[self._position(existing)] = record
+        self._index(record)
+        self._persist(record)
+        return record
+
+    def load_records(self):
+        """
+        Load all records from the repository.
+        Stored DoctorIDs are resolved to Doctor objects through the registry.
+        """
+        self.records = []
+        self._by_id, self._by_patient = {}, {}
+        for data in self.repository.list_records():
+            record = Record.from_dict(data)
+            if isinstance(record.Doctor, int):
+                record.Doctor = self._doctor(record.Doctor)
+            self._intern(record)
+            existing = self._by_id.get(record.recordID)
+            if existing is None:
+                self.records.append(record)
+            else:
+                self._unindex(existing)  # The date index is built below
+                self.records[self._position(existing)] = record
+            self._by_id[record.recordID] = record
+            self._by_patient.setdefault(record.Patient, {})[record.recordID] = record
+        # Build the date index with one sort instead of one insertion per record
+        self._by_date = SortedCollection(self.records, key=record_date_key)
 
     def update_record(self, recordID, updated_record):
         """
         Update an existing patient record.
         :param recordID: The ID of the record to update.
-        :param updated_record: The updated record data.
+        :param updated_record: Dictionary of the fields to change.
         :return: True if the update was successful, False otherwise.
         """
-        for record in self.records:
-            if record['recordID'] == recordID:
-                # Ensure the Doctor field is a Doctor object
-                if 'Doctor' in updated_record and isinstance(updated_record['Doctor'], int):
-                    updated_record['Doctor'] = self.doctors.get(updated_record['Doctor'])
-                record.update(updated_record)
-                return True
-        return False
+        record = self._by_id.get(recordID)
+        if record is None:
+            return False
+        # Ensure the Doctor field is a Doctor object
+        if 'Doctor' in updated_record and isinstance(updated_record['Doctor'], int):
+            updated_record['Doctor'] = self._doctor(updated_record['Doctor'])
+        self._unindex(record)
+        record.update(updated_record)
+        self._intern(record)
+        self._index(record)
+        self._persist(record)
+        return True
+
+    def get(self, recordID):
+        """
+        Get a record by ID.
+        :param recordID: The ID of the record.
+        :return: The Record, or None if not found.
+        """
+        return self._by_id.get(recordID)
+
+    def for_patient(self, patient):
+        """
+        Get all records of a patient.
+        :param patient: The patient, as stored in the records' 'Patient' field.
+        :return: List of Records in the order they were added.
+        """
+        return list(self._by_patient.get(patient, {}).values())
+
+    def between(self, start, end):
+        """
+        Get the records dated within a range, using binary search on the date index.
+        :param start: First date of the range (YYYY-MM-DD), inclusive.
+        :param end: Last date of the range (YYYY-MM-DD), inclusive.
+        :return: List of Records ordered by date.
+        """
+        return list(self._by_date.irange(start, end))
+
+    def where(self, field, value):
+        """
+        Get the records whose field equals a value, e.g., where('Diagnosis', 'asthma').
+        Values of RECORD_TERMS fields are interned, so a value missing from the vocabulary matches
+        nothing without a scan (unless the vocabulary is full and stopped interning).
+        :param field: Name of a record field.
+        :param value: The value to look for.
+        :return: List of matching Records, in the order of self.records.
+        """
+        if field in RECORD_TERMS:
+            canonical = self.vocabulary.canonical(value)
+            if canonical is None and not self.vocabulary.full:
+                return []
+            value = value if canonical is None else canonical
+        return [record for record in self.records if record[field] == value]
+
+    def _doctor(self, doctor_id):
+        return self.doctors.get(doctor_id) or self.registry.doctor(doctor_id)
+
+    def _intern(self, record):
+        intern = self.vocabulary.intern
+        for name in RECORD_TERMS:
+            setattr(record, name, intern(getattr(record, name)))
+
+    def _index(self, record):
+        self._by_id[record.recordID] = record
+        self._by_patient.setdefault(record.Patient, {})[record.recordID] = record
+        self._by_date.add(record)
+
+    def _unindex(self, record):
+        self._by_id.pop(record.recordID, None)
+        patient_records = self._by_patient.get(record.Patient)
+        if patient_records is not None and patient_records.get(record.recordID) is record:
+            del patient_records[record.recordID]
+            if not patient_records:
+                del self._by_patient[record.Patient]
+        self._by_date.discard(record)  # Found by identity, whatever its date is now
+
+    def _position(self, record):
+        # Position of a record object in self.records (compared by identity)
+        return next(position for position, candidate in enumerate(self.records) if candidate is record)
+
+    def _persist(self, record):
+        # Records are stored with the DoctorID instead of the Doctor object
+        if self.repository is None:
+            return
+        self.repository.save_record(record.to_dict())
 
-    def sort_records(self, key=lambda x: x['Date']):
+    def sort_records(self, key='Date', reverse=False, parallel=False, workers=None):
         """
         Sort all patient records using Quick Sort.
-        :param key: Key function to sort by (default is 'Date').
-        :return: Sorted list of patient records.
+        :param key: Key function, field name, or list of them to sort by (default is 'Date').
+        :param reverse: True to sort in descending order.
+        :param parallel: True to sort large record sets in worker processes (see utils.parallel_sort);
+                         below PARALLEL_THRESHOLD records the serial sort is used anyway.
+        :param workers: Number of worker processes (default: the number of CPUs).
+        :return: Sorted list of patient records (Record objects).
         """
-        self.records = quick_sort(self.records, key)
+        if parallel:
+            from utils.parallel_sort import parallel_sort_items
+            self.records = parallel_sort_items(self.records, key=key, reverse=reverse, workers=workers, strategy="quick")
+        else:
+            self.records = quick_sort(self.records, key, reverse)
         return self.records
 
     def view_records(self):
@@ -109,9 +297,9 @@ class PatientRecordManager:
         records_summary = []
         for record in self.records:
             records_summary.append(
-                f"Record ID: {record['recordID']}, "
-                f"Date: {record['Date']}, "
-                f"Patient: {record['Patient']}, "
-                f"Doctor: {record['Doctor'].Name}"  # Access the Doctor's name
+                f"Record ID: {record.recordID}, "
+                f"Date: {record.Date}, "
+                f"Patient: {record.Patient}, "
+                f"Doctor: {record.Doctor.Name}"  # Access the Doctor's name
             )
         return "\n".join(records_summary)
\ No newline at end of file
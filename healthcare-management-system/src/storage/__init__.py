@@ -0,0 +1,32 @@
+import os
+
+from storage.repository import Repository, JsonRepository
+
+
+def open_repository(project_root, backend=None):
+    """
+    Open the repository used by the application.
+    :param project_root: Directory holding the data files.
+    :param backend: 'json' or 'sqlite'; defaults to the MEDITRACK_STORAGE environment variable, then 'json'.
+    :return: A Repository. A new SQLite database is seeded from the JSON files on first use.
+             With MEDITRACK_ENCODE_TERMS=1 the JSON files are written dictionary-encoded.
+             The JSON backend and mode are read from MEDITRACK_JSON_BACKEND and MEDITRACK_JSON_MODE
+             (see utils.serializer).
+    """
+    backend = backend or os.environ.get("MEDITRACK_STORAGE", "json")
+    if backend == "sqlite":
+        from storage.importer import copy_repository
+        from storage.sqlite_repository import SQLiteRepository
+
+        database = os.path.join(project_root, "meditrack.db")
+        is_new = not os.path.exists(database)
+        repository = SQLiteRepository(database)
+        if is_new:
+            copy_repository(JsonRepository(project_root), repository)
+        return repository
+    if backend == "json":
+        return JsonRepository(project_root, encode_terms=os.environ.get("MEDITRACK_ENCODE_TERMS") == "1")
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+__all__ = ['Repository', 'JsonRepository', 'open_repository']
@@ -0,0 +1,80 @@
+"""
+Archival of past dates in doctor schedules.
+
+Stored dates before a cutoff (by default today) are moved out of the live schedule into one
+compressed archive per doctor and year, so the doctor files (or rows) only hold the current
+booking horizon and saving a schedule costs the same year over year. Archived dates stay
+available through archived_day() and Repository.archived_days().
+
+Usage (from src):
+    python -m storage.archive [--before YYYY-MM-DD] [--root DIR] [--storage json|sqlite]
+"""
+import argparse
+import os
+from datetime import date
+
+
+def archive_doctor(repository, doctor, before=None):
+    """
+    Move a doctor's stored dates before a cutoff into the per-year archives and save the doctor.
+    This runs through Repository.update_schedule, like a booking: the doctor is locked and reloaded
+    first, so hours booked by other processes in the meantime are kept. The archives are written
+    before the doctor, so an interrupted run leaves the dates in both places and can simply be repeated.
+    :param repository: The storage Repository.
+    :param doctor: A Doctor object.
+    :param before: First date to keep in the live schedule (YYYY-MM-DD, default: today).
+    :return: Number of archived dates.
+    """
+    before = before or date.today().isoformat()
+    removed = {}
+
+    def change():
+        removed.update(doctor.archiveBefore(before))
+        by_year = {}
+        for date_key, hours in removed.items():
+            by_year.setdefault(int(date_key[:4]), {})[date_key] = hours
+        for year, days in by_year.items():
+            archived = repository.archived_days(doctor.DoctorID, year)
+            archived.update(days)
+            repository.save_archived_days(doctor.DoctorID, year, archived)
+        return [], []  # No appointments change; the doctor is saved
+
+    repository.update_schedule([doctor], change)
+    return len(removed)
+
+
+def archive_schedules(repository, before=None):
+    """
+    Archive the past dates of every doctor (the compaction job).
+    :param repository: The storage Repository.
+    :param before: First date to keep in the live schedules (YYYY-MM-DD, default: today).
+    :return: Dictionary of DoctorID to the number of archived dates.
+    """
+    with repository.batch():
+        return {doctor.DoctorID: archive_doctor(repository, doctor, before) for doctor in repository.list_doctors()}
+
+
+def archived_day(repository, doctor_id, date_key):
+    """
+    Look up an archived date of a doctor's schedule.
+    :param repository: The storage Repository.
+    :param doctor_id: The DoctorID.
+    :param date_key: The date (YYYY-MM-DD).
+    :return: [[hours_working], [hours_booked]], or None if the date is not archived.
+    """
+    return repository.archived_days(doctor_id, int(date_key[:4])).get(date_key)
+
+
+if __name__ == "__main__":
+    from storage import open_repository
+
+    default_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+    parser = argparse.ArgumentParser(description="Move past dates of the doctor schedules into per-year archives.")
+    parser.add_argument("--before", default=None, help="First date to keep (YYYY-MM-DD, default: today).")
+    parser.add_argument("--root", default=default_root, help="Directory containing the data files.")
+    parser.add_argument("--storage", choices=["json", "sqlite"], default=None,
+                        help="Storage backend (default: MEDITRACK_STORAGE, then json).")
+    args = parser.parse_args()
+    counts = archive_schedules(open_repository(args.root, args.storage), args.before)
+    for doctor_id, count in counts.items():
+        print(f"Doctor {doctor_id}: {count} dates archived")
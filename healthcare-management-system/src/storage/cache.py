@@ -0,0 +1,93 @@
+import os
+
+
+def file_signature(path):
+    """
+    Get a cheap change marker for a file.
+    :param path: Path of the file.
+    :return: (mtime_ns, size) or None if the file does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class DataCache:
+    def __init__(self):
+        """
+        Cache of loaded data files, shared by everything in the process.
+        An entry is reused until the modification time or size of one of its files changes,
+        e.g., because another process wrote to it.
+        """
+        self.entries = {}  # key -> (signature, value, paths)
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def get(self, key, loader, paths=None):
+        """
+        Get the cached value for a file, loading it on first use or when the file changed.
+        :param key: Cache key, usually the path of the main file.
+        :param loader: Function called with no arguments to (re)load the value.
+        :param paths: Files whose changes invalidate the entry (default: [key]).
+        :return: The cached or freshly loaded value.
+        """
+        paths = paths or [key]
+        signature = tuple(file_signature(path) for path in paths)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            return entry[1]
+        if entry is None:
+            self.misses += 1
+        else:
+            self.reloads += 1
+        value = loader()
+        # Loaders may write the file back (e.g., after a migration)
+        self.entries[key] = (tuple(file_signature(path) for path in paths), value, paths)
+        return value
+
+    def put(self, key, value, writer=None, paths=None):
+        """
+        Write a value through the cache.
+        :param key: Cache key, usually the path of the main file.
+        :param value: The value to cache.
+        :param writer: Function called with no arguments to write the value to disk.
+        :param paths: Files whose changes invalidate the entry (default: [key]).
+        """
+        if writer is not None:
+            writer()
+        paths = paths or [key]
+        self.entries[key] = (tuple(file_signature(path) for path in paths), value, paths)
+
+    def refresh(self, key):
+        """
+        Record the current state of an entry's files after the cached value was written in place.
+        :param key: Cache key.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries[key] = (tuple(file_signature(path) for path in entry[2]), entry[1], entry[2])
+
+    def invalidate(self, key=None):
+        """
+        Drop one entry, or every entry when no key is given.
+        :param key: Cache key.
+        """
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key, None)
+
+    def stats(self):
+        """
+        Get the cache counters.
+        :return: Dictionary with hits, misses, reloads and the number of entries.
+        """
+        return {"hits": self.hits, "misses": self.misses, "reloads": self.reloads, "entries": len(self.entries)}
+
+
+# Process-wide cache used by the JSON repository
+data_cache = DataCache()
@@ -0,0 +1,67 @@
+import argparse
+import os
+
+from storage.repository import JsonRepository
+from storage.sqlite_repository import SQLiteRepository
+
+
+def copy_repository(source, target):
+    """
+    Copy every doctor (with their archived dates), patient, appointment, history and record from one repository into another.
+    The copy is written as one batch (a single transaction for SQLite).
+    :param source: Repository to read from.
+    :param target: Repository to write to.
+    :return: Dictionary with the number of copied entities per kind.
+    """
+    with target.batch():
+        return _copy(source, target)
+
+
+def _copy(source, target):
+    doctors = source.list_doctors()
+    for doctor in doctors:
+        target.save_doctor(doctor)
+        for year in source.archived_years(doctor.DoctorID):
+            target.save_archived_days(doctor.DoctorID, year, source.archived_days(doctor.DoctorID, year))
+    patients = source.list_patients()
+    for patient in patients:
+        target.save_patient(patient)
+    appointments = source.list_appointments()
+    for appointment in appointments:
+        target.save_appointment(appointment)
+    histories = source.list_histories()
+    target.save_histories(histories)
+    records = source.list_records()
+    for record in records:
+        target.save_record(record)
+    return {
+        "doctors": len(doctors),
+        "patients": len(patients),
+        "appointments": len(appointments),
+        "histories": len(histories),
+        "records": len(records),
+    }
+
+
+def import_json(project_root, database):
+    """
+    One-shot import of the JSON files in the project root into a SQLite database.
+    :param project_root: Directory containing the JSON files.
+    :param database: Path of the SQLite database file.
+    :return: Dictionary with the number of imported entities per kind.
+    """
+    target = SQLiteRepository(database)
+    try:
+        return copy_repository(JsonRepository(project_root), target)
+    finally:
+        target.close()
+
+
+if __name__ == "__main__":
+    default_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+    parser = argparse.ArgumentParser(description="Import the JSON data files into a SQLite database.")
+    parser.add_argument("--root", default=default_root, help="Directory containing the JSON files.")
+    parser.add_argument("--database", default=None, help="SQLite database (default: <root>/meditrack.db).")
+    args = parser.parse_args()
+    counts = import_json(args.root, args.database or os.path.join(args.root, "meditrack.db"))
+    print(", ".join(f"{kind}: {count}" for kind, count in counts.items()))
@@ -0,0 +1,958 @@
+import glob
+import gzip
+import os
+from contextlib import ExitStack, nullcontext
+
+from Users.Doctors import Doctor
+from Users.Patient import patient
+from medicalHistory.heap_sort import history_date_key
+from medicalHistory.index import HISTORY_TERMS, HistoryIndex
+from patientRecords.record import RECORD_TERMS
+from storage.cache import data_cache
+from storage.unit_of_work import UnitOfWork
+from utils.atomic import atomic_write
+from utils.journal import JournalStore
+from utils.locking import FileLock
+from utils.serializer import get_serializer
+from utils.sorted_collection import SortedCollection
+from utils.vocabulary import Vocabulary, decode_rows, encode_rows, is_encoded
+
+# Fields of appointments.json whose values repeat across entries (see utils.vocabulary)
+APPOINTMENT_TERMS = ("patient", "doctorName", "day")
+# Appointment IDs a JSON repository reserves at a time; the ones left unused when it closes are skipped
+APPOINTMENT_ID_BLOCK = 32
+
+
+class Repository:
+    """
+    Storage interface used by the menus in main.py and by the manager classes.
+    Appointments, histories and records are exchanged as dictionaries in the same shape as
+    the JSON files (appointments.json, medical_histories.json); doctors are Doctor objects and
+    patients are patient objects. Patient records store their doctor as a DoctorID.
+    Every repository has a `vocabulary` (utils.vocabulary.Vocabulary) that the managers working
+    on it intern their names and clinical terms in.
+    """
+
+    # Doctors
+    def get_doctor(self, doctor_id):
+        """
+        Get a doctor by ID.
+        :param doctor_id: The DoctorID.
+        :return: A Doctor object or None if not found.
+        """
+        raise NotImplementedError
+
+    def list_doctors(self):
+        """
+        Get all doctors.
+        :return: List of Doctor objects.
+        """
+        raise NotImplementedError
+
+    def doctor_names(self):
+        """
+        Get the ID and name of every doctor without loading their schedules, e.g., for a menu.
+        :return: Dictionary of DoctorID to name, ordered by DoctorID.
+        """
+        raise NotImplementedError
+
+    def save_doctor(self, doctor):
+        """
+        Save a doctor and their schedule.
+        Dates that add nothing to the weekly hours are dropped first (see Doctor.pruneDates).
+        :param doctor: A Doctor object.
+        """
+        raise NotImplementedError
+
+    def archived_years(self, doctor_id):
+        """
+        Get the years with archived schedule dates (see storage.archive).
+        :param doctor_id: The DoctorID.
+        :return: Ascending list of years (integers).
+        """
+        raise NotImplementedError
+
+    def archived_days(self, doctor_id, year):
+        """
+        Get the archived schedule dates of one year.
+        :param doctor_id: The DoctorID.
+        :param year: The year (integer).
+        :return: Dictionary of dates (YYYY-MM-DD) to [[hours_working], [hours_booked]]; empty if none.
+        """
+        raise NotImplementedError
+
+    def save_archived_days(self, doctor_id, year, days):
+        """
+        Replace the archived schedule dates of one year.
+        :param doctor_id: The DoctorID.
+        :param year: The year (integer).
+        :param days: Dictionary of dates (YYYY-MM-DD) to [[hours_working], [hours_booked]].
+        """
+        raise NotImplementedError
+
+    def release_doctor(self, doctor_id):
+        """
+        Drop any copy of a doctor the repository keeps cached (the EntityRegistry evicted them).
+        :param doctor_id: The DoctorID.
+        """
+
+    # Patients
+    def get_patient(self, patient_id):
+        """
+        Get a patient by ID.
+        :param patient_id: The PatientID.
+        :return: A patient object or None if not found.
+        """
+        raise NotImplementedError
+
+    def list_patients(self):
+        """
+        Get all patients.
+        :return: List of patient objects.
+        """
+        raise NotImplementedError
+
+    def save_patient(self, patient):
+        """
+        Insert or replace a patient.
+        :param patient: A patient object.
+        """
+        raise NotImplementedError
+
+    # Appointments
+    def get_appointment(self, appointment_id):
+        """
+        Get an appointment by ID.
+        :param appointment_id: The appointmentID.
+        :return: The appointment dictionary or None if not found.
+        """
+        raise NotImplementedError
+
+    def list_appointments(self):
+        """
+        Get all appointments.
+        :return: List of appointment dictionaries.
+        """
+        raise NotImplementedError
+
+    def appointments_by_date(self):
+        """
+        Get all appointments ordered by date, then time.
+        :return: List of appointment dictionaries.
+        """
+        raise NotImplementedError
+
+    def appointments_on(self, date):
+        """
+        Get the appointments on a date.
+        :param date: The date (YYYY-MM-DD).
+        :return: List of appointment dictionaries.
+        """
+        raise NotImplementedError
+
+    def appointments_for_doctor(self, doctor_id):
+        """
+        Get the appointments of a doctor.
+        :param doctor_id: The DoctorID.
+        :return: List of appointment dictionaries.
+        """
+        raise NotImplementedError
+
+    def appointments_for_patient(self, patient):
+        """
+        Get the appointments of a patient.
+        :param patient: The patient name.
+        :return: List of appointment dictionaries.
+        """
+        raise NotImplementedError
+
+    def save_appointment(self, appointment):
+        """
+        Insert or replace an appointment.
+        :param appointment: The appointment dictionary (must contain 'appointmentID').
+        """
+        raise NotImplementedError
+
+    def delete_appointment(self, appointment_id):
+        """
+        Delete an appointment.
+        :param appointment_id: The appointmentID.
+        """
+        raise NotImplementedError
+
+    def save_appointments(self, saved=(), deleted=(), doctors=()):
+        """
+        Persist a batch of appointment changes with a single write per file (or one transaction).
+        :param saved: Appointment dictionaries to insert or replace.
+        :param deleted: appointmentIDs to delete.
+        :param doctors: Doctor objects whose schedules changed.
+        """
+        raise NotImplementedError
+
+    def update_schedule(self, doctors, change):
+        """
+        Book or release hours and save the affected appointments without losing what other
+        processes book at the same time.
+        While the doctors are locked (a lock per doctor file for JSON, one transaction for SQLite)
+        their schedules are reloaded from storage, change() is called to check and change the hours
+        on the given Doctor objects, and the result is saved before the locks are released.
+        Inside batch() the update is part of the batch: with SQLite it joins the batch's
+        transaction (it is not committed on its own), and if change() raises only its own writes
+        are undone.
+        :param doctors: Doctor objects whose schedules change.
+        :param change: Function called with no arguments, returning (saved, deleted) as for
+                       save_appointments, or None to save nothing (e.g., the hour was taken).
+        :return: The value returned by change.
+        """
+        raise NotImplementedError
+
+    def next_appointment_id(self, count=1):
+        """
+        Reserve the next free appointment IDs; other processes do not get the same ones.
+        With SQLite the reservation holds until the end of the transaction, so call this from
+        the change() of update_schedule.
+        :param count: Number of consecutive IDs to reserve.
+        :return: The first reserved ID (an integer).
+        """
+        raise NotImplementedError
+
+    # Medical histories
+    def get_history(self, history_id):
+        """
+        Get a medical history entry by ID.
+        :param history_id: The historyID.
+        :return: The history dictionary or None if not found.
+        """
+        raise NotImplementedError
+
+    def list_histories(self):
+        """
+        Get all medical history entries in their stored order.
+        :return: List of history dictionaries.
+        """
+        raise NotImplementedError
+
+    def histories_by_date(self):
+        """
+        Get all medical history entries ordered by date; entries without a valid date come last.
+        :return: List of history dictionaries.
+        """
+        raise NotImplementedError
+
+    def histories_for_patient(self, patient):
+        """
+        Get the medical history entries of a patient in their stored order.
+        :param patient: The patient's name.
+        :return: List of history dictionaries.
+        """
+        raise NotImplementedError
+
+    def save_history(self, entry):
+        """
+        Insert or replace a medical history entry.
+        :param entry: The history dictionary (must contain 'historyID').
+        """
+        raise NotImplementedError
+
+    def save_histories(self, entries):
+        """
+        Replace all medical history entries, keeping the given order.
+        :param entries: List of history dictionaries.
+        """
+        raise NotImplementedError
+
+    def search_histories(self, terms, match_all=True, field=None):
+        """
+        Find medical history entries by diagnosis, injury, medication or allergy terms.
+        Terms are matched case-insensitively against whole values.
+        :param terms: List of terms.
+        :param match_all: True to require every term (AND), False for any term (OR).
+        :param field: Optional field to search ('diagnosis', 'injuries', 'medications' or 'allergies').
+        :return: List of history dictionaries.
+        """
+        raise NotImplementedError
+
+    # Patient records
+    def get_record(self, record_id):
+        """
+        Get a patient record by ID.
+        :param record_id: The recordID.
+        :return: The record dictionary or None if not found.
+        """
+        raise NotImplementedError
+
+    def list_records(self):
+        """
+        Get all patient records.
+        :return: List of record dictionaries.
+        """
+        raise NotImplementedError
+
+    def save_record(self, record):
+        """
+        Insert or replace a patient record.
+        :param record: The record dictionary (must contain 'recordID').
+        """
+        raise NotImplementedError
+
+    # Units of work
+    def batch(self):
+        """
+        Group the changes made in a with-block, so they are written together when it ends
+        (each changed file once for JSON, one transaction for SQLite).
+        :return: A context manager.
+        """
+        return nullcontext(self)
+
+    def flush(self):
+        """
+        Write the changes buffered so far (e.g., on menu exit or logout).
+        """
+
+    def flush_if_due(self):
+        """
+        Write the buffered changes if there are enough of them or they are old enough.
+        """
+
+    def close(self):
+        """
+        Write any buffered changes and release the resources held by the repository.
+        """
+
+
+def appointment_date(appointment):
+    """
+    Get the date of an appointment dictionary.
+    Older entries store a weekday name under 'day' instead of a 'date'.
+    """
+    return appointment.get("date") or appointment.get("day") or ""
+
+
+def appointment_order_key(appointment):
+    """
+    Sort key ordering appointment dictionaries by date, then time.
+    """
+    return (appointment_date(appointment), appointment.get("time") or 0)
+
+
+class AppointmentIndex:
+    def __init__(self, appointments=()):
+        """
+        Appointments grouped by date, DoctorID and patient.
+        Kept up to date with add and remove, so the per-date, per-doctor and per-patient queries
+        do not scan every appointment.
+        :param appointments: Initial appointment dictionaries.
+        """
+        self._groups = ({}, {}, {})  # date, doctorID, patient -> {appointmentID: appointment}
+        self._values_of = {}  # appointmentID -> the values it is grouped under, to remove it later
+        for appointment in appointments:
+            self.add(appointment)
+
+    @staticmethod
+    def _values(appointment):
+        return appointment_date(appointment), appointment.get("doctorID"), appointment.get("patient")
+
+    def add(self, appointment):
+        """
+        Index an appointment. An appointment already indexed under the same ID is replaced.
+        """
+        appointment_id = appointment.get("appointmentID")
+        self.remove(appointment_id)
+        values = self._values(appointment)
+        for group, value in zip(self._groups, values):
+            group.setdefault(value, {})[appointment_id] = appointment
+        self._values_of[appointment_id] = values
+
+    def remove(self, appointment_id):
+        """
+        Remove an appointment from the index, if it is indexed.
+        """
+        values = self._values_of.pop(appointment_id, None)
+        if values is None:
+            return
+        for group, value in zip(self._groups, values):
+            members = group[value]
+            del members[appointment_id]
+            if not members:
+                del group[value]
+
+    def on(self, date):
+        return list(self._groups[0].get(date, {}).values())
+
+    def for_doctor(self, doctor_id):
+        return list(self._groups[1].get(doctor_id, {}).values())
+
+    def for_patient(self, patient):
+        return list(self._groups[2].get(patient, {}).values())
+
+
+class JsonRepository(Repository):
+    def __init__(self, project_root, cache=None, encode_terms=False, serializer=None, unit_of_work=None,
+                 vocabulary=None):
+        """
+        Repository backed by the JSON files in the project root.
+        Files are loaded through a DataCache, so they are read once per process and again only
+        when another process changes them. Repeated names and clinical terms are interned in the
+        repository's vocabulary on load (see utils.vocabulary).
+        :param project_root: Directory containing doctor_<id>.json, patients.json, appointments.json,
+                             medical_histories.json and patient_records.json.
+        :param cache: DataCache to use (default: the process-wide data_cache).
+        :param encode_terms: True to write appointments.json, medical_histories.json and
+                             patient_records.json with those values dictionary-encoded. Files are
+                             read in either format.
+        :param serializer: Serializer every file is written and read with
+                           (default: utils.serializer.get_serializer()).
+        :param unit_of_work: UnitOfWork buffering the writes of histories, records and patients
+                             (default: one with the default thresholds). Doctor files are written
+                             by the end of the current batch; appointments go to their journal at once.
+        :param vocabulary: Vocabulary to intern in (default: a new one for this repository).
+        """
+        self.project_root = project_root
+        self.cache = cache or data_cache
+        self.encode_terms = encode_terms
+        self.serializer = get_serializer() if serializer is None else serializer
+        self.unit_of_work = UnitOfWork() if unit_of_work is None else unit_of_work
+        self.vocabulary = Vocabulary() if vocabulary is None else vocabulary
+        self.appointments_file = os.path.join(project_root, "appointments.json")
+        self.histories_file = os.path.join(project_root, "medical_histories.json")
+        self.records_file = os.path.join(project_root, "patient_records.json")
+        self.patients_file = os.path.join(project_root, "patients.json")
+        self.doctors_file = os.path.join(project_root, "doctors.json")  # Names of the doctor files
+        # List files: the terms to intern and the field identifying a row
+        self._lists = {
+            self.histories_file: (HISTORY_TERMS, "historyID"),
+            self.records_file: (RECORD_TERMS, "recordID"),
+            self.patients_file: ((), "PatientID"),
+        }
+        self._pending_rows = {}  # List file -> {key: row saved but not written yet}
+        self._patient_index = None  # PatientID -> patient dictionary of the cached patients list
+        self._indexed_patients = None  # The list the index was built from
+        self._history_index = None  # HistoryIndex over the cached histories list
+        self._indexed_histories = None  # The list the index was built from
+        self._history_order = None  # SortedCollection of the cached histories by date
+        self._ordered_histories = None  # The list the order was built from
+        self._appointment_order = None  # SortedCollection of the cached appointments by date and time
+        self._ordered_appointments = None  # The JournalStore the order was built from
+        self._ordered_version = None  # Its version (see JournalStore.sync) when the order was built
+        self._appointment_index = None  # AppointmentIndex of the same appointments as the order
+        self._record_index = None  # recordID -> record dictionary of the cached records list
+        self._indexed_records = None  # The list the index was built from
+        self._doctor_locks = {}  # DoctorID -> FileLock on the doctor's file
+        # DoctorID -> (store, store.loads, len(store.received)) when its journaled hours were last booked
+        self._journal_marks = {}
+        self._id_block = (0, 0)  # Appointment IDs reserved and not handed out yet: [first, end)
+        # Held for every journal append and ID reservation; kept when the store is reloaded
+        self.appointments_lock = FileLock(self.appointments_file + ".lock")
+
+    @property
+    def appointments(self):
+        """
+        The JournalStore holding the appointments.
+        """
+        store = self.cache.get(self.appointments_file, self._load_appointments)
+        store.sync()  # Entries appended by other processes are read incrementally
+        return store
+
+    @property
+    def histories(self):
+        """
+        The list of medical history dictionaries.
+        """
+        return self._list(self.histories_file)
+
+    @property
+    def records(self):
+        """
+        The list of patient record dictionaries.
+        """
+        return self._list(self.records_file)
+
+    @property
+    def patients(self):
+        """
+        The list of patient dictionaries.
+        """
+        return self._list(self.patients_file)
+
+    def doctor_file(self, doctor_id):
+        """
+        Get the path of a doctor's JSON file.
+        :param doctor_id: The DoctorID.
+        """
+        return os.path.join(self.project_root, f"doctor_{doctor_id}.json")
+
+    def get_doctor(self, doctor_id):
+        return self._get_doctor_file(self.doctor_file(doctor_id))
+
+    def list_doctors(self):
+        doctors = []
+        for filename in sorted(glob.glob(os.path.join(self.project_root, "doctor_*.json"))):
+            doctor = self._get_doctor_file(filename)
+            if doctor:
+                doctors.append(doctor)
+        return doctors
+
+    def doctor_names(self):
+        # doctors.json keeps the name of every doctor file, so a menu does not parse the schedules;
+        # doctor files it does not know yet (e.g., copied in by hand) are read once and added
+        names = self.cache.get(self.doctors_file, self._load_doctor_names)
+        doctor_ids = {}
+        for filename in glob.glob(os.path.join(self.project_root, "doctor_*.json")):
+            key = os.path.basename(filename)[len("doctor_"):-len(".json")]
+            doctor_ids[key] = int(key) if key.isdigit() else key
+        missing = [key for key in doctor_ids if key not in names]
+        if missing:
+            names = self._write_doctor_names(
+                {key: self._peek_doctor_name(self.doctor_file(key)) for key in missing}
+            )
+        return {doctor_ids[key]: names[key] for key in sorted(doctor_ids, key=doctor_ids.get)}
+
+    def save_doctor(self, doctor):
+        doctor.pruneDates()
+        filename = self.doctor_file(doctor.DoctorID)
+        self.cache.put(filename, doctor)
+
+        def write():
+            self.cache.put(filename, doctor, writer=lambda: doctor.save_to_json(filename, self.serializer))
+            names = self.cache.get(self.doctors_file, self._load_doctor_names)
+            if names.get(str(doctor.DoctorID)) != doctor.Name:
+                self._write_doctor_names({str(doctor.DoctorID): doctor.Name})
+        # Not deferred past the current batch: other processes book against this file
+        self.unit_of_work.add(filename, write, defer=False)
+
+    def release_doctor(self, doctor_id):
+        self.cache.invalidate(self.doctor_file(doctor_id))
+
+    def archive_file(self, doctor_id, year):
+        """
+        Get the path of the compressed archive of a doctor's schedule for one year.
+        :param doctor_id: The DoctorID.
+        :param year: The year.
+        """
+        return os.path.join(self.project_root, "archive", f"doctor_{doctor_id}_{year}.json.gz")
+
+    def archived_years(self, doctor_id):
+        prefix = f"doctor_{doctor_id}_"
+        return sorted(
+            int(os.path.basename(filename)[len(prefix):-len(".json.gz")])
+            for filename in glob.glob(os.path.join(self.project_root, "archive", prefix + "*.json.gz"))
+        )
+
+    def archived_days(self, doctor_id, year):
+        filename = self.archive_file(doctor_id, year)
+        if not os.path.exists(filename):
+            return {}
+        with gzip.open(filename, "rb") as file:
+            return self.serializer.load(file)
+
+    def save_archived_days(self, doctor_id, year, days):
+        filename = self.archive_file(doctor_id, year)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Written next to the archive, then swapped in, so a crash never leaves half a year behind
+        with atomic_write(filename) as file, gzip.GzipFile(fileobj=file, mode="wb") as compressed:
+            self.serializer.compact().dump(dict(sorted(days.items())), compressed)
+
+    def get_patient(self, patient_id):
+        data = self.patient_index().get(patient_id)
+        return None if data is None else patient.from_dict(data)
+
+    def list_patients(self):
+        return [patient.from_dict(data) for data in self.patients]
+
+    def save_patient(self, patient):
+        patients = self.patients
+        index = self.patient_index()
+        data = patient.to_dict()
+        existing = index.get(patient.PatientID)
+        if existing is None:
+            patients.append(data)
+            index[patient.PatientID] = data
+        else:
+            existing.clear()
+            existing.update(data)
+            data = existing
+        self._put_row(self.patients_file, data)
+
+    def patient_index(self):
+        """
+        Get the patients by ID.
+        It is built once per loaded patients list and then updated by save_patient.
+        :return: Dictionary of PatientID to patient dictionary.
+        """
+        patients = self.patients
+        if self._indexed_patients is not patients:
+            self._patient_index = {data.get("PatientID"): data for data in patients}
+            self._indexed_patients = patients
+        return self._patient_index
+
+    def get_appointment(self, appointment_id):
+        return self.appointments.get(appointment_id)
+
+    def list_appointments(self):
+        return self.appointments.records()
+
+    def appointments_by_date(self):
+        return list(self.appointment_order())
+
+    def appointments_on(self, date):
+        return self.appointment_index().on(date)
+
+    def appointments_for_doctor(self, doctor_id):
+        return self.appointment_index().for_doctor(doctor_id)
+
+    def appointments_for_patient(self, patient):
+        return self.appointment_index().for_patient(patient)
+
+    def save_appointment(self, appointment):
+        order = self.appointment_order()
+        index = self._appointment_index
+        store = self.appointments
+        existing = store.get(appointment["appointmentID"])
+        if existing is not None:
+            order.discard(existing)
+        store.put(appointment)
+        order.add(appointment)
+        index.add(appointment)
+        self.cache.refresh(self.appointments_file)
+
+    def delete_appointment(self, appointment_id):
+        order = self.appointment_order()
+        store = self.appointments
+        existing = store.get(appointment_id)
+        if existing is not None:
+            order.discard(existing)
+        store.delete(appointment_id)
+        self._appointment_index.remove(appointment_id)
+        self.cache.refresh(self.appointments_file)
+
+    def save_appointments(self, saved=(), deleted=(), doctors=()):
+        order = self.appointment_order()
+        index = self._appointment_index
+        store = self.appointments
+        entries = []
+        for appointment_id in deleted:
+            existing = store.get(appointment_id)
+            if existing is not None:
+                order.discard(existing)
+            index.remove(appointment_id)
+            entries.append({"op": "delete", "key": appointment_id})
+        for appointment in saved:
+            existing = store.get(appointment["appointmentID"])
+            if existing is not None:
+                order.discard(existing)
+            entries.append({"op": "put", "record": appointment})
+        store.append(entries)  # One journal write for the whole batch
+        for appointment in saved:
+            order.add(appointment)
+            index.add(appointment)
+        self.cache.refresh(self.appointments_file)
+        for doctor in doctors:
+            self.save_doctor(doctor)
+
+    def appointment_order(self):
+        """
+        Get the appointments kept in date and time order.
+        It is built once per loaded appointments store and then updated on every save and delete.
+        :return: A SortedCollection of appointment dictionaries.
+        """
+        store = self.appointments
+        if self._ordered_appointments is not store or self._ordered_version != store.version:
+            self._appointment_order = SortedCollection(store.records(), key=appointment_order_key)
+            self._appointment_index = AppointmentIndex(store.records())
+            self._ordered_appointments = store
+            self._ordered_version = store.version
+        return self._appointment_order
+
+    def appointment_index(self):
+        """
+        Get the appointments grouped by date, doctor and patient.
+        It is built and updated together with appointment_order.
+        :return: An AppointmentIndex.
+        """
+        self.appointment_order()
+        return self._appointment_index
+
+    def update_schedule(self, doctors, change):
+        # Doctors are locked in DoctorID order, so processes locking several cannot deadlock
+        doctors = sorted({doctor.DoctorID: doctor for doctor in doctors}.values(), key=lambda d: d.DoctorID)
+        # Buffered changes go first (a group commit), so the schedules reloaded below include them
+        self.unit_of_work.flush()
+        with ExitStack() as stack:
+            for doctor in doctors:
+                stack.enter_context(self._doctor_lock(doctor.DoctorID))
+                # Read from the file, not the cache: a write in the same clock tick keeps the signature
+                filename = self.doctor_file(doctor.DoctorID)
+                if os.path.exists(filename):
+                    doctor.refreshFrom(self._load_doctor(filename))
+            repaired = [doctor for doctor in doctors if self._book_journaled_hours(doctor)]
+            result = change()
+            if result is not None:
+                saved, deleted = result
+                self.save_appointments(saved=saved, deleted=deleted, doctors=doctors)
+            else:
+                for doctor in repaired:
+                    self.save_doctor(doctor)
+            self.unit_of_work.flush()  # Before the locks are released, even inside a batch
+            return result
+
+    def _book_journaled_hours(self, doctor):
+        # A booking appends to the journal before the doctor file is written, so a crash in
+        # between leaves an appointment whose hour the schedule still shows free: book it again.
+        # Every appointment of the doctor is checked once per load of the store; after that only
+        # the ones read from entries other processes appended since, not the whole history.
+        store = self.appointments
+        mark = self._journal_marks.get(doctor.DoctorID)
+        if mark is not None and mark[0] is store and mark[1] == store.loads:
+            appointments = [
+                appointment for appointment in store.received[mark[2]:]
+                if appointment.get("doctorID") == doctor.DoctorID
+                and store.get(appointment.get("appointmentID")) is appointment  # Not replaced or deleted since
+            ]
+        else:
+            appointments = self.appointments_for_doctor(doctor.DoctorID)
+        self._journal_marks[doctor.DoctorID] = (store, store.loads, len(store.received))
+        repaired = False
+        for appointment in appointments:
+            date, hour = appointment.get("date"), appointment.get("time")
+            if date and isinstance(hour, int) and doctor.checkAvailability(date, hour):
+                repaired = doctor.bookHour(date, hour) or repaired
+        return repaired
+
+    def next_appointment_id(self, count=1):
+        # Reserved in blocks, so most bookings take the appointments lock once (to append), not twice
+        first, end = self._id_block
+        if end - first < count:
+            size = max(count, APPOINTMENT_ID_BLOCK)
+            first = self.appointments.reserve_ids(size)
+            end = first + size
+        self._id_block = (first + count, end)
+        return first
+
+    def get_history(self, history_id):
+        return self.history_index().entries.get(history_id)
+
+    def list_histories(self):
+        return list(self.histories)
+
+    def histories_by_date(self):
+        return list(self.history_order())
+
+    def histories_for_patient(self, patient):
+        return [h for h in self.histories if h.get("patient") == patient]
+
+    def save_history(self, entry):
+        self.vocabulary.intern_rows([entry], HISTORY_TERMS)
+        histories = self.histories
+        index = self.history_index()
+        order = self.history_order()
+        existing = index.entries.get(entry.get("historyID"))
+        if existing is None:
+            histories.append(entry)
+            existing = entry
+        elif existing is not entry:
+            existing.clear()
+            existing.update(entry)
+        self._put_row(self.histories_file, existing)
+        index.update(existing.get("historyID"), existing)
+        order.update(existing)
+
+    def save_histories(self, entries):
+        # Replaces the whole file at once, so rows still pending are dropped
+        self._pending_rows.pop(self.histories_file, None)
+        self.unit_of_work.discard(self.histories_file)
+        self._put_list(self.histories_file, self.vocabulary.intern_rows(list(entries), HISTORY_TERMS), HISTORY_TERMS)
+
+    def search_histories(self, terms, match_all=True, field=None):
+        index = self.history_index()
+        if match_all:
+            return index.search_all(terms, field)
+        return index.search_any(terms, field)
+
+    def history_index(self):
+        """
+        Get the inverted index over the histories.
+        It is built once per loaded histories list and then updated by save_history.
+        :return: A HistoryIndex.
+        """
+        histories = self.histories
+        if self._indexed_histories is not histories:
+            index = HistoryIndex()
+            for entry in histories:
+                index.add(entry.get("historyID"), entry)
+            self._history_index, self._indexed_histories = index, histories
+        return self._history_index
+
+    def history_order(self):
+        """
+        Get the histories kept in date order.
+        It is built once per loaded histories list and then updated by save_history.
+        :return: A SortedCollection of history dictionaries.
+        """
+        histories = self.histories
+        if self._ordered_histories is not histories:
+            self._history_order = SortedCollection(histories, key=history_date_key)
+            self._ordered_histories = histories
+        return self._history_order
+
+    def get_record(self, record_id):
+        return self.record_index().get(record_id)
+
+    def list_records(self):
+        return list(self.records)
+
+    def save_record(self, record):
+        self.vocabulary.intern_rows([record], RECORD_TERMS)
+        records = self.records
+        index = self.record_index()
+        existing = index.get(record.get("recordID"))
+        if existing is None:
+            records.append(record)
+            index[record.get("recordID")] = existing = record
+        elif existing is not record:
+            existing.clear()
+            existing.update(record)
+        self._put_row(self.records_file, existing)
+
+    def record_index(self):
+        """
+        Get the patient records by ID.
+        It is built once per loaded records list and then updated by save_record.
+        :return: Dictionary of recordID to record dictionary.
+        """
+        records = self.records
+        if self._indexed_records is not records:
+            self._record_index = {data.get("recordID"): data for data in records}
+            self._indexed_records = records
+        return self._record_index
+
+    def batch(self):
+        return self.unit_of_work.batch()
+
+    def flush(self):
+        self.unit_of_work.flush()
+
+    def flush_if_due(self):
+        self.unit_of_work.flush_if_due()
+
+    def close(self):
+        self.flush()
+
+    def lock_stats(self):
+        """
+        Get the counters of the locks this repository took (see FileLock.stats), e.g., to see how
+        much bookings for different doctors wait for each other on the shared appointments journal.
+        :return: Dictionary with the stats of the appointments lock and the summed ones of the doctor locks.
+        """
+        doctors = {"acquisitions": 0, "contended": 0, "waited": 0.0}
+        for lock in self._doctor_locks.values():
+            for name, value in lock.stats().items():
+                doctors[name] += value
+        return {"appointments": self.appointments_lock.stats(), "doctors": doctors}
+
+    def _load_appointments(self):
+        store = JournalStore(self.appointments_file, key="appointmentID", terms=APPOINTMENT_TERMS,
+                             encode_terms=self.encode_terms, serializer=self.serializer,
+                             lock=self.appointments_lock, vocabulary=self.vocabulary)
+        store.load()
+        return store
+
+    def _doctor_lock(self, doctor_id):
+        lock = self._doctor_locks.get(doctor_id)
+        if lock is None:
+            lock = self._doctor_locks[doctor_id] = FileLock(self.doctor_file(doctor_id) + ".lock")
+        return lock
+
+    def _get_doctor_file(self, filename):
+        if not os.path.exists(filename) and not self.unit_of_work.pending(filename):
+            self.cache.invalidate(filename)
+            return None
+        return self.cache.get(filename, lambda: self._load_doctor(filename))
+
+    def _load_doctor(self, filename):
+        # Legacy weekday-name keys are migrated once per load, not on every menu entry
+        doctor = Doctor.load_from_json(filename, self.serializer)
+        if doctor and doctor.migrate_legacy_day_keys():
+            # Written like a booking: locked and migrated again from the file as it is now, so an
+            # hour another process booked since the read above is kept
+            with self._doctor_lock(doctor.DoctorID):
+                doctor = Doctor.load_from_json(filename, self.serializer)
+                if doctor and doctor.migrate_legacy_day_keys():
+                    doctor.save_to_json(filename, self.serializer)
+        return doctor
+
+    def _load_doctor_names(self):
+        if not os.path.exists(self.doctors_file):
+            return {}
+        with open(self.doctors_file, "rb") as file:
+            return self.serializer.load(file)
+
+    def _write_doctor_names(self, changes):
+        # Locked and reloaded, so names another process added in the meantime are kept
+        with FileLock(self.doctors_file + ".lock"):
+            names = dict(self._load_doctor_names())
+            names.update(changes)
+            self.cache.put(self.doctors_file, names, writer=lambda: self._save_doctor_names(names))
+        return names
+
+    def _save_doctor_names(self, names):
+        with atomic_write(self.doctors_file) as file:
+            self.serializer.dump(names, file)
+
+    def _peek_doctor_name(self, filename):
+        # Read without building (or caching) the Doctor and its schedule
+        try:
+            with open(filename, "rb") as file:
+                return self.serializer.load(file).get("Name")
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _put_list(self, filename, data, terms):
+        self.cache.put(filename, data, writer=lambda: self._save_list(filename, data, terms))
+
+    def _list(self, filename):
+        return self.cache.get(filename, lambda: self._load_pending(filename))
+
+    def _load_pending(self, filename):
+        # The rows saved but not written yet are put back on top of the file, e.g., after
+        # another process rewrote it
+        terms, key = self._lists[filename]
+        rows = self._load_list(filename, terms)
+        pending = self._pending_rows.get(filename)
+        if pending:
+            positions = {row.get(key): position for position, row in enumerate(rows)}
+            for row_key, row in pending.items():
+                position = positions.get(row_key)
+                if position is None:
+                    rows.append(row)
+                else:
+                    rows[position] = row
+        return rows
+
+    def _put_row(self, filename, row):
+        # The row is already in the cached list; its file is written when the unit of work flushes
+        key = self._lists[filename][1]
+        self._pending_rows.setdefault(filename, {})[row.get(key)] = row
+        self.unit_of_work.add(filename, lambda: self._write_list(filename))
+
+    def _write_list(self, filename):
+        # Locked and reloaded if changed, so rows another process wrote in the meantime are kept
+        with FileLock(filename + ".lock"):
+            rows = self._list(filename)
+            self._put_list(filename, rows, self._lists[filename][0])
+        self._pending_rows.pop(filename, None)
+
+    def _load_list(self, filename, terms):
+        if not os.path.exists(filename):
+            return []
+        with open(filename, "rb") as file:
+            data = self.serializer.load(file)
+        if isinstance(data, list) or is_encoded(data):
+            return decode_rows(data, terms, self.vocabulary)
+        return []
+
+    def _save_list(self, filename, data, terms):
+        with atomic_write(filename) as file:
+            if self.encode_terms:
+                self.serializer.compact().dump(encode_rows(data, terms), file)  # Not meant to be read by eye
+            else:
+                self.serializer.dump(data, file)
@@ -0,0 +1,461 @@
+import gzip
+import sqlite3
+from contextlib import contextmanager, nullcontext
+
+from Users.Doctors import Doctor, mask_to_hours
+from Users.Patient import patient
+from medicalHistory.index import HISTORY_FIELDS, normalize_term
+from storage.repository import Repository, appointment_date
+from utils.serializer import get_serializer
+from utils.vocabulary import Vocabulary
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS doctors (
+    doctor_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    archived_before TEXT
+);
+CREATE TABLE IF NOT EXISTS doctor_archive (
+    doctor_id INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (doctor_id, year)
+);
+CREATE TABLE IF NOT EXISTS doctor_days (
+    doctor_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    PRIMARY KEY (doctor_id, date)
+);
+CREATE TABLE IF NOT EXISTS doctor_weeks (
+    doctor_id INTEGER NOT NULL,
+    weekday INTEGER NOT NULL,
+    hour INTEGER NOT NULL,
+    PRIMARY KEY (doctor_id, weekday, hour)
+);
+CREATE TABLE IF NOT EXISTS doctor_slots (
+    doctor_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    working INTEGER NOT NULL DEFAULT 0,
+    booked INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (doctor_id, date, hour)
+);
+CREATE TABLE IF NOT EXISTS patients (
+    patient_id PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS appointments (
+    appointment_id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    time INTEGER,
+    doctor_id INTEGER,
+    patient TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS appointments_by_date ON appointments (date, time);
+CREATE INDEX IF NOT EXISTS appointments_by_doctor ON appointments (doctor_id, date);
+CREATE INDEX IF NOT EXISTS appointments_by_patient ON appointments (patient);
+CREATE TABLE IF NOT EXISTS histories (
+    history_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    date TEXT,
+    patient TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS histories_by_position ON histories (position);
+CREATE INDEX IF NOT EXISTS histories_by_patient ON histories (patient, date);
+CREATE INDEX IF NOT EXISTS histories_by_date ON histories (date);
+CREATE TABLE IF NOT EXISTS history_terms (
+    term TEXT NOT NULL,
+    field TEXT NOT NULL,
+    history_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_terms_by_term ON history_terms (term, field);
+CREATE INDEX IF NOT EXISTS history_terms_by_history ON history_terms (history_id);
+CREATE TABLE IF NOT EXISTS records (
+    record_id TEXT PRIMARY KEY,
+    date TEXT,
+    patient TEXT,
+    doctor_id INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_by_patient ON records (patient, date);
+CREATE INDEX IF NOT EXISTS records_by_date ON records (date);
+"""
+
+
+class SQLiteRepository(Repository):
+    def __init__(self, path, serializer=None, vocabulary=None):
+        """
+        Repository backed by a SQLite database.
+        Every row keeps the full dictionary in a JSON 'data' column; the fields used for
+        lookups are also stored in indexed columns.
+        :param path: Path of the database file (':memory:' for a private in-memory database).
+        :param serializer: Serializer for the JSON columns (default: utils.serializer.get_serializer()).
+                           Columns are always written compact.
+        :param vocabulary: Vocabulary the managers working on it intern in (default: a new one).
+        """
+        self.path = path
+        self.serializer = (get_serializer() if serializer is None else serializer).compact()
+        self.vocabulary = Vocabulary() if vocabulary is None else vocabulary
+        # Writers from other processes are waited for instead of failing with "database is locked"
+        self.connection = sqlite3.connect(path, timeout=30)
+        self._reserved_id = 0  # Highest appointment ID handed out by next_appointment_id
+        self._batch_depth = 0  # Nesting of batch(); saves inside one share its transaction
+        self.connection.executescript(SCHEMA)
+        # Databases created before schedules could be archived get the column added
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(doctors)")}
+        if "archived_before" not in columns:
+            with self.connection:
+                self.connection.execute("ALTER TABLE doctors ADD COLUMN archived_before TEXT")
+        # Databases created before the term index existed get it built once
+        if self.connection.execute("SELECT 1 FROM history_terms LIMIT 1").fetchone() is None:
+            histories = self.list_histories()
+            if histories:
+                self.save_histories(histories)
+
+    def get_doctor(self, doctor_id):
+        row = self.connection.execute(
+            "SELECT doctor_id, name, archived_before FROM doctors WHERE doctor_id = ?", (doctor_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._load_doctor(*row)
+
+    def list_doctors(self):
+        rows = self.connection.execute("SELECT doctor_id, name, archived_before FROM doctors ORDER BY doctor_id").fetchall()
+        return [self._load_doctor(*row) for row in rows]
+
+    def doctor_names(self):
+        rows = self.connection.execute("SELECT doctor_id, name FROM doctors ORDER BY doctor_id")
+        return {doctor_id: name for doctor_id, name in rows}
+
+    def save_doctor(self, doctor):
+        with self._transaction():
+            self._write_doctor(doctor)
+
+    def archived_years(self, doctor_id):
+        rows = self.connection.execute(
+            "SELECT year FROM doctor_archive WHERE doctor_id = ? ORDER BY year", (doctor_id,)
+        )
+        return [year for (year,) in rows]
+
+    def archived_days(self, doctor_id, year):
+        row = self.connection.execute(
+            "SELECT data FROM doctor_archive WHERE doctor_id = ? AND year = ?", (doctor_id, year)
+        ).fetchone()
+        return {} if row is None else self.serializer.loads(gzip.decompress(row[0]))
+
+    def save_archived_days(self, doctor_id, year, days):
+        data = gzip.compress(self.serializer.dumps(dict(sorted(days.items()))))
+        with self._transaction():
+            self.connection.execute(
+                "INSERT OR REPLACE INTO doctor_archive (doctor_id, year, data) VALUES (?, ?, ?)",
+                (doctor_id, year, data),
+            )
+
+    def get_patient(self, patient_id):
+        row = self.connection.execute("SELECT data FROM patients WHERE patient_id = ?", (patient_id,)).fetchone()
+        return None if row is None else patient.from_dict(self.serializer.loads(row[0]))
+
+    def list_patients(self):
+        return [patient.from_dict(data) for data in self._fetch_all("SELECT data FROM patients ORDER BY rowid")]
+
+    def save_patient(self, patient):
+        with self._transaction():
+            self.connection.execute(
+                "INSERT OR REPLACE INTO patients (patient_id, data) VALUES (?, ?)",
+                (patient.PatientID, self._dumps(patient.to_dict())),
+            )
+
+    def get_appointment(self, appointment_id):
+        return self._fetch_one("SELECT data FROM appointments WHERE appointment_id = ?", (appointment_id,))
+
+    def list_appointments(self):
+        return self._fetch_all("SELECT data FROM appointments ORDER BY appointment_id")
+
+    def appointments_by_date(self):
+        return self._fetch_all("SELECT data FROM appointments ORDER BY date, time, appointment_id")
+
+    def appointments_on(self, date):
+        return self._fetch_all("SELECT data FROM appointments WHERE date = ? ORDER BY time", (date,))
+
+    def appointments_for_doctor(self, doctor_id):
+        return self._fetch_all(
+            "SELECT data FROM appointments WHERE doctor_id = ? ORDER BY date, time", (doctor_id,)
+        )
+
+    def appointments_for_patient(self, patient):
+        return self._fetch_all("SELECT data FROM appointments WHERE patient = ? ORDER BY date, time", (patient,))
+
+    def save_appointment(self, appointment):
+        with self._transaction():
+            self._write_appointment(appointment)
+
+    def delete_appointment(self, appointment_id):
+        with self._transaction():
+            self.connection.execute("DELETE FROM appointments WHERE appointment_id = ?", (appointment_id,))
+
+    def save_appointments(self, saved=(), deleted=(), doctors=()):
+        with self._transaction():
+            self._write_appointments(saved, deleted, doctors)
+
+    def update_schedule(self, doctors, change):
+        doctors = list({doctor.DoctorID: doctor for doctor in doctors}.values())
+        joined = self._batch_depth > 0  # Inside batch(): part of its transaction, committed with it
+        if not self.connection.in_transaction:
+            # IMMEDIATE takes the write lock before reading, so no other process books in between.
+            # An open transaction has written already (sqlite3 begins one before the first write),
+            # so it holds the write lock
+            self.connection.execute("BEGIN IMMEDIATE")
+        if joined:
+            # Undoes only this update if it fails, not the batch's earlier writes
+            self.connection.execute("SAVEPOINT update_schedule")
+        self._batch_depth += 1  # Saves made by change() (e.g., archives) join this transaction
+        try:
+            stored = {}  # DoctorID -> the schedule as read, so only the changed dates are written back
+            for doctor in doctors:
+                stored_doctor = self.get_doctor(doctor.DoctorID)
+                if stored_doctor is not None:
+                    doctor.refreshFrom(stored_doctor)
+                    stored[doctor.DoctorID] = stored_doctor
+            result = change()
+            if result is not None:
+                saved, deleted = result
+                self._write_appointments(saved, deleted, doctors, stored)
+        except BaseException:
+            if joined:
+                self.connection.execute("ROLLBACK TO update_schedule")
+                self.connection.execute("RELEASE update_schedule")
+            else:
+                self.connection.rollback()
+            raise
+        finally:
+            self._batch_depth -= 1
+        if joined:
+            self.connection.execute("RELEASE update_schedule")
+        else:
+            self.connection.commit()
+        return result
+
+    def next_appointment_id(self, count=1):
+        (max_id,) = self.connection.execute("SELECT MAX(appointment_id) FROM appointments").fetchone()
+        first = max(max_id or 0, self._reserved_id) + 1
+        self._reserved_id = first + count - 1
+        return first
+
+    def get_history(self, history_id):
+        return self._fetch_one("SELECT data FROM histories WHERE history_id = ?", (history_id,))
+
+    def list_histories(self):
+        return self._fetch_all("SELECT data FROM histories ORDER BY position")
+
+    def histories_by_date(self):
+        # A date is valid only if SQLite reads it back unchanged: malformed (2020-99-10), compact
+        # (20240105), out-of-range (2024-02-30) or timed dates go last, as in heap_sort
+        day = "CASE WHEN date(date, '+0 days') = date THEN date END"
+        return self._fetch_all(f"SELECT data FROM histories ORDER BY {day} IS NULL, {day}, position")
+
+    def histories_for_patient(self, patient):
+        return self._fetch_all("SELECT data FROM histories WHERE patient = ? ORDER BY position", (patient,))
+
+    def save_history(self, entry):
+        with self._transaction():
+            row = self.connection.execute(
+                "SELECT position FROM histories WHERE history_id = ?", (entry["historyID"],)
+            ).fetchone()
+            if row is None:
+                (max_position,) = self.connection.execute("SELECT MAX(position) FROM histories").fetchone()
+                position = 0 if max_position is None else max_position + 1
+            else:
+                position = row[0]
+            self._insert_history(entry, position)
+
+    def save_histories(self, entries):
+        with self._transaction():
+            self.connection.execute("DELETE FROM histories")
+            self.connection.execute("DELETE FROM history_terms")
+            for position, entry in enumerate(entries):
+                self._insert_history(entry, position)
+
+    def search_histories(self, terms, match_all=True, field=None):
+        if not terms:
+            return []
+        condition = "term = ?" if field is None else "term = ? AND field = ?"
+        subquery = f"SELECT history_id FROM history_terms WHERE {condition}"
+        params = []
+        for term in terms:
+            params.append(normalize_term(term))
+            if field is not None:
+                params.append(field)
+        combined = (" INTERSECT " if match_all else " UNION ").join([subquery] * len(terms))
+        return self._fetch_all(f"SELECT data FROM histories WHERE history_id IN ({combined}) ORDER BY position", params)
+
+    def get_record(self, record_id):
+        return self._fetch_one("SELECT data FROM records WHERE record_id = ?", (record_id,))
+
+    def list_records(self):
+        return self._fetch_all("SELECT data FROM records ORDER BY rowid")
+
+    def save_record(self, record):
+        with self._transaction():
+            self.connection.execute(
+                "INSERT OR REPLACE INTO records (record_id, date, patient, doctor_id, data) VALUES (?, ?, ?, ?, ?)",
+                (
+                    record["recordID"],
+                    record.get("Date"),
+                    record.get("Patient"),
+                    record.get("Doctor"),
+                    self._dumps(record),
+                ),
+            )
+
+    @contextmanager
+    def batch(self):
+        # One transaction for the whole block, rolled back if it raises
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.connection.rollback()
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def _transaction(self):
+        # A transaction per save, or the batch's own
+        return nullcontext() if self._batch_depth else self.connection
+
+    def _load_doctor(self, doctor_id, name, archived_before):
+        days_working = {
+            date_key: [[], []]
+            for (date_key,) in self.connection.execute(
+                "SELECT date FROM doctor_days WHERE doctor_id = ? ORDER BY date", (doctor_id,)
+            )
+        }
+        for date_key, hour, working, booked in self.connection.execute(
+            "SELECT date, hour, working, booked FROM doctor_slots WHERE doctor_id = ? ORDER BY date, hour",
+            (doctor_id,),
+        ):
+            hours = days_working.setdefault(date_key, [[], []])
+            if working:
+                hours[0].append(hour)
+            if booked:
+                hours[1].append(hour)
+        weekly_hours = {}
+        for weekday, hour in self.connection.execute(
+            "SELECT weekday, hour FROM doctor_weeks WHERE doctor_id = ? ORDER BY weekday, hour", (doctor_id,)
+        ):
+            weekly_hours.setdefault(weekday, []).append(hour)
+        return Doctor(DoctorID=doctor_id, Name=name, daysWorking=days_working, weeklyHours=weekly_hours,
+                      archivedBefore=archived_before)
+
+    def _write_doctor(self, doctor, stored=None):
+        # Given the stored copy, only the dates (and weekly hours) that differ from it are rewritten
+        doctor.pruneDates()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO doctors (doctor_id, name, archived_before) VALUES (?, ?, ?)",
+            (doctor.DoctorID, doctor.Name, doctor.archivedBefore),
+        )
+        if stored is None or list(doctor.weekSlots) != list(stored.weekSlots):
+            self.connection.execute("DELETE FROM doctor_weeks WHERE doctor_id = ?", (doctor.DoctorID,))
+            self.connection.executemany(
+                "INSERT INTO doctor_weeks (doctor_id, weekday, hour) VALUES (?, ?, ?)",
+                [
+                    (doctor.DoctorID, weekday, hour)
+                    for weekday, mask in enumerate(doctor.weekSlots)
+                    for hour in mask_to_hours(mask)
+                ],
+            )
+        if stored is None:
+            self.connection.execute("DELETE FROM doctor_days WHERE doctor_id = ?", (doctor.DoctorID,))
+            self.connection.execute("DELETE FROM doctor_slots WHERE doctor_id = ?", (doctor.DoctorID,))
+            changed = doctor.daySlots
+        else:
+            changed = [
+                date_key for date_key in doctor.daySlots.keys() | stored.daySlots.keys()
+                if doctor.daySlots.get(date_key) != stored.daySlots.get(date_key)
+            ]
+            self.connection.executemany(
+                "DELETE FROM doctor_slots WHERE doctor_id = ? AND date = ?",
+                [(doctor.DoctorID, date_key) for date_key in changed],
+            )
+            self.connection.executemany(
+                "DELETE FROM doctor_days WHERE doctor_id = ? AND date = ?",
+                [(doctor.DoctorID, date_key) for date_key in changed if date_key not in doctor.daySlots],
+            )
+        days = []
+        slots = []
+        for date_key in changed:
+            day = doctor.daySlots.get(date_key)
+            if day is None:
+                continue
+            days.append((doctor.DoctorID, date_key))
+            working, booked = day
+            for hour in mask_to_hours(working | booked):
+                bit = 1 << hour
+                slots.append((doctor.DoctorID, date_key, hour, bool(working & bit), bool(booked & bit)))
+        self.connection.executemany("INSERT OR IGNORE INTO doctor_days (doctor_id, date) VALUES (?, ?)", days)
+        self.connection.executemany(
+            "INSERT INTO doctor_slots (doctor_id, date, hour, working, booked) VALUES (?, ?, ?, ?, ?)",
+            slots,
+        )
+
+    def _write_appointments(self, saved, deleted, doctors, stored=None):
+        self.connection.executemany(
+            "DELETE FROM appointments WHERE appointment_id = ?", [(appointment_id,) for appointment_id in deleted]
+        )
+        for appointment in saved:
+            self._write_appointment(appointment)
+        stored = stored or {}
+        for doctor in doctors:
+            self._write_doctor(doctor, stored.get(doctor.DoctorID))
+
+    def _write_appointment(self, appointment):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO appointments (appointment_id, date, time, doctor_id, patient, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                appointment["appointmentID"],
+                appointment_date(appointment),
+                appointment.get("time"),
+                appointment.get("doctorID"),
+                appointment.get("patient"),
+                self._dumps(appointment),
+            ),
+        )
+
+    def _insert_history(self, entry, position):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO histories (history_id, position, date, patient, data) VALUES (?, ?, ?, ?, ?)",
+            (entry["historyID"], position, entry.get("date"), entry.get("patient"), self._dumps(entry)),
+        )
+        self.connection.execute("DELETE FROM history_terms WHERE history_id = ?", (entry["historyID"],))
+        self.connection.executemany(
+            "INSERT INTO history_terms (term, field, history_id) VALUES (?, ?, ?)",
+            [
+                (normalize_term(value), field, entry["historyID"])
+                for field in HISTORY_FIELDS
+                for value in entry.get(field) or []
+                if normalize_term(value)
+            ],
+        )
+
+    def _fetch_one(self, query, params=()):
+        row = self.connection.execute(query, params).fetchone()
+        return self.serializer.loads(row[0]) if row else None
+
+    def _fetch_all(self, query, params=()):
+        loads = self.serializer.loads
+        return [loads(data) for (data,) in self.connection.execute(query, params)]
+
+    def _dumps(self, value):
+        # JSON text for a 'data' column
+        return self.serializer.dumps(value).decode()
@@ -0,0 +1,118 @@
+"""
+Write coalescing for the JSON repository.
+
+Saving a history or a record rewrites its whole file, so a session adding five entries wrote the
+file five times. A UnitOfWork keeps one pending writer per dirty file instead: saving the same
+file again only replaces its writer, and the files are written together when the unit is flushed.
+
+A unit flushes by itself when it holds `max_changes` changes or its oldest change is `max_delay`
+seconds old (checked on every change and by flush_if_due), at the end of the outermost batch(),
+and whenever it is asked to (on menu exit, logout and close). Writes that other processes must
+see at once, such as doctor schedules, are added with defer=False: they are written at the end
+of the current batch, or right away outside one.
+"""
+import time
+from contextlib import contextmanager
+
+DEFAULT_MAX_CHANGES = 100  # Changes buffered before a flush
+DEFAULT_MAX_DELAY = 2.0  # Seconds a change may stay buffered (checked on the next change or prompt)
+
+
+class UnitOfWork:
+    def __init__(self, max_changes=DEFAULT_MAX_CHANGES, max_delay=DEFAULT_MAX_DELAY, clock=time.monotonic):
+        """
+        Buffer of pending file writes.
+        :param max_changes: Number of changes after which the unit flushes (1: write every change at once).
+        :param max_delay: Age in seconds of the oldest change after which the unit flushes.
+        :param clock: Function returning the current time in seconds.
+        """
+        self.max_changes = max_changes
+        self.max_delay = max_delay
+        self.clock = clock
+        self._writers = {}  # key -> function writing it, in the order the keys became dirty
+        self._changes = 0  # Changes since the last flush, counting repeated ones
+        self._since = None  # Time of the oldest pending change
+        self._depth = 0  # Nesting of batch()
+        self.flushes = 0
+        self.writes = 0
+
+    def add(self, key, writer, defer=True):
+        """
+        Record a change.
+        :param key: What the writer writes, usually a file path; a later writer for the same key replaces this one.
+        :param writer: Function called with no arguments to write the change.
+        :param defer: False to write no later than the end of the current batch.
+        """
+        self._writers.pop(key, None)
+        self._writers[key] = writer
+        self._changes += 1
+        if self._since is None:
+            self._since = self.clock()
+        if self._depth == 0 and (not defer or self.due()):
+            self.flush()
+
+    def discard(self, key):
+        """
+        Drop the pending writer of a key, e.g., because the key was written another way.
+        """
+        self._writers.pop(key, None)
+
+    def pending(self, key=None):
+        """
+        Check for pending writes.
+        :param key: A key, or None for any.
+        :return: True if the key (or any key) has a pending writer.
+        """
+        return bool(self._writers) if key is None else key in self._writers
+
+    def due(self):
+        """
+        Check whether the thresholds are reached.
+        """
+        if not self._writers:
+            return False
+        return self._changes >= self.max_changes or self.clock() - self._since >= self.max_delay
+
+    def flush(self):
+        """
+        Run every pending writer once, in the order the keys became dirty.
+        If a writer fails, its error is raised and it stays pending with the writers not run yet.
+        """
+        while self._writers:
+            key, writer = next(iter(self._writers.items()))
+            writer()
+            del self._writers[key]
+            self.writes += 1
+        self._changes = 0
+        self._since = None
+        self.flushes += 1
+
+    def flush_if_due(self):
+        """
+        Flush if the thresholds are reached and no batch is open.
+        :return: True if the unit flushed.
+        """
+        if self._depth == 0 and self.due():
+            self.flush()
+            return True
+        return False
+
+    @contextmanager
+    def batch(self):
+        """
+        Group the changes made in the block; they are written together when the outermost batch ends.
+        """
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if self._depth == 0 and self._writers:
+                self.flush()
+
+    def stats(self):
+        """
+        Get the unit counters.
+        :return: Dictionary with the flushes, the files written and the pending keys.
+        """
+        return {"flushes": self.flushes, "writes": self.writes, "pending": len(self._writers)}
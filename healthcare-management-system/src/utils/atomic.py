@@ -0,0 +1,34 @@
+"""
+Crash-safe replacement of data files.
+
+atomic_write() hands out a temporary file next to the target. When the block ends, the file is
+flushed to disk (fsync) and renamed over the target in one step, so readers and a restart after
+a crash see either the old or the new content, never half of it. If the block raises, the
+target is left untouched.
+"""
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(filename, sync=True):
+    """
+    Replace a file atomically with what is written in the block.
+    :param filename: Path of the file to replace (or create).
+    :param sync: False to skip the fsync (the rename is still atomic, but a power loss may leave an
+                 empty file).
+    :return: Context manager giving the temporary file, opened in binary mode.
+    """
+    # Named per process, so two processes writing the same file do not share a temporary file
+    tmp_filename = f"{filename}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_filename, "wb") as file:
+            yield file
+            file.flush()
+            if sync:
+                os.fsync(file.fileno())
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
@@ -0,0 +1,183 @@
+"""
+Out-of-core sorting for JSON files holding a list of records (appointments.json, medical_histories.json).
+
+The input is parsed incrementally, so it is never loaded as a whole. Records are collected until
+their JSON text reaches the memory budget, sorted in memory and written to a temporary run file
+(one record per line). The runs are then k-way merged into the output, at most `fan_in` at a time.
+Records with equal keys keep their input order, like the in-memory sorts.
+
+Usage (from src):
+    python -m utils.external_sort appointments ../../appointments.json [--output FILE] [--memory-mb 64]
+    python -m utils.external_sort histories ../../medical_histories.json [--reverse]
+"""
+import argparse
+import heapq
+import json
+import os
+import tempfile
+
+from utils.serializer import get_serializer
+from utils.sorting import make_key
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024  # Bytes of input JSON per run
+DEFAULT_FAN_IN = 64  # Maximum number of runs merged at once (open files)
+
+
+def iter_json_array(filename, chunk_size=1 << 16):
+    """
+    Iterate over the elements of a JSON array file without loading the whole file.
+    :param filename: Path of the file.
+    :param chunk_size: Number of characters read at a time.
+    :return: Iterator of (element, length of its JSON text).
+    """
+    decoder = json.JSONDecoder()
+    with open(filename, "r") as file:
+        buffer, position, eof, started = "", 0, False, False
+        while True:
+            # Skip whitespace and separators between elements
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            element = end = None
+            if position < len(buffer):
+                if not started:
+                    if buffer[position] != "[":
+                        raise ValueError(f"{filename} does not contain a list of records.")
+                    started = True
+                    position += 1
+                    continue
+                if buffer[position] == "]":
+                    return
+                try:
+                    element, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                # An element running to the end of the buffer may continue in the next chunk
+                if end is not None and (end < len(buffer) or eof):
+                    yield element, end - position
+                    position = end
+                    continue
+            if eof:
+                raise ValueError(f"{filename} ends before the end of its list.")
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+
+
+def _write_run(records, directory, serializer):
+    dumps = serializer.compact().dumps
+    file = tempfile.NamedTemporaryFile("wb", dir=directory, suffix=".run", delete=False)
+    with file:
+        for record in records:
+            file.write(dumps(record))
+            file.write(b"\n")
+    return file.name
+
+
+def _read_run(filename, serializer):
+    with open(filename, "rb") as file:
+        for line in file:
+            yield serializer.loads(line)
+
+
+def _merge_runs(runs, key, reverse, directory, fan_in, serializer):
+    # Merge consecutive groups of runs until at most fan_in are left; ties stay in input order
+    while len(runs) > fan_in:
+        merged = []
+        for start in range(0, len(runs), fan_in):
+            group = [_read_run(filename, serializer) for filename in runs[start:start + fan_in]]
+            merged.append(_write_run(heapq.merge(*group, key=key, reverse=reverse), directory, serializer))
+            for filename in runs[start:start + fan_in]:
+                os.remove(filename)
+        runs = merged
+    return runs
+
+
+def _write_array(records, filename, serializer):
+    # Same layout as serializer.dump(list), written one record at a time
+    tmp_filename = filename + ".tmp"
+    if serializer.pretty:
+        indent = b" " * 4 if serializer.backend == "stdlib" else b" " * 2
+        separator, end = b"\n" + indent, b"\n]"
+    else:
+        indent, separator, end = b"", b"", b"]"
+    with open(tmp_filename, "wb") as file:
+        file.write(b"[")
+        first = True
+        for record in records:
+            file.write(separator if first else b"," + separator)
+            file.write(serializer.dumps(record).replace(b"\n", b"\n" + indent))
+            first = False
+        file.write(b"]" if first else end)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_filename, filename)
+
+
+def external_sort(input_filename, output_filename, key=None, reverse=False,
+                  memory_budget=DEFAULT_MEMORY_BUDGET, fan_in=DEFAULT_FAN_IN, tmp_dir=None, serializer=None):
+    """
+    Sort a JSON file holding a list of records with bounded memory.
+    The output is written like the storage writes its files and replaces output_filename
+    atomically, so the input and output may be the same file.
+    :param input_filename: Path of the JSON list to sort.
+    :param output_filename: Path of the sorted JSON list.
+    :param key: None, a function, a field name, or a list/tuple of them (see utils.sorting.make_key).
+    :param reverse: True for descending order.
+    :param memory_budget: Approximate number of bytes of input JSON sorted in memory at a time.
+    :param fan_in: Maximum number of runs merged at once.
+    :param tmp_dir: Directory for the run files (default: next to the output file).
+    :param serializer: Serializer for the output and the runs (default: utils.serializer.get_serializer()).
+    :return: Number of records sorted.
+    """
+    serializer = get_serializer() if serializer is None else serializer
+    key_of = make_key(key)
+    parent = tmp_dir or os.path.dirname(os.path.abspath(output_filename))
+    with tempfile.TemporaryDirectory(dir=parent, prefix="sort-") as directory:
+        runs = []
+        count = 0
+        chunk, chunk_bytes = [], 0
+        for record, size in iter_json_array(input_filename):
+            chunk.append(record)
+            chunk_bytes += size
+            if chunk_bytes >= memory_budget:
+                chunk.sort(key=key_of, reverse=reverse)
+                runs.append(_write_run(chunk, directory, serializer))
+                count += len(chunk)
+                chunk, chunk_bytes = [], 0
+        count += len(chunk)
+        chunk.sort(key=key_of, reverse=reverse)
+        if not runs:
+            # Everything fit within the budget
+            _write_array(chunk, output_filename, serializer)
+            return count
+        if chunk:
+            runs.append(_write_run(chunk, directory, serializer))
+        chunk = None
+        runs = _merge_runs(runs, key_of, reverse, directory, fan_in, serializer)
+        merged = heapq.merge(*(_read_run(filename, serializer) for filename in runs), key=key_of, reverse=reverse)
+        _write_array(merged, output_filename, serializer)
+        return count
+
+
+if __name__ == "__main__":
+    from appointmentSchedule.merge_sort import merge_sort_file
+    from medicalHistory.heap_sort import heap_sort_file
+    from storage.repository import appointment_order_key
+
+    parser = argparse.ArgumentParser(description="Sort a JSON data file with bounded memory.")
+    parser.add_argument("kind", choices=["appointments", "histories"])
+    parser.add_argument("input", help="JSON file holding a list of records.")
+    parser.add_argument("--output", help="Sorted file (default: replace the input).")
+    parser.add_argument("--memory-mb", type=float, default=DEFAULT_MEMORY_BUDGET / (1024 * 1024))
+    parser.add_argument("--reverse", action="store_true", help="Sort in descending order.")
+    args = parser.parse_args()
+
+    budget = int(args.memory_mb * 1024 * 1024)
+    output = args.output or args.input
+    if args.kind == "appointments":
+        # By date, then time, like the appointments view
+        count = merge_sort_file(args.input, output, key=appointment_order_key, reverse=args.reverse, memory_budget=budget)
+    else:
+        count = heap_sort_file(args.input, output, reverse=args.reverse, memory_budget=budget)
+    print(f"Sorted {count} {args.kind} into {output}")
@@ -0,0 +1,268 @@
+import os
+
+from utils.atomic import atomic_write
+from utils.locking import FileLock
+from utils.serializer import get_serializer
+from utils.vocabulary import VOCABULARY, decode_rows, encode_rows, is_encoded
+
+
+def _stat_signature(path):
+    # Identifies one version of a file; os.replace gives the file a new inode
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class JournalStore:
+    def __init__(self, filename, key, compact_every=None, terms=(), encode_terms=False, serializer=None, lock=None,
+                 vocabulary=None):
+        """
+        Journaled store for a JSON file holding a list of records.
+        The snapshot at `filename` keeps its usual format (a JSON list). Every mutation is
+        appended as a single line to `filename + ".journal"` and replayed on load, so a
+        write costs O(1) regardless of how many records the snapshot holds.
+        :param filename: Path of the JSON snapshot file.
+        :param key: Name of the field that uniquely identifies a record (e.g., 'appointmentID').
+        :param compact_every: Number of journal entries after which the journal is folded into
+                              the snapshot. By default this grows with the snapshot size, which
+                              keeps the cost of compaction amortized O(1) per mutation.
+        :param terms: Fields with repeated strings (e.g., 'doctorName'), interned in the vocabulary
+                      when loaded (see utils.vocabulary).
+        :param encode_terms: True to write the snapshot with those fields dictionary-encoded.
+                             Snapshots are read in either format.
+        :param serializer: Serializer for the snapshot (default: utils.serializer.get_serializer()).
+                           Journal lines and encoded snapshots are always written compact.
+        :param lock: FileLock to hold while writing (default: a new one on `filename + ".lock"`), e.g.,
+                     to keep one lock, and its counters, across reloads of the store.
+        :param vocabulary: Vocabulary the terms are interned in (default: utils.vocabulary.VOCABULARY).
+
+        Several processes may share the files: writes and compactions hold a lock on
+        `filename + ".lock"` and first catch up with the entries other processes appended (see sync).
+        """
+        self.filename = filename
+        self.journal_filename = filename + ".journal"
+        self.ids_filename = filename + ".ids"
+        self.key = key
+        self.compact_every = compact_every
+        self.terms = tuple(terms)
+        self.encode_terms = encode_terms
+        self.serializer = get_serializer() if serializer is None else serializer
+        self.lock = FileLock(filename + ".lock") if lock is None else lock
+        self.vocabulary = VOCABULARY if vocabulary is None else vocabulary
+        self.version = 0  # Incremented whenever sync() applies changes made by another process
+        self.loads = 0  # Incremented by every load(), e.g., after another process compacted
+        self.received = []  # Records put by journal entries read since the last load, in order
+        self._records = {}  # Records by key, in insertion order
+        self._journal_entries = 0  # Number of entries currently in the journal file
+        self._next_id = 1  # One past the highest integer key seen since load
+        self._snapshot = None  # Signature of the snapshot the records were loaded from
+        self._offset = 0  # Bytes of the journal applied so far
+
+    def exists(self):
+        """
+        Check whether a snapshot or a journal is present on disk.
+        :return: True if there is stored data, False otherwise.
+        """
+        return os.path.exists(self.filename) or os.path.exists(self.journal_filename)
+
+    def load(self):
+        """
+        Load the snapshot and replay the journal on top of it.
+        A truncated last journal line (e.g., after a crash mid-write) is ignored.
+        :return: List of records in insertion order.
+        """
+        self._records = {}
+        self._journal_entries = 0
+        self._next_id = 1
+        self._offset = 0
+        self.loads += 1
+        self.received = []
+
+        self._snapshot = _stat_signature(self.filename)
+        if self._snapshot is not None:
+            with open(self.filename, "rb") as file:
+                data = self.serializer.load(file)
+            if not isinstance(data, list) and not is_encoded(data):
+                raise ValueError(f"{self.filename} does not contain a list of records.")
+            for record in decode_rows(data, self.terms, self.vocabulary):
+                self._records[record.get(self.key)] = record
+                self._track_id(record.get(self.key))
+
+        self._read_journal()
+        return self.records()
+
+    def sync(self):
+        """
+        Catch up with the changes other processes made since the last load or sync.
+        New journal entries are read from where the last read stopped; if the snapshot was
+        replaced (another process compacted) everything is loaded again.
+        :return: True if anything changed, False otherwise.
+        """
+        journal_size = os.path.getsize(self.journal_filename) if os.path.exists(self.journal_filename) else 0
+        if _stat_signature(self.filename) != self._snapshot or journal_size < self._offset:
+            self.load()
+        elif journal_size == self._offset or not self._read_journal():
+            return False
+        self.version += 1
+        return True
+
+    def _read_journal(self):
+        # Apply the complete journal lines after self._offset; a line still being written
+        # (or cut short by a crash) is left for later
+        if not os.path.exists(self.journal_filename):
+            return 0
+        with open(self.journal_filename, "rb") as file:
+            file.seek(self._offset)
+            data = file.read()
+        end = data.rfind(b"\n") + 1
+        applied = 0
+        for line in data[:end].splitlines():
+            try:
+                entry = self.serializer.loads(line)
+            except ValueError:
+                continue  # Partially written entry
+            self._apply(entry)
+            if entry.get("op") == "put":
+                self.received.append(entry["record"])
+            self._journal_entries += 1
+            applied += 1
+        self._offset += end
+        return applied
+
+    def records(self):
+        """
+        Get the current records.
+        :return: List of records in insertion order.
+        """
+        return list(self._records.values())
+
+    def get(self, record_id):
+        """
+        Get a single record by its key.
+        :param record_id: Key value of the record.
+        :return: The record, or None if not found.
+        """
+        return self._records.get(record_id)
+
+    def next_id(self):
+        """
+        Get the next free integer key.
+        Keys are never reused within a session, even after the highest one is deleted.
+        :return: One more than the highest integer key stored so far.
+        """
+        return self._next_id
+
+    def reserve_ids(self, count=1):
+        """
+        Reserve consecutive integer keys that no other process sharing the files will get.
+        The highest reserved key is kept in `filename + ".ids"`, so keys reserved but not (yet)
+        stored are not handed out twice.
+        :param count: Number of keys.
+        :return: The first reserved key.
+        """
+        with self.lock:
+            self.sync()
+            first = self._next_id
+            if os.path.exists(self.ids_filename):
+                with open(self.ids_filename, "r") as file:
+                    first = max(first, int(file.read() or 0) + 1)
+            tmp_filename = self.ids_filename + ".tmp"
+            with open(tmp_filename, "w") as file:
+                file.write(str(first + count - 1))
+            os.replace(tmp_filename, self.ids_filename)
+            self._next_id = first + count
+            return first
+
+    def put(self, record):
+        """
+        Insert or replace a record.
+        :param record: Dictionary containing the record; must include the key field.
+        """
+        self.append([{"op": "put", "record": record}])
+
+    def delete(self, record_id):
+        """
+        Delete a record by its key.
+        :param record_id: Key value of the record to delete.
+        """
+        self.append([{"op": "delete", "key": record_id}])
+
+    def append(self, entries):
+        """
+        Apply a batch of journal entries and append them to the journal with a single write.
+        The write is flushed to disk (fsync) before this returns, so files written after it (e.g.,
+        the doctor schedule of a booking) never survive a crash that loses the entries.
+        :param entries: List of entries, either {"op": "put", "record": {...}} or {"op": "delete", "key": id}.
+        """
+        if not entries:
+            return
+        dumps = self.serializer.compact().dumps
+        lines = b"".join(dumps(entry) + b"\n" for entry in entries)
+        with self.lock:
+            self.sync()
+            with open(self.journal_filename, "ab") as file:
+                if file.tell() > self._offset:
+                    lines = b"\n" + lines  # End a line left unfinished by a crash
+                file.write(lines)
+                file.flush()
+                os.fsync(file.fileno())
+                self._offset = file.tell()
+            for entry in entries:
+                self._apply(entry)
+            self._journal_entries += len(entries)
+
+            if self._journal_entries >= self._compaction_threshold():
+                self.compact()
+
+    def replace_all(self, records):
+        """
+        Replace the whole content of the store and write it as a fresh snapshot.
+        :param records: List of records.
+        """
+        self._records = {record.get(self.key): record for record in records}
+        for record_id in self._records:
+            self._track_id(record_id)
+        self.compact()
+
+    def compact(self):
+        """
+        Fold the journal into the snapshot.
+        The snapshot is written to a temporary file and atomically swapped in before the
+        journal is removed, so a crash at any point leaves a loadable store.
+        """
+        with self.lock:
+            with atomic_write(self.filename) as file:
+                if self.encode_terms:
+                    self.serializer.compact().dump(encode_rows(self.records(), self.terms), file)
+                else:
+                    self.serializer.dump(self.records(), file)
+            if os.path.exists(self.journal_filename):
+                os.remove(self.journal_filename)
+            self._journal_entries = 0
+            self._snapshot = _stat_signature(self.filename)
+            self._offset = 0
+
+    def _compaction_threshold(self):
+        if self.compact_every is not None:
+            return self.compact_every
+        return max(1000, len(self._records))
+
+    def _track_id(self, record_id):
+        try:
+            self._next_id = max(self._next_id, int(record_id) + 1)
+        except (TypeError, ValueError):
+            pass  # Non-numeric keys do not take part in ID allocation
+
+    def _apply(self, entry):
+        op = entry.get("op")
+        if op == "put":
+            record = entry["record"]
+            for field in self.terms:
+                if field in record:
+                    record[field] = self.vocabulary.intern(record[field])
+            self._records[record.get(self.key)] = record
+            self._track_id(record.get(self.key))
+        elif op == "delete":
+            self._records.pop(entry.get("key"), None)
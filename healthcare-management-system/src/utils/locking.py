@@ -0,0 +1,74 @@
+"""
+Advisory file locks for coordinating processes that share the data files.
+
+Locks are taken with flock() on a separate '<file>.lock' file, so the data file itself can still be
+replaced atomically while the lock is held. On platforms without fcntl (Windows) the locks do
+nothing and the storage behaves as before: last writer wins.
+"""
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not POSIX
+    fcntl = None
+
+
+class FileLock:
+    def __init__(self, path):
+        """
+        Exclusive lock on a file, shared with every process that locks the same path.
+        The lock is reentrant within the process (not thread-safe): nested acquisitions only
+        count, and the lock is released by the outermost release.
+        :param path: Path of the lock file; created on first use.
+        """
+        self.path = path
+        self._file = None
+        self._depth = 0
+        self.acquisitions = 0  # Outermost acquisitions
+        self.contended = 0  # Of those, the ones that had to wait for another process
+        self.waited = 0.0  # Seconds spent waiting
+
+    def acquire(self):
+        """
+        Wait until the lock is free and take it.
+        """
+        if self._depth == 0 and fcntl is not None:
+            file = open(self.path, "a")
+            try:
+                try:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    start = time.perf_counter()
+                    fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+                    self.contended += 1
+                    self.waited += time.perf_counter() - start
+            except BaseException:
+                file.close()
+                raise
+            self._file = file
+            self.acquisitions += 1
+        self._depth += 1
+
+    def release(self):
+        """
+        Give the lock up (once per acquire).
+        """
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def stats(self):
+        """
+        Get the lock counters.
+        :return: Dictionary with the acquisitions, the contended ones and the seconds waited.
+        """
+        return {"acquisitions": self.acquisitions, "contended": self.contended, "waited": self.waited}
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
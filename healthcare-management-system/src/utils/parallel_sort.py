@@ -0,0 +1,53 @@
+"""
+Parallel sorting for large lists, using a process pool.
+
+Only the extracted keys are sent to the workers: each worker sorts the positions of one chunk
+by key and sends them back, and the sorted chunks are combined with a heap-based k-way merge.
+The items themselves (which may hold Doctor objects) never leave the process, and keys must be
+picklable (strings, numbers, tuples of them). The order is the same as utils.sorting.sort_items,
+including the order of equal keys.
+"""
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.sorting import make_key, sort_items
+
+# Below this many items, starting worker processes costs more than it saves
+# (see benchmarks/parallel_sort.py for the crossover on a given machine)
+PARALLEL_THRESHOLD = 200000
+
+
+def _argsort(keys, reverse):
+    # Runs in a worker: positions of the chunk in key order (stable)
+    return sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)
+
+
+def parallel_sort_items(items, key=None, reverse=False, workers=None, threshold=None, strategy="merge"):
+    """
+    Sort items in worker processes, falling back to a serial sort for small inputs.
+    :param items: Iterable of items to sort.
+    :param key: None, a function, a field name, or a list/tuple of them (see utils.sorting.make_key).
+    :param reverse: True for descending order.
+    :param workers: Number of worker processes (default: the number of CPUs).
+    :param threshold: Minimum number of items for the parallel path (default: PARALLEL_THRESHOLD).
+    :param strategy: Strategy of the serial path (see utils.sorting.STRATEGIES).
+    :return: A new sorted list.
+    """
+    items = list(items)
+    workers = workers or os.cpu_count() or 1
+    threshold = PARALLEL_THRESHOLD if threshold is None else threshold
+    if len(items) < threshold or workers < 2:
+        return sort_items(items, key=key, reverse=reverse, strategy=strategy)
+
+    key_of = make_key(key)
+    keys = [key_of(item) for item in items]
+    size = -(-len(keys) // workers)  # One chunk per worker
+    offsets = range(0, len(keys), size)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        orders = list(pool.map(_argsort, (keys[offset:offset + size] for offset in offsets),
+                               [reverse] * len(offsets)))
+
+    # Chunks are merged in input order and heapq.merge prefers earlier inputs on ties, so the sort is stable
+    runs = [map(offset.__add__, order) for offset, order in zip(offsets, orders)]
+    return [items[position] for position in heapq.merge(*runs, key=keys.__getitem__, reverse=reverse)]
@@ -0,0 +1,111 @@
+"""
+JSON serialization for every file and column the application writes.
+
+A Serializer pairs a backend with a mode:
+    backend  'stdlib' (the json module) or 'orjson' (faster, used by 'auto' when installed)
+    mode     'compact' (no whitespace, the default) or 'pretty' (indented, for reading by eye)
+Both backends write plain JSON, so a file written by one is read by the other, and files written
+in either mode are read the same way. orjson only indents by two spaces; stdlib pretty output keeps
+the four-space layout of the original files.
+
+The serializer used when none is passed is chosen with the MEDITRACK_JSON_BACKEND ('auto',
+'stdlib' or 'orjson') and MEDITRACK_JSON_MODE ('compact' or 'pretty') environment variables.
+"""
+import json
+import os
+
+BACKENDS = ("auto", "stdlib", "orjson")
+MODES = ("compact", "pretty")
+
+_default = None
+
+
+class Serializer:
+    def __init__(self, backend="auto", mode="compact"):
+        """
+        Create a serializer.
+        :param backend: 'auto' (orjson if installed, else stdlib), 'stdlib' or 'orjson'.
+        :param mode: 'compact' or 'pretty'.
+        :raises ValueError: For an unknown backend or mode.
+        :raises ImportError: If 'orjson' is asked for and is not installed.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown JSON backend: {backend}")
+        if mode not in MODES:
+            raise ValueError(f"Unknown JSON mode: {mode}")
+        self.mode = mode
+        self._orjson = None
+        if backend != "stdlib":
+            try:
+                import orjson
+                self._orjson = orjson
+            except ImportError:
+                if backend == "orjson":
+                    raise
+        self.backend = "orjson" if self._orjson else "stdlib"
+        if self._orjson:
+            # Integer keys (e.g., patient IDs) are written as strings, as the json module does
+            self._options = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if self.pretty else 0)
+        elif self.pretty:
+            self._options = {"indent": 4}
+        else:
+            self._options = {"separators": (",", ":")}
+
+    @property
+    def pretty(self):
+        return self.mode == "pretty"
+
+    def dumps(self, data):
+        """
+        Serialize a value.
+        :param data: A JSON-compatible value.
+        :return: The JSON text as bytes (UTF-8).
+        """
+        if self._orjson:
+            return self._orjson.dumps(data, option=self._options)
+        return json.dumps(data, **self._options).encode()
+
+    def loads(self, text):
+        """
+        Parse JSON text.
+        :param text: str or bytes.
+        :return: The parsed value.
+        """
+        if self._orjson:
+            return self._orjson.loads(text)
+        return json.loads(text)
+
+    def dump(self, data, file):
+        """
+        Write a value to a file opened in binary mode.
+        """
+        file.write(self.dumps(data))
+
+    def load(self, file):
+        """
+        Read a value from a file opened in binary (or text) mode.
+        """
+        return self.loads(file.read())
+
+    def compact(self):
+        """
+        Get a serializer with the same backend in compact mode (e.g., for one-line journal entries).
+        """
+        return self if not self.pretty else Serializer(self.backend, "compact")
+
+    def __repr__(self):
+        return f"Serializer({self.backend!r}, {self.mode!r})"
+
+
+def get_serializer():
+    """
+    Get the serializer selected by MEDITRACK_JSON_BACKEND and MEDITRACK_JSON_MODE (read once).
+    :return: A Serializer.
+    """
+    global _default
+    if _default is None:
+        _default = Serializer(
+            os.environ.get("MEDITRACK_JSON_BACKEND", "auto"),
+            os.environ.get("MEDITRACK_JSON_MODE", "compact"),
+        )
+    return _default
@@ -0,0 +1,158 @@
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+from utils.sorting import make_key
+
+
+class SortedCollection:
+    def __init__(self, items=(), key=None, bucket_size=512):
+        """
+        Collection that keeps its items ordered by key as they are added and removed.
+        Items are kept in buckets of at most 2 * bucket_size, so an insert or removal is a binary
+        search plus a short list shift instead of a full sort. Items with equal keys stay in the
+        order they were added, and iteration is a plain linear walk.
+        :param items: Initial items (sorted once).
+        :param key: None, a function, a field name, or a list/tuple of them (see utils.sorting.make_key).
+        :param bucket_size: Target number of items per bucket.
+        """
+        self.key = make_key(key)
+        self.bucket_size = bucket_size
+        self._keys = []  # Buckets of keys, each sorted
+        self._items = []  # Buckets of items, parallel to self._keys
+        self._maxes = []  # Last key of every bucket
+        self._key_of = {}  # id(item) -> key it was placed with, so mutated items can still be found
+        self._length = 0
+        self.extend(items)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for bucket in self._items:
+            yield from bucket
+
+    def __reversed__(self):
+        for bucket in reversed(self._items):
+            yield from reversed(bucket)
+
+    def __contains__(self, item):
+        return id(item) in self._key_of
+
+    def extend(self, items):
+        """
+        Add many items. An empty collection is built with a single sort.
+        :param items: Iterable of items.
+        """
+        items = list(items)
+        if self._length or not items:
+            for item in items:
+                self.add(item)
+            return
+        keyed = sorted(((self.key(item), item) for item in items), key=itemgetter(0))  # Stable
+        for start in range(0, len(keyed), self.bucket_size):
+            chunk = keyed[start:start + self.bucket_size]
+            self._keys.append([key for key, _ in chunk])
+            self._items.append([item for _, item in chunk])
+            self._maxes.append(chunk[-1][0])
+        self._key_of = {id(item): key for key, item in keyed}
+        self._length = len(keyed)
+
+    def add(self, item):
+        """
+        Insert an item after the items with an equal key.
+        :param item: The item.
+        """
+        key = self.key(item)
+        if not self._maxes:
+            self._keys.append([key])
+            self._items.append([item])
+            self._maxes.append(key)
+        else:
+            index = min(bisect_right(self._maxes, key), len(self._maxes) - 1)
+            keys = self._keys[index]
+            position = bisect_right(keys, key)
+            keys.insert(position, key)
+            self._items[index].insert(position, item)
+            self._maxes[index] = keys[-1]
+            if len(keys) > 2 * self.bucket_size:
+                self._split(index)
+        self._key_of[id(item)] = key
+        self._length += 1
+
+    def remove(self, item):
+        """
+        Remove an item (compared by identity), using the key it was added with.
+        :param item: The item.
+        :raise ValueError: If the item is not in the collection.
+        """
+        if id(item) not in self._key_of:
+            raise ValueError("Item not in the collection.")
+        key = self._key_of[id(item)]
+        index = bisect_left(self._maxes, key)
+        # Equal keys may span several buckets
+        while index < len(self._maxes):
+            keys, items = self._keys[index], self._items[index]
+            for position in range(bisect_left(keys, key), bisect_right(keys, key)):
+                if items[position] is item:
+                    self._delete(index, position)
+                    del self._key_of[id(item)]
+                    return
+            if self._maxes[index] != key:
+                break
+            index += 1
+        raise ValueError("Item not in the collection.")
+
+    def discard(self, item):
+        """
+        Remove an item if it is in the collection.
+        :param item: The item.
+        """
+        if item in self:
+            self.remove(item)
+
+    def update(self, item):
+        """
+        Move an item to its new place after its key changed (e.g., the item was modified in place).
+        :param item: The item; added if it is not in the collection yet.
+        """
+        self.discard(item)
+        self.add(item)
+
+    def irange(self, low, high):
+        """
+        Iterate over the items whose keys are within a range.
+        :param low: Lowest key, inclusive.
+        :param high: Highest key, inclusive.
+        """
+        index = bisect_left(self._maxes, low)
+        while index < len(self._maxes):
+            keys, items = self._keys[index], self._items[index]
+            for position in range(bisect_left(keys, low), len(keys)):
+                if keys[position] > high:
+                    return
+                yield items[position]
+            index += 1
+
+    def clear(self):
+        """
+        Remove every item.
+        """
+        self._keys, self._items, self._maxes, self._key_of = [], [], [], {}
+        self._length = 0
+
+    def _split(self, index):
+        keys, items = self._keys[index], self._items[index]
+        half = len(keys) // 2
+        self._keys[index:index + 1] = [keys[:half], keys[half:]]
+        self._items[index:index + 1] = [items[:half], items[half:]]
+        self._maxes[index:index + 1] = [keys[half - 1], keys[-1]]
+
+    def _delete(self, index, position):
+        keys, items = self._keys[index], self._items[index]
+        del keys[position]
+        del items[position]
+        self._length -= 1
+        if keys:
+            self._maxes[index] = keys[-1]
+        else:
+            del self._keys[index], self._items[index], self._maxes[index]
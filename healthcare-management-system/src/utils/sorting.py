@@ -0,0 +1,107 @@
+"""
+Key-aware sorting shared by patient records, medical histories and appointments.
+
+Every strategy computes each element's key exactly once, sorts the cached keys together with
+the element positions, and returns a new list. All strategies are stable: elements with equal
+keys keep their original relative order (also when reverse=True, like sorted()).
+
+Strategies:
+- "merge": natural merge sort (CPython's Timsort).
+- "heap": binary heap built and drained with heapq.
+- "quick": iterative three-way quicksort with order-preserving partitions.
+"""
+import heapq
+
+
+def field_key(name):
+    """
+    Build a key function for a field of dictionaries (or an attribute of objects).
+    :param name: Field or attribute name, e.g., 'Date'.
+    """
+    def key(item):
+        if isinstance(item, dict):
+            return item[name]
+        return getattr(item, name)
+    return key
+
+
+def make_key(key):
+    """
+    Normalize a key specification into a single key function.
+    :param key: None (the elements themselves), a function, a field name, or a list/tuple of
+                functions and field names for multi-key sorting.
+    :return: A key function.
+    """
+    if key is None:
+        return lambda item: item
+    if isinstance(key, str):
+        return field_key(key)
+    if isinstance(key, (list, tuple)):
+        keys = [make_key(k) for k in key]
+        return lambda item: tuple(k(item) for k in keys)
+    return key
+
+
+def _merge(decorated):
+    decorated.sort()
+    return decorated
+
+
+def _heap(decorated):
+    heapq.heapify(decorated)
+    return [heapq.heappop(decorated) for _ in range(len(decorated))]
+
+
+def _quick(decorated):
+    # Iterative: partitions still to sort are kept on an explicit stack instead of recursing.
+    # Partitions are built in input order, so elements equal to the pivot are already in place.
+    result = []
+    stack = [(decorated, False)]
+    while stack:
+        part, done = stack.pop()
+        if not done and len(part) > 16:
+            pivot = part[len(part) // 2][0]
+            left = [d for d in part if d[0] < pivot]
+            middle = [d for d in part if d[0] == pivot]
+            right = [d for d in part if d[0] > pivot]
+            # Pushed in reverse so that left is emitted first
+            stack.append((right, False))
+            stack.append((middle, True))
+            stack.append((left, False))
+            continue
+        if not done:
+            part.sort()
+        result.extend(part)
+    return result
+
+
+STRATEGIES = {
+    "merge": _merge,
+    "heap": _heap,
+    "quick": _quick,
+}
+
+
+def sort_items(items, key=None, reverse=False, strategy="merge"):
+    """
+    Sort items with a chosen strategy, computing each key once.
+    :param items: Iterable of items to sort.
+    :param key: None, a function, a field name, or a list/tuple of them (see make_key).
+    :param reverse: True for descending order.
+    :param strategy: One of STRATEGIES ('merge', 'heap' or 'quick').
+    :return: A new sorted list.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown sort strategy: {strategy}")
+    items = list(items)
+    key_of = make_key(key)
+    # Positions break ties, so equal keys keep their order and items are never compared
+    if reverse:
+        # Descending positions in ascending order, so strategies see tie-breakers already sorted
+        decorated = [(key_of(items[position]), -position) for position in range(len(items) - 1, -1, -1)]
+    else:
+        decorated = [(key_of(item), position) for position, item in enumerate(items)]
+    ordered = STRATEGIES[strategy](decorated)
+    if reverse:
+        return [items[-position] for _, position in reversed(ordered)]
+    return [items[position] for _, position in ordered]
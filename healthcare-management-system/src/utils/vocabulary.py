@@ -0,0 +1,226 @@
+"""
+Dictionary encoding for repeated strings: doctor and patient names, diagnoses, medications, allergies.
+
+A Vocabulary keeps one canonical copy of every distinct value and gives values small integer codes
+when they are encoded. In memory, rows hold the canonical string (intern), not a code, so a name
+repeated in a million rows is stored once; a slot holding the shared string costs the same pointer
+as one holding a shared code, and displaying it needs no lookup. Lookups such as
+PatientRecordManager.where still compare strings, but a value that was never interned is known to
+match nothing without a scan, and Python's string comparison returns at once for the rows holding
+the canonical copy (the same object).
+
+Each repository has a vocabulary of its own (Repository.vocabulary), shared with the managers
+working on it, so the values are released with the repository. A vocabulary also stops taking new
+values at max_size; values beyond it are kept as they are, just not shared.
+
+On disk, encode_rows() replaces the values of the given fields by their codes and stores the
+vocabulary once at the top of the file:
+    {"vocabulary": ["Dr. Smith", ...], "fields": ["doctorName", ...], "rows": [{"doctorName": 0, ...}]}
+Values of those fields that are not strings are kept as {"value": ...}.
+decode_rows() turns such a file (or a plain JSON list, returned as is) back into rows.
+"""
+
+# Distinct values a vocabulary interns; free-text values beyond it are left unshared
+DEFAULT_MAX_SIZE = 100000
+
+
+class Vocabulary:
+    def __init__(self, values=(), max_size=DEFAULT_MAX_SIZE):
+        """
+        Set of canonical strings, with consecutive integer codes (0, 1, 2, ...) given out on demand.
+        Interning only keeps the canonical copy; a value gets its code when it is first encoded.
+        :param values: Optional values to encode in order, e.g., a vocabulary read from a file.
+        :param max_size: Number of distinct values after which intern() adds no more (None: no limit).
+                         Encoding is not limited: every encoded value needs its code.
+        """
+        self.max_size = max_size
+        self._canonical = {}  # value -> canonical copy of it
+        self._codes = {}  # canonical value -> code
+        self._values = []  # code -> canonical value
+        for value in values:
+            self.encode(value)
+
+    @property
+    def full(self):
+        """
+        True once intern() adds no more values, so a value missing from the vocabulary may still
+        be held (unshared) by some row.
+        """
+        return self.max_size is not None and len(self._canonical) >= self.max_size
+
+    def encode(self, value):
+        """
+        Get the code of a value, adding the value if it is new.
+        :param value: A string.
+        :return: The code (int).
+        """
+        code = self._codes.get(value)
+        if code is None:
+            value = self._canonical.setdefault(value, value)
+            code = self._codes[value] = len(self._values)
+            self._values.append(value)
+        return code
+
+    def decode(self, code):
+        """
+        Get the value of a code (the reverse lookup, e.g., for display).
+        :param code: A code returned by encode.
+        :return: The value.
+        """
+        return self._values[code]
+
+    def code_of(self, value):
+        """
+        Look up the code of a value without giving it one.
+        :return: The code, or None if the value was never encoded (interning alone gives no code).
+        """
+        return self._codes.get(value)
+
+    def intern(self, value):
+        """
+        Get the canonical copy of a string, adding it if it is new and the vocabulary is not full.
+        Lists are interned element by element (in place); other values are returned unchanged.
+        :param value: A string, a list of strings, or any other value.
+        :return: The canonical value.
+        """
+        if type(value) is str:
+            return self._canonical.get(value) or self._add(value)
+        if type(value) is list:
+            get = self._canonical.get
+            for position, item in enumerate(value):
+                if type(item) is str:
+                    value[position] = get(item) or self._add(item)
+        return value
+
+    def canonical(self, value):
+        """
+        Get the canonical copy of a string without adding it.
+        :return: The canonical value, or None if the value is not in the vocabulary.
+        """
+        return self._canonical.get(value)
+
+    def intern_rows(self, rows, fields):
+        """
+        Intern the given fields of a list of dictionaries, in place.
+        :param rows: List of dictionaries.
+        :param fields: Names of the fields holding strings or lists of strings.
+        :return: The rows.
+        """
+        # intern() inlined: this runs for every value of every loaded row
+        get, add = self._canonical.get, self._add
+        for row in rows:
+            for field in fields:
+                value = row.get(field)
+                if type(value) is str:
+                    row[field] = get(value) or add(value)
+                elif type(value) is list:
+                    # In place: new lists would trigger garbage collections over the loaded rows
+                    for position, item in enumerate(value):
+                        if type(item) is str:
+                            value[position] = get(item) or add(item)
+        return rows
+
+    def _add(self, value):
+        # Called when get() found nothing, or found the (falsy) empty string
+        canonical = self._canonical.get(value)
+        if canonical is not None:
+            return canonical
+        if not self.full:
+            self._canonical[value] = value
+        return value
+
+    def values(self):
+        """
+        Get every value that has a code, in code order (what encode_rows writes to disk).
+        """
+        return list(self._values)
+
+    def __len__(self):
+        return len(self._canonical)
+
+    def __contains__(self, value):
+        return value in self._canonical
+
+
+# Used by the managers and stores created without a repository (or vocabulary) of their own
+VOCABULARY = Vocabulary()
+
+
+def _repeats(rows, field):
+    # True if the strings of a field repeat enough for codes to be shorter than the values
+    seen, total = set(), 0
+    for row in rows:
+        value = row.get(field)
+        for item in (value if isinstance(value, list) else (value,)):
+            if isinstance(item, str):
+                seen.add(item)
+                total += 1
+    return 0 < len(seen) * 2 <= total
+
+
+def encode_rows(rows, fields):
+    """
+    Encode the given fields of a list of dictionaries for writing to disk.
+    Fields whose values are mostly distinct (e.g., patient names in a small file) are left as they
+    are. The file gets a vocabulary of its own, so it can be read without the process that wrote it.
+    :param rows: List of dictionaries.
+    :param fields: Names of the fields holding strings or lists of strings.
+    :return: Dictionary with the vocabulary, the encoded fields and the encoded rows.
+    """
+    fields = [field for field in fields if _repeats(rows, field)]
+    vocabulary = Vocabulary(max_size=None)
+    encode = vocabulary.encode
+
+    def encode_value(value):
+        # Strings become codes; anything else is wrapped so it cannot be mistaken for a code
+        if isinstance(value, str):
+            return encode(value)
+        if isinstance(value, list):
+            return [encode_value(item) for item in value]
+        return {"value": value}
+
+    encoded = []
+    for row in rows:
+        row = dict(row)
+        for field in fields:
+            if field in row:
+                row[field] = encode_value(row[field])
+        encoded.append(row)
+    return {"vocabulary": vocabulary.values(), "fields": fields, "rows": encoded}
+
+
+def decode_rows(data, fields=(), vocabulary=None):
+    """
+    Decode what encode_rows wrote, interning the decoded values.
+    :param data: Parsed JSON: the encoded dictionary, or a plain list of rows.
+    :param fields: Fields to intern (the encoded ones are interned anyway).
+    :param vocabulary: Vocabulary to intern the values in (default: VOCABULARY).
+    :return: List of dictionaries.
+    """
+    if vocabulary is None:
+        vocabulary = VOCABULARY
+    if isinstance(data, list):
+        return vocabulary.intern_rows(data, fields)
+    values = [vocabulary.intern(value) for value in data["vocabulary"]]
+
+    def decode_value(value):
+        if isinstance(value, int):
+            return values[value]
+        if isinstance(value, list):
+            return [decode_value(item) for item in value]
+        return value["value"]
+
+    encoded = data["fields"]
+    rows = data["rows"]
+    for row in rows:
+        for field in encoded:
+            if field in row:
+                row[field] = decode_value(row[field])
+    return vocabulary.intern_rows(rows, [field for field in fields if field not in encoded])
+
+
+def is_encoded(data):
+    """
+    Check whether parsed JSON was written by encode_rows.
+    """
+    return isinstance(data, dict) and "vocabulary" in data and "rows" in data
@@ -0,0 +1,90 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from Users.Doctors import DEFAULT_WEEKLY_HOURS, Doctor
+from storage.archive import archive_doctor, archive_schedules, archived_day
+from storage.cache import DataCache
+from storage.repository import JsonRepository
+from storage.sqlite_repository import SQLiteRepository
+
+CUTOFF = "2025-01-01"
+SCHEDULE = {
+    "2023-12-29": [[9], [9]],
+    "2024-03-04": [[9, 10], [10]],
+    "2024-12-31": [[], []],  # A day off, against the weekly hours
+    "2025-01-06": [[9, 10, 11], [11]],
+}
+
+
+def open_storage(root, storage):
+    if storage == "json":
+        return JsonRepository(root, cache=DataCache())
+    return SQLiteRepository(os.path.join(root, "test.db"))
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def storage(request, tmp_path):
+    repository = open_storage(str(tmp_path), request.param)
+    repository.save_doctor(Doctor(1, "Dr. Smith", SCHEDULE, DEFAULT_WEEKLY_HOURS))
+    repository.close()
+    return str(tmp_path), request.param
+
+
+def test_archive_before_moves_the_past_dates():
+    doctor = Doctor(1, "Dr. Smith", SCHEDULE, DEFAULT_WEEKLY_HOURS)
+    assert doctor.freeSlots("2024-03-04") == (9,)
+    removed = doctor.archiveBefore(CUTOFF)
+    assert removed == {date_key: hours for date_key, hours in SCHEDULE.items() if date_key < CUTOFF}
+    assert list(doctor.daysWorking) == ["2025-01-06"]
+    assert doctor.archivedBefore == CUTOFF
+    # Archived dates have no hours here, whatever the weekly hours say
+    for date_key in ("2024-03-04", "2024-03-05"):
+        assert doctor.freeSlots(date_key) == ()
+        assert not doctor.checkAvailability(date_key, 9)
+        assert not doctor.bookHour(date_key, 9)
+    assert doctor.freeSlots("2025-01-07") == tuple(DEFAULT_WEEKLY_HOURS["Tuesday"])
+
+    assert doctor.archiveBefore("2024-06-01") == {}  # An earlier cutoff keeps the later one
+    assert doctor.archivedBefore == CUTOFF
+
+
+def test_archived_dates_leave_the_live_schedule(storage):
+    root, backend = storage
+    repository = open_storage(root, backend)
+    assert archive_doctor(repository, repository.get_doctor(1), before=CUTOFF) == 3
+    repository.close()
+
+    stored = open_storage(root, backend)
+    doctor = stored.get_doctor(1)
+    assert list(doctor.daysWorking) == ["2025-01-06"]
+    assert doctor.archivedBefore == CUTOFF
+    assert doctor.freeSlots("2024-03-04") == ()
+    assert doctor.freeSlots("2025-01-06") == (9, 10)
+    if backend == "json":
+        with open(os.path.join(root, "doctor_1.json")) as file:
+            assert list(json.load(file)["daysWorking"]) == ["2025-01-06"]
+        with gzip.open(os.path.join(root, "archive", "doctor_1_2024.json.gz")) as file:
+            assert sorted(json.load(file)) == ["2024-03-04", "2024-12-31"]
+
+    assert stored.archived_years(1) == [2023, 2024]
+    assert archived_day(stored, 1, "2024-03-04") == [[9, 10], [10]]
+    assert archived_day(stored, 1, "2024-12-31") == [[], []]
+    assert archived_day(stored, 1, "2023-12-29") == [[9], [9]]
+    assert archived_day(stored, 1, "2024-03-05") is None  # Never stored
+
+
+def test_archiving_again_merges_into_the_same_year(storage):
+    root, backend = storage
+    repository = open_storage(root, backend)
+    assert archive_schedules(repository, before="2024-06-01") == {1: 2}
+    doctor = repository.get_doctor(1)
+    assert archive_doctor(repository, doctor, before=CUTOFF) == 1
+    assert archive_doctor(repository, doctor, before=CUTOFF) == 0
+    repository.close()
+
+    stored = open_storage(root, backend)
+    assert sorted(stored.archived_days(1, 2024)) == ["2024-03-04", "2024-12-31"]
+    assert list(stored.get_doctor(1).daysWorking) == ["2025-01-06"]
@@ -0,0 +1,46 @@
+import gc
+import weakref
+
+from Users.Doctors import Doctor
+from appointmentSchedule.availability import earliest_slots
+
+START = "2025-06-02"  # A Monday
+
+
+def make_doctor(doctor_id):
+    # Doctor n works one hour, n days after START
+    day = f"2025-06-{2 + doctor_id % 20:02d}"
+    return Doctor(doctor_id, f"Dr. {doctor_id}", {day: [[9 + doctor_id % 3, 15], []]})
+
+
+def brute_force(doctors, k):
+    slots = [(day, hour, order) for order, doctor in enumerate(doctors)
+             for day, hour in doctor.iterFreeSlots(START, 0, "2025-07-01")]
+    return [(day, hour, doctors[order]) for day, hour, order in sorted(slots)[:k]]
+
+
+def test_matches_a_full_sort_with_ties_in_doctor_order():
+    doctors = [make_doctor(doctor_id) for doctor_id in range(60)]
+    for k in (0, 1, 5, 50, 200):
+        assert earliest_slots(doctors, k, start_date=START, days=30) == brute_force(doctors, k)
+
+
+def test_doctors_are_consumed_one_at_a_time_and_only_k_are_kept():
+    alive = weakref.WeakSet()
+    built = []
+
+    def doctors():
+        for doctor_id in range(100):
+            doctor = make_doctor(doctor_id)
+            alive.add(doctor)
+            built.append(doctor_id)
+            yield doctor
+            del doctor
+            gc.collect()
+            assert len(alive) <= 4  # The 3 kept so far and the one just looked at
+
+    slots = earliest_slots(doctors(), 3, start_date=START, days=30)
+    assert built == list(range(100))  # Each doctor built once, in order
+    assert [(day, hour, doctor.DoctorID) for day, hour, doctor in slots] == [
+        ("2025-06-02", 9, 0), ("2025-06-02", 9, 60), ("2025-06-02", 10, 40)
+    ]
@@ -0,0 +1,90 @@
+import os
+
+from Users.Doctors import Doctor
+from storage.cache import DataCache
+from storage.repository import JsonRepository
+
+
+class CountingLoader:
+    def __init__(self, path):
+        self.path = path
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        with open(self.path) as file:
+            return file.read()
+
+
+def write(path, text, mtime_ns=None):
+    with open(path, "w") as file:
+        file.write(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_unchanged_file_is_not_read_again(tmp_path):
+    path = str(tmp_path / "data.json")
+    write(path, "[1]")
+    cache, loader = DataCache(), CountingLoader(path)
+    for _ in range(3):
+        assert cache.get(path, loader) == "[1]"
+    assert loader.calls == 1
+    assert cache.stats() == {"hits": 2, "misses": 1, "reloads": 0, "entries": 1}
+
+
+def test_changed_mtime_reloads(tmp_path):
+    path = str(tmp_path / "data.json")
+    write(path, "[1]", mtime_ns=1_000_000_000)
+    cache, loader = DataCache(), CountingLoader(path)
+    cache.get(path, loader)
+    write(path, "[2]", mtime_ns=2_000_000_000)  # Same size
+    assert cache.get(path, loader) == "[2]"
+    assert loader.calls == 2 and cache.reloads == 1
+
+
+def test_changed_size_reloads(tmp_path):
+    path = str(tmp_path / "data.json")
+    write(path, "[1]", mtime_ns=1_000_000_000)
+    cache, loader = DataCache(), CountingLoader(path)
+    cache.get(path, loader)
+    write(path, "[1, 2]", mtime_ns=1_000_000_000)  # Same mtime, e.g., within one clock tick
+    assert cache.get(path, loader) == "[1, 2]"
+    assert loader.calls == 2
+
+
+def test_any_of_several_paths_invalidates(tmp_path):
+    main, journal = str(tmp_path / "data.json"), str(tmp_path / "data.json.journal")
+    write(main, "[1]")
+    cache, loader = DataCache(), CountingLoader(main)
+    cache.get(main, loader, paths=[main, journal])  # The journal does not exist yet
+    cache.get(main, loader, paths=[main, journal])
+    write(journal, "{}")
+    cache.get(main, loader, paths=[main, journal])
+    assert loader.calls == 2
+
+
+def test_written_through_values_are_not_read_back(tmp_path):
+    path = str(tmp_path / "data.json")
+    cache, loader = DataCache(), CountingLoader(path)
+    cache.put(path, "[3]", writer=lambda: write(path, "[3]"))
+    assert cache.get(path, loader) == "[3]"
+    assert loader.calls == 0
+
+    with open(path, "a") as file:
+        file.write(" ")  # Written in place by the owner of the value
+    cache.refresh(path)
+    assert cache.get(path, loader) == "[3]"
+    assert loader.calls == 0
+
+    cache.invalidate(path)
+    assert cache.get(path, loader) == "[3] "
+    assert loader.calls == 1 and cache.misses == 1
+
+
+def test_repository_loads_a_doctor_once(tmp_path):
+    JsonRepository(str(tmp_path), cache=DataCache()).save_doctor(Doctor(1, "Dr. Smith", {}))
+    repository = JsonRepository(str(tmp_path), cache=DataCache())
+    assert repository.get_doctor(1) is repository.get_doctor(1)
+    stats = repository.cache.stats()
+    assert (stats["misses"], stats["reloads"]) == (1, 0) and stats["hits"] >= 1
@@ -0,0 +1,91 @@
+import pytest
+
+from Users import Doctors
+from Users.Doctors import Doctor
+
+DATE = "2025-01-06"  # A Monday
+
+
+def test_days_working_is_a_live_read_only_view():
+    doctor = Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={DATE: [[9, 10], []]})
+    view = doctor.daysWorking
+    assert doctor.bookHour(DATE, 9)
+    assert view[DATE] == ((9, 10), (9,))
+    with pytest.raises(TypeError):
+        view[DATE] = [[9], []]
+
+
+def test_get_days_working_is_a_copy():
+    doctor = Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={DATE: [[9, 10], []]})
+    copy = doctor.getDaysWorking()
+    copy[DATE][1].append(10)
+    assert doctor.checkAvailability(DATE, 10)
+    assert doctor.to_dict()["daysWorking"] == {DATE: [[9, 10], []]}
+
+
+@pytest.mark.parametrize("hour", ["10", 10.0, None, -1, 24, 10 ** 9])
+def test_hours_that_are_not_hours_of_the_day_are_not_available(hour):
+    doctor = Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={DATE: [[9, 10, 11], [9]]})
+    assert doctor.checkAvailability(DATE, hour) is False
+    assert doctor.bookHour(DATE, hour) is False
+    assert doctor.releaseHour(DATE, hour) is False
+    assert doctor.checkAvailability(DATE, 10) and not doctor.checkAvailability(DATE, 9)
+
+
+def cached_doctor():
+    # A doctor whose free hours on DATE (stored) and the next day (weekly hours) are cached
+    doctor = Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={DATE: [[9, 10, 11], []]},
+                    weeklyHours={"Monday": [9], "Tuesday": [9, 10]})
+    assert doctor.freeSlots(DATE) == (9, 10, 11)
+    assert doctor.freeSlots("2025-01-07") == (9, 10)
+    return doctor
+
+
+def test_book_hour_clears_the_cached_free_slots():
+    doctor = cached_doctor()
+    assert doctor.bookHour(DATE, 10)
+    assert doctor.freeSlots(DATE) == (9, 11)
+    assert doctor.bookHour("2025-01-07", 9)  # A date of the weekly hours
+    assert doctor.freeSlots("2025-01-07") == (10,)
+    assert not doctor.bookHour(DATE, 10)
+
+
+def test_release_hour_clears_the_cached_free_slots():
+    doctor = cached_doctor()
+    doctor.bookHour(DATE, 10)
+    assert doctor.freeSlots(DATE) == (9, 11)
+    assert doctor.releaseHour(DATE, 10)
+    assert doctor.freeSlots(DATE) == (9, 10, 11)
+
+
+def test_set_weekly_hours_clears_the_cached_free_slots():
+    doctor = cached_doctor()
+    doctor.setWeeklyHours({"Tuesday": [14]})
+    assert doctor.freeSlots("2025-01-07") == (14,)
+    assert doctor.freeSlots(DATE) == (9, 10, 11)  # Stored dates keep their own hours
+
+
+def test_refresh_from_clears_the_cached_free_slots():
+    doctor = cached_doctor()
+    stored = Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={DATE: [[9, 10, 11], [9, 11]]},
+                    weeklyHours={"Tuesday": [15]})
+    doctor.refreshFrom(stored)  # E.g., another process booked in the meantime
+    assert doctor.freeSlots(DATE) == (10,)
+    assert doctor.freeSlots("2025-01-07") == (15,)
+
+
+def test_archive_before_clears_the_cached_free_slots():
+    doctor = cached_doctor()
+    doctor.archiveBefore("2025-01-08")
+    assert doctor.freeSlots(DATE) == ()
+    assert doctor.freeSlots("2025-01-07") == ()
+    assert not doctor.checkAvailability(DATE, 9)
+
+
+def test_free_slots_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(Doctors, "FREE_SLOTS_CACHE_SIZE", 3)
+    doctor = cached_doctor()
+    for day in range(8, 13):
+        doctor.freeSlots(f"2025-01-{day:02d}")
+    assert len(doctor._freeSlots) <= 3
+    assert doctor.freeSlots(DATE) == (9, 10, 11)
@@ -0,0 +1,90 @@
+import json
+import os
+import random
+
+import pytest
+
+from medicalHistory.heap_sort import heap_sort, heap_sort_file
+from utils.external_sort import external_sort, iter_json_array
+
+
+def write_list(path, rows, indent=None):
+    with open(path, "w") as file:
+        json.dump(rows, file, indent=indent)
+    return str(path)
+
+
+def read_list(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def make_rows(count=300, seed=0):
+    rng = random.Random(seed)
+    # Few distinct keys, so stability matters; strings with separators and non-ASCII text
+    return [{"id": n, "date": f"2025-01-{rng.randint(1, 9):02d}", "note": rng.choice(["a, b]", "é\n", "{x}"])}
+            for n in range(count)]
+
+
+def test_iter_json_array_across_chunks(tmp_path):
+    rows = make_rows(50)
+    for indent in (None, 4):
+        filename = write_list(tmp_path / "rows.json", rows, indent)
+        elements = list(iter_json_array(filename, chunk_size=7))  # Elements span many chunks
+        assert [element for element, _ in elements] == rows
+        assert all(size > 0 for _, size in elements)
+    assert list(iter_json_array(write_list(tmp_path / "empty.json", []))) == []
+
+
+def test_iter_json_array_rejects_other_files(tmp_path):
+    (tmp_path / "object.json").write_text('{"a": 1}')
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(tmp_path / "object.json")))
+    (tmp_path / "cut.json").write_text('[{"a": 1}, {"a": ')
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(tmp_path / "cut.json"), chunk_size=4))
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize("fan_in", [2, 64])
+def test_many_runs_match_sorted(tmp_path, reverse, fan_in):
+    rows = make_rows()
+    source = write_list(tmp_path / "rows.json", rows)
+    runs = tmp_path / "runs"
+    runs.mkdir()
+    # About 50 bytes per row: a run every few rows, and with fan_in=2 several merge passes
+    count = external_sort(source, str(tmp_path / "sorted.json"), key="date", reverse=reverse,
+                          memory_budget=200, fan_in=fan_in, tmp_dir=str(runs))
+    assert count == len(rows)
+    assert read_list(tmp_path / "sorted.json") == sorted(rows, key=lambda row: row["date"], reverse=reverse)
+    assert os.listdir(runs) == []  # Run files and their directory are removed
+    assert sorted(os.listdir(tmp_path)) == ["rows.json", "runs", "sorted.json"]
+
+
+def test_sorts_in_place_within_the_budget(tmp_path):
+    rows = make_rows(20)
+    source = write_list(tmp_path / "rows.json", rows)
+    assert external_sort(source, source, key=["date", "id"]) == 20
+    assert read_list(source) == sorted(rows, key=lambda row: (row["date"], row["id"]))
+    assert os.listdir(tmp_path) == ["rows.json"]
+
+
+def test_run_files_are_removed_after_a_failure(tmp_path):
+    source = write_list(tmp_path / "rows.json", make_rows(50) + [{"id": 50}])  # No date
+
+    with pytest.raises(KeyError):
+        external_sort(source, str(tmp_path / "sorted.json"), key="date", memory_budget=100)
+    assert os.listdir(tmp_path) == ["rows.json"]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_heap_sort_file_orders_like_heap_sort(tmp_path, reverse):
+    rows = make_rows(120, seed=1)
+    rows[5]["date"] = "2020-99-10"  # Invalid dates go last in both directions
+    rows[40]["date"] = None
+    rows[80]["date"] = "2025-1-5"
+    source = write_list(tmp_path / "histories.json", rows)
+    assert heap_sort_file(source, source, reverse=reverse, memory_budget=300) == len(rows)
+    expected = heap_sort([dict(row) for row in rows], reverse=reverse)
+    assert read_list(source) == expected
+    assert [row["id"] for row in expected[-3:]] == [5, 40, 80]
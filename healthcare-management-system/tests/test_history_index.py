@@ -0,0 +1,47 @@
+from medicalHistory.index import HistoryIndex
+
+
+def entry(history_id, diagnosis=(), medications=()):
+    return {"historyID": history_id, "diagnosis": list(diagnosis), "medications": list(medications)}
+
+
+def ids(entries):
+    return [e["historyID"] for e in entries]
+
+
+def make_index(count=50):
+    index = HistoryIndex()
+    # IDs that do not sort (or hash) in the order they are added
+    for number in range(count, 0, -1):
+        history_id = f"h{number * 7919 % 1000}"
+        index.add(history_id, entry(history_id, diagnosis=["flu"], medications=["rest"] if number % 2 else []))
+    return index
+
+
+def test_search_results_keep_insertion_order():
+    index = make_index()
+    added = list(index.entries)
+    assert ids(index.search_any(["flu"])) == added
+    assert ids(index.search_all(["flu", "rest"])) == [h for h in added if "rest" in index.entries[h]["medications"]]
+
+
+def test_update_keeps_position_and_reindexes_terms():
+    index = HistoryIndex()
+    index.add("h1", entry("h1", diagnosis=["flu"]))
+    index.add("h2", entry("h2", diagnosis=["flu"]))
+    index.update("h1", entry("h1", diagnosis=["flu", "asthma"]))
+    assert ids(index.search_any(["flu"])) == ["h1", "h2"]
+    assert ids(index.search_all(["FLU", " asthma "])) == ["h1"]
+    assert index.ids_for("asthma", field="diagnosis") == {"h1"}
+    assert index.ids_for("asthma", field="medications") == set()
+
+
+def test_remove_drops_every_posting():
+    index = HistoryIndex()
+    index.add("h1", entry("h1", diagnosis=["flu"]))
+    index.add("h2", entry("h2", diagnosis=["cold"]))
+    index.remove("h1")
+    assert index.search_any(["flu", "cold"]) == [index.entries["h2"]]
+    assert index.ids_for("flu") == set()
+    index.add("h1", entry("h1", diagnosis=["flu"]))
+    assert ids(index.search_any(["flu", "cold"])) == ["h2", "h1"]
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from utils import parallel_sort
+from utils.parallel_sort import parallel_sort_items
+from utils.sorting import sort_items
+
+
+def make_rows(count=500, seed=0):
+    rng = random.Random(seed)
+    return [{"date": f"2025-01-0{rng.randint(1, 4)}", "hour": rng.choice([9, 10]), "id": n} for n in range(count)]
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    # Counts the process pools started, so the tests know the parallel path ran
+    started = []
+
+    class CountingPool(parallel_sort.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            started.append(kwargs.get("max_workers"))
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(parallel_sort, "ProcessPoolExecutor", CountingPool)
+    return started
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_parallel_path_matches_sort_items(pools, reverse):
+    rows = make_rows()
+    for key in ("date", ["date", "hour"]):
+        result = parallel_sort_items(rows, key=key, reverse=reverse, workers=3, threshold=10)
+        assert result == sort_items(rows, key=key, reverse=reverse)
+    assert pools == [3, 3]
+
+
+def test_equal_keys_keep_their_order_across_chunks(pools):
+    rows = [{"date": "2025-01-01", "id": n} for n in range(40)] + [{"date": "2025-01-02", "id": 40}]
+    assert [row["id"] for row in parallel_sort_items(rows, key="date", workers=4, threshold=10)] == list(range(41))
+    reverse = parallel_sort_items(rows, key="date", reverse=True, workers=4, threshold=10)
+    assert [row["id"] for row in reverse] == [40] + list(range(40))
+    assert pools == [4, 4]
+
+
+def test_lowered_threshold_applies_to_the_record_sort(pools, monkeypatch):
+    from patientRecords.record import PatientRecordManager, Record
+
+    manager = PatientRecordManager()
+    for n in range(30):
+        manager.add_record(Record(n, f"2025-01-0{n % 3 + 1}", "10:00", None, "bob", "", "", "", "", "", ""))
+    expected = sort_items(manager.records, key="Date", reverse=True)
+    monkeypatch.setattr(parallel_sort, "PARALLEL_THRESHOLD", 10)
+    assert manager.sort_records(key="Date", reverse=True, parallel=True, workers=2) == expected
+    assert pools == [2]
+
+
+def test_small_inputs_and_one_worker_sort_serially(pools):
+    rows = make_rows(50)
+    assert parallel_sort_items(rows, key="date", workers=4) == sort_items(rows, key="date")
+    assert parallel_sort_items(rows, key="date", workers=1, threshold=10) == sort_items(rows, key="date")
+    assert pools == []
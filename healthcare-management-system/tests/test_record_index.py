@@ -0,0 +1,69 @@
+from patientRecords.record import PatientRecordManager, Record
+
+
+def make_record(record_id, date, patient="bob", diagnosis="flu"):
+    return Record(record_id, date, "10:00", None, patient, "", diagnosis, "", "", "", "")
+
+
+class ListRepository:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def list_records(self):
+        return self.rows
+
+    def save_record(self, row):
+        self.rows.append(row)
+
+
+def test_insert_and_range_queries():
+    manager = PatientRecordManager()
+    for record_id, date in (("r1", "2025-03-01"), ("r2", "2025-01-01"), ("r3", "2025-02-01")):
+        manager.add_record(make_record(record_id, date))
+    assert [r.recordID for r in manager.between("2025-01-01", "2025-02-15")] == ["r2", "r3"]
+    assert [r.recordID for r in manager.for_patient("bob")] == ["r1", "r2", "r3"]
+
+
+def test_update_moves_record_in_every_index():
+    manager = PatientRecordManager()
+    manager.add_record(make_record("r1", "2025-01-01"))
+    manager.add_record(make_record("r2", "2025-02-01"))
+    assert manager.update_record("r1", {"Date": "2025-03-01", "Patient": "al"})
+    assert [r.recordID for r in manager.between("2025-01-01", "2025-12-31")] == ["r2", "r1"]
+    assert [r.recordID for r in manager.for_patient("bob")] == ["r2"]
+    assert [r.recordID for r in manager.for_patient("al")] == ["r1"]
+    assert not manager.update_record("missing", {"Date": "2025-01-01"})
+
+
+def test_re_adding_an_id_replaces_the_record():
+    manager = PatientRecordManager()
+    manager.add_record(make_record("r1", "2025-01-01"))
+    replacement = manager.add_record(make_record("r1", "2025-05-01", patient="al"))
+    assert manager.records == [replacement]
+    assert manager.get("r1") is replacement
+    assert manager.for_patient("bob") == []
+    assert manager.between("2025-01-01", "2025-01-31") == []
+    assert manager.between("2025-05-01", "2025-05-01") == [replacement]
+
+
+def test_load_with_missing_dates_and_duplicate_ids():
+    rows = [make_record("r1", None).to_dict(), make_record("r2", "2025-01-01").to_dict(),
+            make_record("r1", "2025-02-01", patient="al").to_dict()]
+    manager = PatientRecordManager(repository=ListRepository(rows))
+    manager.load_records()
+    assert [r.recordID for r in manager.records] == ["r1", "r2"]
+    assert manager.get("r1").Date == "2025-02-01"
+    assert manager.for_patient("bob") == [manager.get("r2")]
+    assert [r.recordID for r in manager.between("2025-01-01", "2025-12-31")] == ["r2", "r1"]
+
+    # A record without a date can be added next to dated ones
+    manager.add_record(make_record("r3", None))
+    assert len(manager.between("", "2025-12-31")) == 3
+
+
+def test_where_matches_interned_values():
+    manager = PatientRecordManager()
+    manager.add_record(make_record("r1", "2025-01-01", diagnosis="asthma"))
+    manager.add_record(make_record("r2", "2025-01-02", diagnosis="flu"))
+    assert [r.recordID for r in manager.where("Diagnosis", "asthma")] == ["r1"]
+    assert manager.where("Diagnosis", "never stored") == []
@@ -0,0 +1,50 @@
+import json
+
+from Users.Doctors import Doctor
+from Users.registry import EntityRegistry
+from storage.repository import JsonRepository
+from storage.sqlite_repository import SQLiteRepository
+
+
+def test_doctor_names_do_not_load_schedules(tmp_path):
+    repository = JsonRepository(str(tmp_path))
+    for doctor_id in (2, 1):
+        repository.save_doctor(Doctor(DoctorID=doctor_id, Name=f"Dr. {doctor_id}", daysWorking={}))
+    # A doctor file written by something else is read once and added to doctors.json
+    with open(tmp_path / "doctor_3.json", "w") as file:
+        json.dump({"DoctorID": 3, "Name": "Dr. 3", "daysWorking": {}}, file)
+
+    registry = EntityRegistry(JsonRepository(str(tmp_path)))
+    assert registry.doctor_names() == {1: "Dr. 1", 2: "Dr. 2", 3: "Dr. 3"}
+    assert registry.stats()["loads"] == 0
+    assert json.loads((tmp_path / "doctors.json").read_text())["3"] == "Dr. 3"
+
+    doctor = registry.doctor(2)
+    doctor.updateProfile("Dr. Two", None)
+    registry.repository.save_doctor(doctor)
+    assert EntityRegistry(JsonRepository(str(tmp_path))).doctor_names()[2] == "Dr. Two"
+
+
+def test_doctor_names_with_sqlite_and_unsaved_doctors(tmp_path):
+    repository = SQLiteRepository(str(tmp_path / "test.db"))
+    repository.save_doctor(Doctor(DoctorID=5, Name="Dr. Five", daysWorking={}))
+    registry = EntityRegistry(repository)
+    registry.add_doctor(Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={}))
+    assert registry.doctor_names() == {1: "Dr. Smith", 5: "Dr. Five"}
+    assert registry.stats()["loads"] == 0
+    repository.close()
+
+
+def test_peek_doctor_neither_loads_nor_marks_used(tmp_path):
+    repository = JsonRepository(str(tmp_path))
+    for doctor_id in (1, 2):
+        repository.save_doctor(Doctor(DoctorID=doctor_id, Name=f"Dr. {doctor_id}", daysWorking={}))
+    registry = EntityRegistry(repository, capacity=1)
+    assert registry.peek_doctor(1) is None
+    assert registry.stats()["loads"] == 0
+
+    first = registry.doctor(1)
+    assert registry.peek_doctor(1) is first
+    registry.doctor(2)  # Evicts doctor 1, still referenced here
+    assert registry.peek_doctor(1) is first
+    assert registry.stats()["loads"] == 2
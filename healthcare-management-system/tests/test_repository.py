@@ -0,0 +1,85 @@
+import pytest
+
+from Users.Doctors import Doctor
+from storage.cache import DataCache
+from medicalHistory.heap_sort import date_ordinal, heap_sort
+from storage.repository import JsonRepository
+from storage.sqlite_repository import SQLiteRepository
+
+DATE = "2025-01-06"
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = JsonRepository(str(tmp_path))
+    repository.save_doctor(Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={DATE: [[9, 10, 11], []]}))
+    return repository
+
+
+def test_journaled_appointment_is_booked_again(repository):
+    # As after a crash between the journal append and the doctor write
+    repository.appointments.put({"appointmentID": 1, "date": DATE, "time": 10, "doctorID": 1, "patient": "bob"})
+    doctor = repository.get_doctor(1)
+    assert doctor.checkAvailability(DATE, 10)
+
+    repository.update_schedule([doctor], lambda: None)
+    assert not doctor.checkAvailability(DATE, 10)
+    assert not repository.get_doctor(1).checkAvailability(DATE, 10)
+
+
+def test_appointment_ids_are_reserved_in_blocks(tmp_path):
+    # Caches of their own, like two processes
+    first = JsonRepository(str(tmp_path), cache=DataCache())
+    second = JsonRepository(str(tmp_path), cache=DataCache())
+    ids = [first.next_appointment_id(), second.next_appointment_id(), first.next_appointment_id(),
+           second.next_appointment_id(40), first.next_appointment_id()]
+    assert ids == [1, 33, 2, 65, 3]
+    assert first.lock_stats()["appointments"]["acquisitions"] == 1
+
+
+def test_booking_does_not_rescan_the_doctors_history(repository, monkeypatch):
+    doctor = repository.get_doctor(1)
+    repository.update_schedule([doctor], lambda: None)  # Every journaled hour is checked once
+
+    def rescan(doctor_id):
+        raise AssertionError("the doctor's appointments were scanned again")
+
+    monkeypatch.setattr(repository, "appointments_for_doctor", rescan)
+    appointment = {"appointmentID": 1, "date": DATE, "time": 9, "doctorID": 1, "patient": "bob"}
+
+    def change():
+        doctor.bookHour(DATE, 9)
+        return [appointment], []
+
+    repository.update_schedule([doctor], change)
+    assert not repository.get_doctor(1).checkAvailability(DATE, 9)
+
+
+def test_hour_journaled_by_another_process_is_booked_again(tmp_path):
+    first = JsonRepository(str(tmp_path), cache=DataCache())
+    first.save_doctor(Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={DATE: [[9, 10, 11], []]}))
+    doctor = first.get_doctor(1)
+    first.update_schedule([doctor], lambda: None)
+
+    # Another process appends and stops before writing the doctor file
+    second = JsonRepository(str(tmp_path), cache=DataCache())
+    second.appointments.put({"appointmentID": 7, "date": DATE, "time": 11, "doctorID": 1, "patient": "al"})
+
+    first.update_schedule([doctor], lambda: None)
+    assert not doctor.checkAvailability(DATE, 11)
+    assert not JsonRepository(str(tmp_path), cache=DataCache()).get_doctor(1).checkAvailability(DATE, 11)
+
+
+def test_both_backends_order_histories_alike(tmp_path):
+    # Only YYYY-MM-DD is a date; SQLite's date() rejects the compact form date.fromisoformat accepts
+    dates = ["2024-03-01", "20240105", "2024-01-05", "2024-1-5", "2024-02-30", " 2024-02-01",
+             "2024-01-05T10:00", None, "2023-12-31", "2020-99-10"]
+    assert date_ordinal("20240105") is None and date_ordinal("2024-01-05") is not None
+    entries = [{"historyID": str(n), "date": date_key, "patient": "bob"} for n, date_key in enumerate(dates)]
+    expected = ["8", "2", "0", "1", "3", "4", "5", "6", "7", "9"]
+    for repository in (JsonRepository(str(tmp_path), cache=DataCache()),
+                       SQLiteRepository(str(tmp_path / "test.db"))):
+        repository.save_histories(entries)
+        assert [entry["historyID"] for entry in repository.histories_by_date()] == expected
+        repository.close()
+    assert [entry["historyID"] for entry in heap_sort([dict(entry) for entry in entries])] == expected
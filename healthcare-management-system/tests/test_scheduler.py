@@ -0,0 +1,123 @@
+from Users.Doctors import Doctor
+from Users.Patient import patient
+from appointmentSchedule.appointment import appointmentScheduler
+from storage.cache import DataCache
+from storage.repository import JsonRepository
+
+DATE = "2025-01-06"
+
+
+def test_appointments_is_a_live_read_only_view():
+    scheduler = appointmentScheduler()
+    doctor = Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={DATE: [[9, 10], []]})
+    view = scheduler.appointments
+    assert scheduler.schedule(DATE, 9, doctor, patient("Bob", "Jones", "1990-01-01", 1, "", "", ""))
+    assert len(view) == 1
+    assert not hasattr(view, "append")
+
+
+def make_patient(name):
+    return patient(name, "Jones", "1990-01-01", name, "", "", "")
+
+
+def make_doctor(doctor_id=1):
+    return Doctor(DoctorID=doctor_id, Name=f"Dr. {doctor_id}", daysWorking={DATE: [[9, 10, 11], []]})
+
+
+def snapshot(scheduler, *doctors):
+    return ([(a.AppointmentID, a.DateTime) for a in scheduler.appointments],
+            [doctor.getDaysWorking() for doctor in doctors])
+
+
+class RetryingRepository:
+    # Runs change() twice, as a repository retrying after a conflict would
+    def __init__(self):
+        self.saved = []
+        self.next_id = 1
+
+    def update_schedule(self, doctors, change):
+        stored = [Doctor.from_dict(doctor.to_dict()) for doctor in doctors]
+        change()
+        for doctor, copy in zip(doctors, stored):
+            doctor.refreshFrom(copy)  # The second run starts from the stored schedules again
+        result = change()
+        if result is not None:
+            self.saved.append(result)
+        return result
+
+    def next_appointment_id(self, count=1):
+        first = self.next_id
+        self.next_id += count
+        return first
+
+
+def test_schedule_many_with_a_conflict_changes_nothing():
+    scheduler = appointmentScheduler()
+    first, second = make_doctor(1), make_doctor(2)
+    assert scheduler.schedule(DATE, 10, second, make_patient("al"))
+    before = snapshot(scheduler, first, second)
+
+    committed, results = scheduler.schedule_many([
+        (DATE, 9, first, make_patient("bob")),
+        (DATE, 10, second, make_patient("cy")),  # Already booked
+        (DATE, 11, first, make_patient("di")),
+    ])
+    assert not committed
+    assert [result["ok"] for result in results] == [True, False, True]
+    assert snapshot(scheduler, first, second) == before
+
+
+def test_schedule_many_when_change_runs_again():
+    scheduler = appointmentScheduler(repository=RetryingRepository())
+    doctor = make_doctor()
+    committed, results = scheduler.schedule_many([(DATE, 9, doctor, make_patient("bob")),
+                                                  (DATE, 10, doctor, make_patient("cy"))])
+    assert committed and [result["ok"] for result in results] == [True, True]
+    assert len(scheduler.appointments) == 2
+    assert [a.AppointmentID for a in scheduler.in_order()] == [result["AppointmentID"] for result in results]
+
+
+def test_cancel_many_with_an_unknown_id_changes_nothing():
+    scheduler = appointmentScheduler()
+    doctor = make_doctor()
+    scheduler.schedule(DATE, 9, doctor, make_patient("bob"))
+    scheduler.schedule(DATE, 10, doctor, make_patient("cy"))
+    before = snapshot(scheduler, doctor)
+
+    committed, results = scheduler.cancel_many([1, 99])
+    assert not committed and [result["ok"] for result in results] == [True, False]
+    assert snapshot(scheduler, doctor) == before
+    committed, _ = scheduler.cancel_many([1, 1])
+    assert not committed and snapshot(scheduler, doctor) == before
+
+
+def test_reschedule_many_with_a_conflict_changes_nothing():
+    scheduler = appointmentScheduler()
+    doctor = make_doctor()
+    scheduler.schedule(DATE, 9, doctor, make_patient("bob"))
+    scheduler.schedule(DATE, 10, doctor, make_patient("cy"))
+    before = snapshot(scheduler, doctor)
+
+    committed, results = scheduler.reschedule_many([(1, DATE, 11), (2, DATE, 11)])  # Both want 11
+    assert not committed and [result["ok"] for result in results] == [True, False]
+    assert snapshot(scheduler, doctor) == before
+    assert [a.get_date_hour() for a in scheduler.in_order()] == [(DATE, 9), (DATE, 10)]
+
+    committed, _ = scheduler.reschedule_many([(1, DATE, 10), (2, DATE, 9)])  # A swap is fine
+    assert committed
+    assert [a.AppointmentID for a in scheduler.in_order()] == [2, 1]
+
+
+def test_rejected_batch_stores_nothing(tmp_path):
+    repository = JsonRepository(str(tmp_path), cache=DataCache())
+    repository.save_doctor(make_doctor())
+    doctor = repository.get_doctor(1)
+    scheduler = appointmentScheduler(repository=repository)
+    assert scheduler.schedule(DATE, 10, doctor, make_patient("al"))
+
+    committed, _ = scheduler.schedule_many([(DATE, 9, doctor, make_patient("bob")),
+                                            (DATE, 10, doctor, make_patient("cy"))])
+    assert not committed
+    stored = JsonRepository(str(tmp_path), cache=DataCache())
+    assert [(a["date"], a["time"]) for a in stored.list_appointments()] == [(DATE, 10)]
+    assert stored.get_doctor(1).freeSlots(DATE) == (9, 11)
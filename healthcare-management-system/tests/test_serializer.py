@@ -0,0 +1,98 @@
+import io
+import json
+import sys
+
+import pytest
+
+from utils import serializer as serializer_module
+from utils.serializer import Serializer, get_serializer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+needs_orjson = pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+BACKENDS = ["stdlib", pytest.param("orjson", marks=needs_orjson)]
+MODES = ["compact", "pretty"]
+DATA = {
+    "DoctorID": 1,
+    "Name": "Dr. Müller 医生",
+    "daysWorking": {"2025-01-06": [[9, 10], [10]]},
+    "weeklyHours": {"Monday": [9, 10, 11]},
+    "archivedBefore": None,
+    "ratio": 0.5,
+    "active": True,
+}
+# The repositories write dictionaries keyed by DoctorID (doctors.json) or PatientID
+INT_KEYED = {1: "Dr. Smith", 22: "Dr. Ødegaard"}
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_round_trip(backend, mode):
+    serializer = Serializer(backend, mode)
+    assert serializer.backend == backend
+    text = serializer.dumps(DATA)
+    assert isinstance(text, bytes)
+    assert serializer.loads(text) == DATA
+    assert serializer.loads(text.decode()) == DATA
+    file = io.BytesIO()
+    serializer.dump([DATA, DATA], file)
+    file.seek(0)
+    assert serializer.load(file) == [DATA, DATA]
+    assert (b"\n" in text) == (mode == "pretty")
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_int_keys_are_written_as_strings(backend, mode):
+    serializer = Serializer(backend, mode)
+    assert serializer.loads(serializer.dumps(INT_KEYED)) == {"1": "Dr. Smith", "22": "Dr. Ødegaard"}
+    assert json.loads(serializer.dumps(INT_KEYED)) == json.loads(json.dumps(INT_KEYED))
+
+
+@needs_orjson
+@pytest.mark.parametrize("mode", MODES)
+def test_backends_read_each_others_output(mode):
+    stdlib, fast = Serializer("stdlib", mode), Serializer("orjson", mode)
+    assert fast.loads(stdlib.dumps(DATA)) == DATA
+    assert stdlib.loads(fast.dumps(DATA)) == DATA
+
+
+def test_stdlib_layouts():
+    assert Serializer("stdlib", "compact").dumps({"a": [1]}) == b'{"a":[1]}'
+    assert Serializer("stdlib", "pretty").dumps({"a": 1}) == b'{\n    "a": 1\n}'
+
+
+@needs_orjson
+def test_orjson_layouts():
+    assert Serializer("orjson", "compact").dumps({"a": [1]}) == b'{"a":[1]}'
+    assert Serializer("orjson", "pretty").dumps({"a": 1}) == b'{\n  "a": 1\n}'
+    pretty = Serializer("orjson", "pretty")
+    assert pretty.compact().mode == "compact" and pretty.compact().backend == "orjson"
+
+
+def test_falls_back_to_stdlib_without_orjson(monkeypatch):
+    monkeypatch.setitem(sys.modules, "orjson", None)  # Makes `import orjson` fail
+    serializer = Serializer("auto", "pretty")
+    assert serializer.backend == "stdlib"
+    assert serializer.loads(serializer.dumps(DATA)) == DATA
+    with pytest.raises(ImportError):
+        Serializer("orjson")
+
+
+def test_unknown_backend_or_mode():
+    with pytest.raises(ValueError):
+        Serializer("yaml")
+    with pytest.raises(ValueError):
+        Serializer("stdlib", "tabs")
+
+
+def test_default_from_the_environment(monkeypatch):
+    monkeypatch.setattr(serializer_module, "_default", None)
+    monkeypatch.setenv("MEDITRACK_JSON_BACKEND", "stdlib")
+    monkeypatch.setenv("MEDITRACK_JSON_MODE", "pretty")
+    serializer = get_serializer()
+    assert (serializer.backend, serializer.mode) == ("stdlib", "pretty")
+    assert get_serializer() is serializer  # Read once
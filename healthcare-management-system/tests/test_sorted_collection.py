@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from utils.sorted_collection import SortedCollection
+
+
+class Item:
+    def __init__(self, date, name):
+        self.date = date
+        self.name = name
+
+    def __repr__(self):
+        return f"Item({self.date!r}, {self.name!r})"
+
+
+def expected_order(items):
+    return sorted(items, key=lambda item: item.date)  # Stable, like the collection
+
+
+def test_add_keeps_key_order_and_insertion_order_of_ties():
+    items = [Item(day % 7, str(day)) for day in range(50)]
+    collection = SortedCollection(key="date", bucket_size=4)  # Small buckets: many splits
+    for item in items:
+        collection.add(item)
+    assert list(collection) == expected_order(items)
+    assert list(reversed(collection)) == expected_order(items)[::-1]
+    assert len(collection) == 50
+
+
+def test_initial_items_are_sorted_once():
+    items = [Item(day % 5, str(day)) for day in range(30)]
+    collection = SortedCollection(items, key="date", bucket_size=4)
+    assert list(collection) == expected_order(items)
+    collection.add(Item(2, "late"))
+    assert [item.name for item in collection if item.date == 2][-1] == "late"
+
+
+def test_remove_by_identity_across_buckets():
+    items = [Item(1, str(n)) for n in range(20)]  # Equal keys spanning several buckets
+    collection = SortedCollection(items, key="date", bucket_size=2)
+    collection.remove(items[13])
+    assert items[13] not in collection
+    assert list(collection) == items[:13] + items[14:]
+    with pytest.raises(ValueError):
+        collection.remove(items[13])
+    collection.discard(items[13])  # No error
+    assert len(collection) == 19
+
+
+def test_update_moves_a_mutated_item():
+    items = [Item(day, str(day)) for day in range(10)]
+    collection = SortedCollection(items, key="date", bucket_size=2)
+    items[2].date = 20
+    collection.update(items[2])
+    assert list(collection)[-1] is items[2]
+    assert len(collection) == 10
+    new = Item(5, "new")
+    collection.update(new)  # Not in the collection yet: added
+    assert new in collection and len(collection) == 11
+
+
+def test_irange_is_inclusive():
+    items = [Item(day, str(day)) for day in range(0, 20, 2)]
+    collection = SortedCollection(items, key="date", bucket_size=2)
+    assert [item.date for item in collection.irange(3, 10)] == [4, 6, 8, 10]
+    assert [item.date for item in collection.irange(21, 30)] == []
+    assert [item.date for item in collection.irange(-1, 0)] == [0]
+
+
+def test_random_operations_match_a_sorted_list():
+    rng = random.Random(0)
+    collection = SortedCollection(key="date", bucket_size=3)
+    reference = []
+    for step in range(500):
+        if reference and rng.random() < 0.4:
+            item = reference.pop(rng.randrange(len(reference)))
+            collection.remove(item)
+        else:
+            item = Item(rng.randint(0, 30), str(step))
+            collection.add(item)
+            reference.append(item)
+    assert list(collection) == expected_order(reference)
+    assert len(collection) == len(reference)
+    collection.clear()
+    assert list(collection) == [] and len(collection) == 0
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from utils.sorting import STRATEGIES, sort_items
+
+
+def make_rows(count=200, seed=0):
+    rng = random.Random(seed)
+    # Few distinct dates, so most keys tie
+    return [{"Date": f"2025-01-0{rng.randint(1, 5)}", "Time": rng.choice(["09:00", "10:00"]), "id": i}
+            for i in range(count)]
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGIES))
+@pytest.mark.parametrize("reverse", [False, True])
+def test_matches_sorted_including_ties(strategy, reverse):
+    rows = make_rows()
+    expected = sorted(rows, key=lambda row: row["Date"], reverse=reverse)
+    assert sort_items(rows, "Date", reverse=reverse, strategy=strategy) == expected
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGIES))
+def test_reverse_keeps_equal_keys_in_their_order(strategy):
+    rows = [{"Date": "2025-01-01", "id": 1}, {"Date": "2025-01-02", "id": 2}, {"Date": "2025-01-01", "id": 3}]
+    result = sort_items(rows, "Date", reverse=True, strategy=strategy)
+    assert [row["id"] for row in result] == [2, 1, 3]
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGIES))
+def test_multiple_keys_and_key_functions(strategy):
+    rows = make_rows(seed=1)
+    expected = sorted(rows, key=lambda row: (row["Date"], row["Time"]))
+    assert sort_items(rows, ["Date", "Time"], strategy=strategy) == expected
+    assert sort_items(rows, lambda row: -row["id"], strategy=strategy) == rows[::-1]
+
+
+def test_items_with_equal_keys_are_never_compared():
+    class Opaque:
+        def __init__(self, date):
+            self.Date = date
+
+    items = [Opaque("2025-01-02"), Opaque("2025-01-01"), Opaque("2025-01-02")]
+    for strategy in STRATEGIES:
+        assert sort_items(items, "Date", strategy=strategy) == [items[1], items[0], items[2]]
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        sort_items([], strategy="bogo")
+
+
+def test_package_quick_sort_is_the_keyed_one():
+    from patientRecords import quick_sort
+    from patientRecords.record import Record
+
+    records = [Record(f"r{n}", date, "10:00", None, "bob", "", "", "", "", "", "")
+               for n, date in enumerate(["2025-03-01", "2025-01-01", "2025-03-01"])]
+    assert quick_sort(records, key="Date") == [records[1], records[0], records[2]]
+    assert quick_sort(records, key="Date", reverse=True) == [records[0], records[2], records[1]]
+    assert quick_sort([{"dob": "2001"}, {"dob": "1999"}]) == [{"dob": "1999"}, {"dob": "2001"}]
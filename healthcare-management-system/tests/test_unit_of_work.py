@@ -0,0 +1,84 @@
+from storage.unit_of_work import UnitOfWork
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def recorder(written, key):
+    return lambda: written.append(key)
+
+
+def test_flushes_after_max_changes():
+    written = []
+    unit = UnitOfWork(max_changes=3, max_delay=60, clock=FakeClock())
+    unit.add("a", recorder(written, "a"))
+    unit.add("a", recorder(written, "a"))  # Replaces the pending writer, but counts as a change
+    assert written == [] and unit.pending("a")
+    unit.add("b", recorder(written, "b"))
+    assert written == ["a", "b"]
+    assert not unit.pending()
+    assert unit.stats() == {"flushes": 1, "writes": 2, "pending": 0}
+
+
+def test_flushes_after_max_delay():
+    written, clock = [], FakeClock()
+    unit = UnitOfWork(max_changes=100, max_delay=2.0, clock=clock)
+    unit.add("a", recorder(written, "a"))
+    clock.now = 1.9
+    assert not unit.flush_if_due()
+    clock.now = 2.0
+    assert unit.flush_if_due()
+    assert written == ["a"]
+    assert not unit.flush_if_due()  # Nothing pending
+
+
+def test_age_is_checked_on_the_next_change():
+    written, clock = [], FakeClock()
+    unit = UnitOfWork(max_changes=100, max_delay=2.0, clock=clock)
+    unit.add("a", recorder(written, "a"))
+    clock.now = 5.0
+    unit.add("b", recorder(written, "b"))
+    assert written == ["a", "b"]
+
+
+def test_batch_defers_until_the_outermost_end():
+    written = []
+    unit = UnitOfWork(max_changes=1, clock=FakeClock())
+    with unit.batch():
+        unit.add("a", recorder(written, "a"))
+        with unit.batch():
+            unit.add("b", recorder(written, "b"), defer=False)
+        assert written == [] and not unit.flush_if_due()
+    assert written == ["a", "b"]
+
+
+def test_defer_false_writes_at_once_outside_a_batch():
+    written = []
+    unit = UnitOfWork(max_changes=100, clock=FakeClock())
+    unit.add("a", recorder(written, "a"))
+    unit.add("doctor", recorder(written, "doctor"), defer=False)
+    assert written == ["a", "doctor"]
+
+
+def test_failed_writer_stays_pending():
+    written = []
+
+    def fail():
+        raise OSError("disk full")
+
+    unit = UnitOfWork(clock=FakeClock())
+    unit.add("a", fail)
+    unit.add("b", recorder(written, "b"))
+    try:
+        unit.flush()
+    except OSError:
+        pass
+    assert written == [] and unit.pending("a") and unit.pending("b")
+    unit.add("a", recorder(written, "a"))
+    unit.flush()
+    assert written == ["b", "a"]
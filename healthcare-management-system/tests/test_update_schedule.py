@@ -0,0 +1,216 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from Users.Doctors import DEFAULT_WEEKLY_HOURS, Doctor
+from storage.archive import archive_doctor, archived_day
+from storage.cache import DataCache
+from storage.repository import JsonRepository
+from storage.sqlite_repository import SQLiteRepository
+
+OLD_DATE = "2024-12-02"
+DATE = "2025-06-02"
+
+
+def open_storage(root, storage):
+    if storage == "json":
+        return JsonRepository(root, cache=DataCache())  # A cache of its own, like another process
+    return SQLiteRepository(os.path.join(root, "test.db"))
+
+
+def book(root, storage, date, hour):
+    # Books one hour through a repository of its own (run in a separate process)
+    repository = open_storage(root, storage)
+    doctor = repository.get_doctor(1)
+
+    def change():
+        if not doctor.bookHour(date, hour):
+            return None
+        appointment = {"appointmentID": repository.next_appointment_id(), "date": date, "time": hour,
+                       "doctorID": 1, "patient": "bob"}
+        return [appointment], []
+    repository.update_schedule([doctor], change)
+    repository.close()
+
+
+def book_in_process(root, storage, date, hour):
+    process = multiprocessing.get_context("spawn").Process(target=book, args=(root, storage, date, hour))
+    process.start()
+    process.join(60)
+    assert process.exitcode == 0
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def storage(request, tmp_path):
+    repository = open_storage(str(tmp_path), request.param)
+    repository.save_doctor(Doctor(DoctorID=1, Name="Dr. Smith",
+                                  daysWorking={OLD_DATE: [[9, 10], [9]], DATE: [[9, 10, 11], []]}))
+    repository.close()
+    return str(tmp_path), request.param
+
+
+def test_failed_change_saves_nothing(storage):
+    root, backend = storage
+    repository = open_storage(root, backend)
+    doctor = repository.get_doctor(1)
+
+    def change():
+        doctor.bookHour(DATE, 9)
+        repository.next_appointment_id()
+        raise RuntimeError("payment declined")
+    with pytest.raises(RuntimeError):
+        repository.update_schedule([doctor], change)
+
+    def declined():
+        doctor.bookHour(DATE, 10)
+        return None
+    assert repository.update_schedule([doctor], declined) is None
+    repository.close()
+
+    stored = open_storage(root, backend)
+    assert stored.list_appointments() == []
+    assert stored.get_doctor(1).freeSlots(DATE) == (9, 10, 11)
+
+
+def test_change_saves_appointments_and_schedule_together(storage):
+    root, backend = storage
+    book(root, backend, DATE, 11)
+    stored = open_storage(root, backend)
+    assert [(a["date"], a["time"]) for a in stored.list_appointments()] == [(DATE, 11)]
+    assert stored.get_doctor(1).freeSlots(DATE) == (9, 10)
+
+
+def store_viewed_dates(root, backend):
+    # Doctor 2 as written by older versions: no weekly hours, and dates stored just because they were viewed
+    viewed = {"2020-08-15": [[], []], "2025-06-03": [DEFAULT_WEEKLY_HOURS["Tuesday"], []]}
+    if backend == "json":
+        with open(os.path.join(root, "doctor_2.json"), "w") as file:
+            json.dump({"DoctorID": 2, "Name": "Dr. Jones", "daysWorking": viewed}, file)
+        return
+    repository = open_storage(root, backend)
+    repository.save_doctor(Doctor(DoctorID=2, Name="Dr. Jones", daysWorking={}))
+    with repository.connection:
+        for date_key, (working, _) in viewed.items():
+            repository.connection.execute("INSERT INTO doctor_days (doctor_id, date) VALUES (2, ?)", (date_key,))
+            repository.connection.executemany(
+                "INSERT INTO doctor_slots (doctor_id, date, hour, working, booked) VALUES (2, ?, ?, 1, 0)",
+                [(date_key, hour) for hour in working],
+            )
+    repository.close()
+
+
+def test_dates_matching_the_weekly_hours_are_not_saved(storage):
+    root, backend = storage
+    store_viewed_dates(root, backend)
+    repository = open_storage(root, backend)
+    doctor = repository.get_doctor(2)
+    assert set(doctor.daysWorking) == {"2020-08-15", "2025-06-03"}
+    doctor.setWeeklyHours(DEFAULT_WEEKLY_HOURS)  # As the appointments menu does for such schedules
+
+    def change():
+        doctor.bookHour(DATE, 9)
+        appointment = {"appointmentID": repository.next_appointment_id(), "date": DATE, "time": 9,
+                       "doctorID": 2, "patient": "bob"}
+        return [appointment], []
+    repository.update_schedule([doctor], change)
+    repository.close()
+
+    if backend == "json":
+        with open(os.path.join(root, "doctor_2.json")) as file:
+            assert set(json.load(file)["daysWorking"]) == {DATE}
+    stored = open_storage(root, backend).get_doctor(2)
+    assert set(stored.daysWorking) == {DATE}
+    assert stored.freeSlots("2025-06-03") == tuple(DEFAULT_WEEKLY_HOURS["Tuesday"])
+    assert stored.freeSlots("2020-08-15") == ()
+
+
+def test_archive_keeps_hours_booked_by_another_process(storage):
+    root, backend = storage
+    repository = open_storage(root, backend)
+    stale = repository.get_doctor(1)  # Loaded before the other process books
+    book_in_process(root, backend, DATE, 10)
+
+    assert archive_doctor(repository, stale, before="2025-01-01") == 1
+    repository.close()
+
+    stored = open_storage(root, backend)
+    assert stored.get_doctor(1).freeSlots(DATE) == (9, 11)
+    assert OLD_DATE not in stored.get_doctor(1).daysWorking
+    assert archived_day(stored, 1, OLD_DATE) == [[9, 10], [9]]
+
+
+def test_legacy_key_migration_keeps_hours_booked_by_another_process(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    with open(os.path.join(root, "doctor_1.json"), "w") as file:
+        json.dump({"DoctorID": 1, "Name": "Dr. Smith",
+                   "daysWorking": {"Monday": [[9, 10], []], DATE: [[9, 10, 11], []]}}, file)
+
+    # The other process books right after this one read the legacy file
+    migrate = Doctor.migrate_legacy_day_keys
+    calls = []
+
+    def migrate_then_book(doctor, *args):
+        changed = migrate(doctor, *args)
+        if not calls:
+            calls.append(doctor)
+            book_in_process(root, "json", DATE, 11)
+        return changed
+    monkeypatch.setattr(Doctor, "migrate_legacy_day_keys", migrate_then_book)
+
+    doctor = open_storage(root, "json").get_doctor(1)
+    assert not doctor.checkAvailability(DATE, 11)
+    stored = open_storage(root, "json").get_doctor(1)
+    assert not stored.checkAvailability(DATE, 11)
+    assert "Monday" not in stored.daysWorking
+
+
+def book_change(repository, doctor, hour, patient="bob"):
+    def change():
+        if not doctor.bookHour(DATE, hour):
+            return None
+        appointment = {"appointmentID": repository.next_appointment_id(), "date": DATE, "time": hour,
+                       "doctorID": 1, "patient": patient}
+        return [appointment], []
+    return change
+
+
+def test_sqlite_batch_failure_rolls_back_the_updates_before_it(tmp_path):
+    root = str(tmp_path)
+    repository = open_storage(root, "sqlite")
+    repository.save_doctor(Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={DATE: [[9, 10, 11], []]}))
+    doctor = repository.get_doctor(1)
+    with pytest.raises(RuntimeError):
+        with repository.batch():
+            repository.save_doctor(Doctor(DoctorID=2, Name="Dr. Jones", daysWorking={}))
+            repository.update_schedule([doctor], book_change(repository, doctor, 9))
+            assert not open_storage(root, "sqlite").list_appointments()  # Not committed on its own
+            raise RuntimeError("copy failed")
+    repository.close()
+
+    stored = open_storage(root, "sqlite")
+    assert stored.list_appointments() == []
+    assert stored.get_doctor(2) is None
+    assert stored.get_doctor(1).freeSlots(DATE) == (9, 10, 11)
+
+
+def test_sqlite_failed_update_in_a_batch_keeps_the_batch(tmp_path):
+    root = str(tmp_path)
+    repository = open_storage(root, "sqlite")
+    repository.save_doctor(Doctor(DoctorID=1, Name="Dr. Smith", daysWorking={DATE: [[9, 10, 11], []]}))
+    doctor = repository.get_doctor(1)
+
+    def failing():
+        book_change(repository, doctor, 10)()
+        raise RuntimeError("payment declined")
+    with repository.batch():
+        repository.update_schedule([doctor], book_change(repository, doctor, 9))
+        with pytest.raises(RuntimeError):
+            repository.update_schedule([doctor], failing)
+        repository.update_schedule([doctor], book_change(repository, doctor, 11, "al"))
+    repository.close()
+
+    stored = open_storage(root, "sqlite")
+    assert [(a["time"], a["patient"]) for a in stored.list_appointments()] == [(9, "bob"), (11, "al")]
+    assert stored.get_doctor(1).freeSlots(DATE) == (10,)
@@ -0,0 +1,61 @@
+from patientRecords.record import PatientRecordManager, Record
+from storage.repository import JsonRepository
+from storage.cache import DataCache
+from storage.sqlite_repository import SQLiteRepository
+from utils.vocabulary import VOCABULARY, Vocabulary, decode_rows, encode_rows
+
+
+def test_intern_returns_one_copy():
+    vocabulary = Vocabulary()
+    first = vocabulary.intern("".join(["as", "thma"]))
+    assert vocabulary.intern("".join(["ast", "hma"])) is first
+    assert vocabulary.canonical("asthma") is first
+    assert vocabulary.canonical("flu") is None
+
+
+def test_code_of_does_not_add_codes():
+    vocabulary = Vocabulary()
+    vocabulary.intern("asthma")
+    assert vocabulary.code_of("asthma") is None  # Interned, but never encoded
+    assert vocabulary.encode("asthma") == 0
+    assert vocabulary.code_of("asthma") == 0
+    assert vocabulary.code_of("flu") is None
+    assert vocabulary.values() == ["asthma"]
+
+
+def test_intern_stops_at_max_size():
+    vocabulary = Vocabulary(max_size=2)
+    vocabulary.intern_rows([{"d": "a"}, {"d": ["b", "c"]}], ["d"])
+    assert len(vocabulary) == 2 and vocabulary.full
+    assert "c" not in vocabulary
+    assert vocabulary.intern("c") == "c"  # Still returned, just not shared
+    assert vocabulary.intern("a") is vocabulary.canonical("a")
+
+
+def test_encoding_is_not_bounded():
+    rows = [{"d": value} for value in ("a", "b", "a", "b")]
+    vocabulary = Vocabulary(max_size=1)
+    assert decode_rows(encode_rows(rows, ["d"]), ["d"], vocabulary) == rows
+
+
+def test_where_scans_once_the_vocabulary_is_full():
+    manager = PatientRecordManager(vocabulary=Vocabulary(max_size=1))
+    for record_id, diagnosis in (("r1", "flu"), ("r2", "asthma"), ("r3", "asthma")):
+        manager.add_record(Record(record_id, "2025-01-01", "10:00", None, "bob", "", diagnosis, "", "", "", ""))
+    assert [r.recordID for r in manager.where("Diagnosis", "asthma")] == ["r2", "r3"]
+    assert [r.recordID for r in manager.where("Diagnosis", "flu")] == ["r1"]
+    assert manager.where("Diagnosis", "cold") == []
+
+
+def test_each_repository_has_its_own_vocabulary(tmp_path):
+    first = JsonRepository(str(tmp_path / "a"), cache=DataCache())
+    second = SQLiteRepository(":memory:")
+    assert first.vocabulary is not second.vocabulary
+    assert VOCABULARY not in (first.vocabulary, second.vocabulary)
+    assert PatientRecordManager(repository=first).vocabulary is first.vocabulary
+    assert PatientRecordManager().vocabulary is VOCABULARY
+
+    first.save_record({"recordID": "r1", "Date": "2025-01-01", "Diagnosis": "sprain"})
+    PatientRecordManager(repository=first).load_records()
+    assert "sprain" in first.vocabulary
+    assert "sprain" not in second.vocabulary